@@ -36,6 +36,7 @@ class Analyse:
     def __init__(self, app):
         self.filepath = '/analysedata'
         self.app = app
+        self.transform = self.app.transform
 
         self.app.ui.btn_split.clicked.connect(self.splitData)
 
@@ -60,12 +61,13 @@ class Analyse:
             self.logger.error('analyse data file {0}, Error : {1}'.format(filenameData, e))
             return
 
-    def processTheSkyXLine(self, line):
-        ra_sol = self.app.mount.degStringToDecimal(line[0:13], ' ')
-        dec_sol = self.app.mount.degStringToDecimal(line[15:28], ' ')
-        ra = self.app.mount.degStringToDecimal(line[30:43], ' ')
-        dec = self.app.mount.degStringToDecimal(line[45:58], ' ')
-        lst = self.app.mount.degStringToDecimal(line[61:70], ' ')
+    def processTheSkyXLines(self, lines):
+        # all lines are converted in one batch
+        ra_sol = self.transform.degStringToDecimal([line[0:13] for line in lines], ' ')
+        dec_sol = self.transform.degStringToDecimal([line[15:28] for line in lines], ' ')
+        ra = self.transform.degStringToDecimal([line[30:43] for line in lines], ' ')
+        dec = self.transform.degStringToDecimal([line[45:58] for line in lines], ' ')
+        lst = self.transform.degStringToDecimal([line[61:70] for line in lines], ' ')
         return ra, dec, ra_sol, dec_sol, lst
 
     def loadTheSkyXData(self, filename):
@@ -74,85 +76,34 @@ class Analyse:
             with open(filename) as infile:
                 lines = infile.read().splitlines()
             infile.close()
-            # site_latitude = self.app.mount.degStringToDecimal(lines[4][0:9], ' ')
-            for i in range(5, len(lines)):
-                ra, dec, ra_sol, dec_sol, lst = self.processTheSkyXLine(lines[i])
-                if 'RaJ2000' in resultData:
-                    resultData['RaJ2000'].append(ra)
-                else:
-                    resultData['RaJ2000'] = [ra]
-                if 'DecJ2000' in resultData:
-                    resultData['DecJ2000'].append(dec)
-                else:
-                    resultData['DecJ2000'] = [dec]
-                ra_Jnow, dec_Jnow = self.app.mount.transformERFA(ra, dec, 3)
-                if 'RaJNow' in resultData:
-                    resultData['RaJNow'].append(ra_Jnow)
-                else:
-                    resultData['RaJNow'] = [ra_Jnow]
-                if 'DecJNow' in resultData:
-                    resultData['decJNow'].append(dec_Jnow)
-                else:
-                    resultData['DecJNow'] = [dec_Jnow]
-                if 'LocalSiderealTimeFloat' in resultData:
-                    resultData['LocalSiderealTimeFloat'].append(lst)
-                else:
-                    resultData['LocalSiderealTimeFloat'] = [lst]
-                if 'LocalSiderealTime' in resultData:
-                    resultData['LocalSiderealTime'].append(self.app.mount.decimalToDegree(lst, False, True))
-                else:
-                    resultData['LocalSiderealTime'] = [self.app.mount.decimalToDegree(lst, False, True)]
-                if 'RaJ2000Solved' in resultData:
-                    resultData['RaJ2000Solved'].append(ra_sol)
-                else:
-                    resultData['RaJ2000Solved'] = [ra_sol]
-                if 'DecJ2000Solved' in resultData:
-                    resultData['DecJ2000Solved'].append(dec_sol)
-                else:
-                    resultData['DecJ2000Solved'] = [dec_sol]
-                ra_sol_Jnow, dec_sol_Jnow = self.app.mount.transformERFA(ra_sol, dec_sol, 3)
-                if 'RaJNowSolved' in resultData:
-                    resultData['RaJNowSolved'].append(ra_sol_Jnow)
-                else:
-                    resultData['RaJNowSolved'] = [ra_sol_Jnow]
-                if 'DecJNowSolved' in resultData:
-                    resultData['DecJNowSolved'].append(dec_sol_Jnow)
-                else:
-                    resultData['DecJNowSolved'] = [dec_sol_Jnow]
-                ha = ra - lst
-                az, alt = self.app.mount.transformERFA(ha, dec, 3)
-                if 'Azimuth' in resultData:
-                    resultData['Azimuth'].append(az)
-                else:
-                    resultData['Azimuth'] = [az]
-                if 'Altitude' in resultData:
-                    resultData['Altitude'].append(alt)
-                else:
-                    resultData['Altitude'] = [alt]
-                if az <= 180:
-                    pierside = 'E'
-                else:
-                    pierside = 'W'
-                if 'Pierside' in resultData:
-                    resultData['Pierside'].append(pierside)
-                else:
-                    resultData['Pierside'] = [pierside]
-                if 'Index' in resultData:
-                    resultData['Index'].append(i - 5)
-                else:
-                    resultData['index'] = [i - 5]
-                if 'RaError' in resultData:
-                    resultData['RaError'].append((ra - ra_sol) * 3600)
-                else:
-                    resultData['RaError'] = [(ra - ra_sol) * 3600]
-                if 'DecError' in resultData:
-                    resultData['DecError'].append((dec - dec_sol) * 3600)
-                else:
-                    resultData['DecError'] = [(dec - dec_sol) * 3600]
-                if 'ModelError' in resultData:
-                    resultData['ModelError'].append(math.sqrt((ra - ra_sol) * 3600 * (ra - ra_sol) * 3600 + (dec - dec_sol) * 3600 * (dec - dec_sol) * 3600))
-                else:
-                    resultData['ModelError'] = [math.sqrt((ra - ra_sol) * 3600 * (ra - ra_sol) * 3600 + (dec - dec_sol) * 3600 * (dec - dec_sol) * 3600)]
+            # site_latitude = self.transform.degStringToDecimal(lines[4][0:9], ' ')
+            lines = lines[5:]
+            if len(lines) == 0:
+                return resultData
+            ra, dec, ra_sol, dec_sol, lst = self.processTheSkyXLines(lines)
+            # the transformations are done for all points at once
+            ra_Jnow, dec_Jnow = self.transform.transformERFA(ra, dec, 3)
+            ra_sol_Jnow, dec_sol_Jnow = self.transform.transformERFA(ra_sol, dec_sol, 3)
+            az, alt = self.transform.transformERFA(ra - lst, dec, 3)
+            raError = (ra - ra_sol) * 3600
+            decError = (dec - dec_sol) * 3600
+            resultData['RaJ2000'] = ra.tolist()
+            resultData['DecJ2000'] = dec.tolist()
+            resultData['RaJNow'] = ra_Jnow.tolist()
+            resultData['DecJNow'] = dec_Jnow.tolist()
+            resultData['LocalSiderealTimeFloat'] = lst.tolist()
+            resultData['LocalSiderealTime'] = [self.transform.decimalToDegree(value, False, True) for value in lst.tolist()]
+            resultData['RaJ2000Solved'] = ra_sol.tolist()
+            resultData['DecJ2000Solved'] = dec_sol.tolist()
+            resultData['RaJNowSolved'] = ra_sol_Jnow.tolist()
+            resultData['DecJNowSolved'] = dec_sol_Jnow.tolist()
+            resultData['Azimuth'] = az.tolist()
+            resultData['Altitude'] = alt.tolist()
+            resultData['Pierside'] = ['E' if value <= 180 else 'W' for value in az.tolist()]
+            resultData['Index'] = list(range(0, len(lines)))
+            resultData['RaError'] = raError.tolist()
+            resultData['DecError'] = decError.tolist()
+            resultData['ModelError'] = [math.sqrt(x * x + y * y) for x, y in zip(raError.tolist(), decError.tolist())]
         except Exception as e:
             self.logger.error('error processing file {0}, Error : {1}'.format(filename, e))
             return {}
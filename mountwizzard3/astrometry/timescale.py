@@ -0,0 +1,95 @@
+############################################################
+# -*- coding: utf-8 -*-
+#
+#       #   #  #   #   #  ####
+#      ##  ##  #  ##  #     #
+#     # # # #  # # # #     ###
+#    #  ##  #  ##  ##        #
+#   #   #   #  #   #     ####
+#
+# Python-based Tool for interaction with the 10micron mounts
+# GUI with PyQT5 for python
+# Python  v3.6.4
+#
+# Michael Würtenberger
+# (c) 2016, 2017, 2018
+#
+# Licence APL2.0
+#
+###########################################################
+import logging
+import os
+import numpy
+from astropy import _erfa
+
+
+class TimeScale:
+    logger = logging.getLogger(__name__)
+
+    # time scale data for the transformations: leap seconds (TAI-UTC) are memorized per day, DUT1 (UT1-UTC) is
+    # interpolated from the IERS finals file, which is downloaded by the automation. as UT1-UTC jumps at a leap
+    # second, the table keeps UT1-TAI, which is continuous, and the actual leap seconds are added back.
+    # without a table DUT1 is 0, which is within the 0.9 s limit of UTC
+    MJD_OFFSET = 2400000.5
+    TT_TAI = 32.184
+    # default as the downloader without the 10micron updater, the downloader sets its own target with setFinalsFile
+    FINALS_FILE = os.getcwd() + '/config/finals.data'
+
+    def __init__(self):
+        self.ERFA = _erfa
+        # table is a tuple of mjd and UT1-TAI arrays, which is replaced as a whole
+        self.table = None
+        self.leapSeconds = dict()
+        self.finalsFile = ''
+        self.setFinalsFile(self.FINALS_FILE)
+
+    def setFinalsFile(self, filename):
+        if filename == self.finalsFile:
+            return
+        self.finalsFile = filename
+        if os.path.isfile(filename):
+            self.loadFinals(filename)
+        else:
+            self.logger.info('No IERS finals file {0}, using DUT1 = 0'.format(filename))
+
+    def getLeapSeconds(self, julianDate):
+        # TAI-UTC for the day of the julian date, the calendar work is done only once a day
+        day = int(julianDate - self.MJD_OFFSET)
+        if day not in self.leapSeconds:
+            year, month, dayOfMonth, fraction = self.ERFA.jd2cal(self.MJD_OFFSET + day, 0.0)
+            self.leapSeconds[day] = float(self.ERFA.dat(year, month, dayOfMonth, 0.0))
+        return self.leapSeconds[day]
+
+    def loadFinals(self, filename):
+        # fixed format of the IERS finals file: mjd in columns 8-15, UT1-UTC of bulletin A in columns 59-68
+        mjd = list()
+        ut1tai = list()
+        try:
+            with open(filename, 'r') as infile:
+                for line in infile:
+                    if len(line) < 68 or line[58:68].strip() == '':
+                        continue
+                    day = float(line[7:15])
+                    mjd.append(day)
+                    ut1tai.append(float(line[58:68]) - self.getLeapSeconds(day + self.MJD_OFFSET))
+        except Exception as e:
+            self.logger.error('IERS finals file {0} could not be loaded, error: {1}'.format(filename, e))
+            return False
+        if len(mjd) == 0:
+            self.logger.warning('IERS finals file {0} has no data'.format(filename))
+            return False
+        self.table = (numpy.array(mjd), numpy.array(ut1tai))
+        self.logger.info('IERS finals file {0} loaded, mjd {1:.0f} to {2:.0f}'.format(filename, mjd[0], mjd[-1]))
+        return True
+
+    def getDUT1(self, julianDate):
+        # outside the table the first or last value is taken
+        table = self.table
+        if table is None:
+            return 0.0
+        ut1tai = float(numpy.interp(julianDate - self.MJD_OFFSET, table[0], table[1]))
+        return ut1tai + self.getLeapSeconds(julianDate)
+
+    def getTerrestrialTime(self, julianDate):
+        # TT = UTC + (TAI-UTC) + (TT-TAI)
+        return julianDate + (self.getLeapSeconds(julianDate) + self.TT_TAI) / 86400
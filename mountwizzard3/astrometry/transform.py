@@ -19,61 +19,124 @@
 ###########################################################
 import logging
 import math
-import datetime
-import PyQt5
+import numpy
 from astropy import _erfa
+from astrometry import timescale
 
 
 class Transform:
     logger = logging.getLogger(__name__)
 
+    # there is one instance of transform in the app, which is shared by all modules and threads. site and time are
+    # kept as immutable snapshots, which are replaced as a whole by the updates. a conversion reads the snapshots
+    # once at the beginning and works only on local data, so no locking is needed.
+    # the astrometry context (precession-nutation, earth position and velocity, site) changes slowly. it is built
+    # once and used for all conversions within the validity time in seconds, only the earth rotation angle is
+    # updated for every call. dut1 changes only some ms per day, a leap second or a new IERS table renews the context
+    CONTEXT_VALIDITY = 60
+    DUT1_TOLERANCE = 0.001
+
     def __init__(self, app):
         self.app = app
         self.ERFA = _erfa
-        self.mutexERFA = PyQt5.QtCore.QMutex()
-        self.mutexTopocentric = PyQt5.QtCore.QMutex()
-        # if nothing is present, use the coordinates of greenwich
-        self.siteLat = 51.476852
-        self.siteLon = 0
-        self.siteHeight = 46
+        # if nothing is present, use the coordinates of greenwich: latitude, longitude, height
+        self.site = (51.476852, 0.0, 46.0)
         # date of 01.05.2018
         self.julianDate = 2458240
+        self.contextObserved = None
+        self.contextCIRS = None
+        # leap seconds and dut1 from the IERS data
+        self.timeScale = timescale.TimeScale()
         # connect data transfer
         self.app.signalMountSiteData.connect(self.setSiteData)
         self.app.signalJulianDate.connect(self.setJulianDate)
 
     def setSiteData(self, lat, lon, height):
-        self.siteLat = self.degStringToDecimal(lat)
-        self.siteLon = self.degStringToDecimal(lon)
-        self.siteHeight = float(height)
+        # the observed context is bound to the site snapshot, so it is rebuilt with the next conversion
+        self.site = (self.degStringToDecimal(lat), self.degStringToDecimal(lon), float(height))
 
     def setJulianDate(self, jd):
+        # a jump out of the validity time is seen when the context is used, so no invalidation needed here
         self.julianDate = jd
 
+    def isContextValid(self, context, julianDate, dut1):
+        if context is None:
+            return False
+        if abs(context['Dut1'] - dut1) > self.DUT1_TOLERANCE:
+            return False
+        return abs(julianDate - context['JulianDate']) * 86400 <= self.CONTEXT_VALIDITY
+
+    def getContextObserved(self, site, date1, dut1):
+        # context for J2000 to observed, which depends on site. if two threads build a new context at the same
+        # time, both are valid and the last one is kept
+        context = self.contextObserved
+        if not self.isContextValid(context, date1, dut1) or context['Site'] != site:
+            astrom, eo = self.ERFA.apco13(date1,
+                                          0.0,
+                                          dut1,
+                                          site[1] * self.ERFA.DD2R,
+                                          site[0] * self.ERFA.DD2R,
+                                          site[2],
+                                          0.0,
+                                          0.0,
+                                          0.0,
+                                          0.0,
+                                          0.0,
+                                          0.0)
+            context = {'JulianDate': date1, 'Dut1': dut1, 'Site': site, 'Astrom': astrom}
+            self.contextObserved = context
+            self.logger.debug('new observed context for julian date {0}'.format(date1))
+        # the earth rotation angle moves fast, it is set for the actual time on a copy of the shared context
+        return self.ERFA.aper13(date1 + dut1 / 86400, 0.0, numpy.copy(context['Astrom']))
+
+    def getContextCIRS(self, date1, dut1, jdtt):
+        # context for J2000 to CIRS and back, which is geocentric
+        context = self.contextCIRS
+        if not self.isContextValid(context, date1, dut1):
+            astrom, eo = self.ERFA.apci13(date1, 0.0)
+            context = {'JulianDate': date1, 'Dut1': dut1, 'Astrom': astrom, 'EO': eo,
+                       'EO06a': self.ERFA.eo06a(jdtt, 0.0)}
+            self.contextCIRS = context
+            self.logger.debug('new CIRS context for julian date {0}'.format(date1))
+        return context
+
     def topocentricToAzAlt(self, ra, dec):
-        self.mutexTopocentric.lock()
-        ra = (ra * 360 / 24 + 360.0) % 360.0
-        dec = math.radians(dec)
-        ra = math.radians(ra)
-        lat = math.radians(self.siteLat)
-        alt = math.asin(math.sin(dec) * math.sin(lat) + math.cos(dec) * math.cos(lat) * math.cos(ra))
-        value = (math.sin(dec) - math.sin(alt) * math.sin(lat)) / (math.cos(alt) * math.cos(lat))
+        # ra (hour angle) in hours and dec in degrees, could be scalars or arrays of the same length
+        isScalar = numpy.ndim(ra) == 0 and numpy.ndim(dec) == 0
+        ra = (numpy.asarray(ra, dtype=float) * 360 / 24 + 360.0) % 360.0
+        dec = numpy.radians(numpy.asarray(dec, dtype=float))
+        ra = numpy.radians(ra)
+        lat = math.radians(self.site[0])
+        alt = numpy.arcsin(numpy.sin(dec) * math.sin(lat) + numpy.cos(dec) * math.cos(lat) * numpy.cos(ra))
+        value = (numpy.sin(dec) - numpy.sin(alt) * math.sin(lat)) / (numpy.cos(alt) * math.cos(lat))
         # we have to check for rounding error, which could happen
-        if value > 1:
-            value = 1
-        elif value < -1:
-            value = -1
-        A = math.acos(value)
-        A = math.degrees(A)
-        alt = math.degrees(alt)
-        if math.sin(ra) >= 0.0:
-            az = 360.0 - A
-        else:
-            az = A
-        self.mutexTopocentric.unlock()
+        value = numpy.clip(value, -1, 1)
+        A = numpy.degrees(numpy.arccos(value))
+        alt = numpy.degrees(alt)
+        az = numpy.where(numpy.sin(ra) >= 0.0, 360.0 - A, A)
+        if isScalar:
+            return float(az), float(alt)
         return az, alt
 
     def degStringToDecimal(self, value, splitter=':'):
+        # a list of strings is converted to an array. the strings are joined and split once, the fields are combined
+        # with numpy and the sign is taken from the first field. mixed formats or fields, which are no numbers, are
+        # converted string by string
+        if not isinstance(value, str):
+            value = list(value)
+            numberFields = set(item.count(splitter) + 1 for item in value)
+            if len(numberFields) == 1 and numberFields <= {2, 3}:
+                try:
+                    fields = numpy.array(splitter.join(value).split(splitter), dtype=float).reshape(len(value), -1)
+                except ValueError:
+                    fields = None
+                if fields is not None and not numpy.signbit(fields[:, 1:]).any():
+                    sign = numpy.where(numpy.signbit(fields[:, 0]), -1, 1)
+                    returnValue = numpy.abs(fields[:, 0]) + fields[:, 1] / 60
+                    if fields.shape[1] == 3:
+                        returnValue += fields[:, 2] / 3600
+                    return returnValue * sign
+            return numpy.array([self.degStringToDecimal(item, splitter) for item in value], dtype=float)
         returnValue = 0
         sign = 1
         if '-' in value:
@@ -141,63 +204,52 @@ class Transform:
         returnValue = ':Sd{0}{1:02d}*{2:02d}:{3:02d}.{4:01d}#'.format(sign, degree, minute, second, second_dec)
         return returnValue
 
+    def getTimeParameters(self, julianDate):
+        # time dependent setup, which is done once per batch of coordinates. the calendar work for the leap seconds
+        # is cached per day in the time scale
+        dut1 = self.timeScale.getDUT1(julianDate)
+        jdtt = self.timeScale.getTerrestrialTime(julianDate)
+        return julianDate, dut1, jdtt
+
     def transformERFA(self, ra, dec, transform=1):
-        self.mutexERFA.lock()
-        ts = datetime.datetime.utcnow()
-        dut1_prev = self.ERFA.dat(ts.year, ts.month, ts.day, 0)
-        dut1 = 37 + 4023.0 / 125.0 - dut1_prev
-        # suc, tai1, tai2 = self.ERFA.eraUtctai(self.julianDate, 0)
-        tai1, tai2 = self.ERFA.utctai(self.julianDate, 0)
-        # tt1, tt2 = self.ERFA.eraTaitt(tai1, tai2)
-        tt1, tt2 = self.ERFA.taitt(tai1, tai2)
-        jdtt = tt1 + tt2
-        date1 = self.julianDate
+        # ra in hours and dec in degrees could be scalars or arrays of the same length. the erfa functions work on
+        # arrays, so a batch of coordinates shares the time dependent setup and is converted in one call
+        isScalar = numpy.ndim(ra) == 0 and numpy.ndim(dec) == 0
+        ra = numpy.asarray(ra, dtype=float)
+        dec = numpy.asarray(dec, dtype=float)
+        # snapshots for this conversion
+        site = self.site
+        date1, dut1, jdtt = self.getTimeParameters(self.julianDate)
         date2 = 0
 
         if transform == 1:  # J2000 to Topo Az /Alt
             ra = ra % 24
-            aob, zob, hob, dob, rob, eo = self.ERFA.atco13(ra * self.ERFA.D2PI / 24,
-                                                           dec * self.ERFA.D2PI / 360,
-                                                           0.0,
-                                                           0.0,
-                                                           0.0,
-                                                           0.0,
-                                                           date1 + date2,
-                                                           0.0,
-                                                           dut1,
-                                                           self.siteLon * self.ERFA.DD2R,
-                                                           self.siteLat * self.ERFA.DD2R,
-                                                           self.siteHeight,
-                                                           0.0,
-                                                           0.0,
-                                                           0.0,
-                                                           0.0,
-                                                           0.0,
-                                                           0.0)
+            astrom = self.getContextObserved(site, date1 + date2, dut1)
+            ri, di = self.ERFA.atciqz(ra * self.ERFA.D2PI / 24,
+                                      dec * self.ERFA.D2PI / 360,
+                                      astrom)
+            aob, zob, hob, dob, rob = self.ERFA.atioq(ri, di, astrom)
             val1 = aob * 360 / self.ERFA.D2PI
             val2 = 90.0 - zob * 360 / self.ERFA.D2PI
 
         elif transform == 2:                                                                                                # Topo to J2000
-            rc, dc, eo = self.ERFA.atic13(self.ERFA.anp(ra * self.ERFA.D2PI / 24 + self.ERFA.eo06a(jdtt, 0.0)),
-                                          dec * self.ERFA.D2PI / 360,
-                                          date1 + date2,
-                                          0.0)
+            context = self.getContextCIRS(date1 + date2, dut1, jdtt)
+            rc, dc = self.ERFA.aticq(self.ERFA.anp(ra * self.ERFA.D2PI / 24 + context['EO06a']),
+                                     dec * self.ERFA.D2PI / 360,
+                                     context['Astrom'])
             val1 = rc * 24.0 / self.ERFA.D2PI
             val2 = dc * self.ERFA.DR2D
 
         elif transform == 3:                                                                                                # J2000 to Topo
-            ri, di, eo = self.ERFA.atci13(ra * self.ERFA.D2PI / 24,
-                                          dec * self.ERFA.D2PI / 360,
-                                          0,
-                                          0,
-                                          0,
-                                          0,
-                                          date1 + date2,
-                                          0)
-            val1 = self.ERFA.anp(ri - eo) * 24 / self.ERFA.D2PI
+            context = self.getContextCIRS(date1 + date2, dut1, jdtt)
+            ri, di = self.ERFA.atciqz(ra * self.ERFA.D2PI / 24,
+                                      dec * self.ERFA.D2PI / 360,
+                                      context['Astrom'])
+            val1 = self.ERFA.anp(ri - context['EO']) * 24 / self.ERFA.D2PI
             val2 = di * 360 / self.ERFA.D2PI
         else:
             val1 = ra
             val2 = dec
-        self.mutexERFA.unlock()
-        return val1, val2
+        if isScalar:
+            return float(val1), float(val2)
+        return numpy.asarray(val1, dtype=float), numpy.asarray(val2, dtype=float)
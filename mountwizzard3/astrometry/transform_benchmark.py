@@ -0,0 +1,97 @@
+############################################################
+# -*- coding: utf-8 -*-
+#
+#       #   #  #   #   #  ####
+#      ##  ##  #  ##  #     #
+#     # # # #  # # # #     ###
+#    #  ##  #  ##  ##        #
+#   #   #   #  #   #     ####
+#
+# Python-based Tool for interaction with the 10micron mounts
+# GUI with PyQT5 for python
+# Python  v3.6.4
+#
+# Michael Würtenberger
+# (c) 2016, 2017, 2018
+#
+# Licence APL2.0
+#
+###########################################################
+import argparse
+import datetime
+import time
+import numpy
+import PyQt5
+import PyQt5.QtCore
+from astrometry import transform
+
+# per point cost of the coordinate transformations, called point by point in a loop and as batch on arrays, and the
+# per call cost of the time parameters with the former calendar work compared to the cached time scale. run from the mountwizzard3 directory:
+#   python3 -m astrometry.transform_benchmark --sizes 1 100 10000
+
+
+class BenchmarkApp(PyQt5.QtCore.QObject):
+    # the parts of the main app transform needs
+    signalMountSiteData = PyQt5.QtCore.pyqtSignal([str, str, str])
+    signalJulianDate = PyQt5.QtCore.pyqtSignal(float)
+
+
+def measure(function, number, repeat=3):
+    # returns the best time per point in microseconds
+    best = None
+    for _ in range(0, repeat):
+        timeStart = time.perf_counter()
+        function()
+        duration = time.perf_counter() - timeStart
+        if best is None or duration < best:
+            best = duration
+    return best / number * 1e6
+
+
+def getTimeParametersCalendar(trans, julianDate):
+    # former time setup with calendar work for every call, as reference
+    ts = datetime.datetime.utcnow()
+    dut1_prev = trans.ERFA.dat(ts.year, ts.month, ts.day, 0)
+    dut1 = 37 + 4023.0 / 125.0 - dut1_prev
+    tai1, tai2 = trans.ERFA.utctai(julianDate, 0)
+    tt1, tt2 = trans.ERFA.taitt(tai1, tai2)
+    return julianDate, dut1, tt1 + tt2
+
+
+def runBenchmark(sizes):
+    app = BenchmarkApp()
+    trans = transform.Transform(app)
+    trans.setSiteData('+48:02:01.6', '+11:42:17.3', '580.9')
+    trans.setJulianDate(2458240.5)
+    results = list()
+    for size in sizes:
+        ra = numpy.random.uniform(0, 24, size)
+        dec = numpy.random.uniform(-30, 89, size)
+        raString = [trans.decimalToDegree(value, False, True) for value in ra]
+        for name, function, scalarFunction in [
+            ('transformERFA 1', lambda: trans.transformERFA(ra, dec, 1), lambda r, d: trans.transformERFA(r, d, 1)),
+            ('transformERFA 2', lambda: trans.transformERFA(ra, dec, 2), lambda r, d: trans.transformERFA(r, d, 2)),
+            ('transformERFA 3', lambda: trans.transformERFA(ra, dec, 3), lambda r, d: trans.transformERFA(r, d, 3)),
+            ('topocentricToAzAlt', lambda: trans.topocentricToAzAlt(ra, dec), lambda r, d: trans.topocentricToAzAlt(r, d)),
+        ]:
+            loop = measure(lambda: [scalarFunction(r, d) for r, d in zip(ra.tolist(), dec.tolist())], size)
+            batch = measure(function, size)
+            results.append((name, size, loop, batch))
+        loop = measure(lambda: [trans.degStringToDecimal(value) for value in raString], size)
+        batch = measure(lambda: trans.degStringToDecimal(raString), size)
+        results.append(('degStringToDecimal', size, loop, batch))
+        # time parameters are needed once per call, so the loop is the former and batch the cached version
+        dates = (2458240.5 + numpy.random.uniform(0, 1, size)).tolist()
+        loop = measure(lambda: [getTimeParametersCalendar(trans, value) for value in dates], size)
+        batch = measure(lambda: [trans.getTimeParameters(value) for value in dates], size)
+        results.append(('getTimeParameters', size, loop, batch))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='benchmark of the coordinate transformations')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 100, 10000], help='batch sizes')
+    args = parser.parse_args()
+    print('{0:20s} {1:>8s} {2:>14s} {3:>14s}'.format('function', 'size', 'loop us/point', 'batch us/point'))
+    for name, size, loop, batch in runBenchmark(args.sizes):
+        print('{0:20s} {1:8d} {2:14.2f} {3:14.2f}'.format(name, size, loop, batch))
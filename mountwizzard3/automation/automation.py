@@ -237,6 +237,8 @@ class Automation(PyQt5.QtCore.QObject):
         self.TARGET_DIR = self.appInstallPath
         if self.TARGET_DIR == '':
             self.TARGET_DIR = os.getcwd()+'/config/'
+        # the transformations take dut1 from the file, which is downloaded here
+        self.app.transform.timeScale.setFinalsFile(self.TARGET_DIR + self.UTC_1_FILE)
         # signal slot
         self.app.ui.btn_downloadEarthrotation.clicked.connect(lambda: self.commandDispatcherQueue.put('EARTHROTATION'))
         self.app.ui.btn_downloadSpacestations.clicked.connect(lambda: self.commandDispatcherQueue.put('SPACESTATIONS'))
@@ -351,6 +353,9 @@ class Automation(PyQt5.QtCore.QObject):
                 with open(filename, 'wb') as f:
                     shutil.copyfileobj(r, f)
             self.app.messageQueue.put('{0} downloaded\n'.format(filename))
+            # fresh IERS data is used for dut1 in the transformations as well
+            if filename.endswith(self.UTC_1_FILE):
+                self.app.transform.timeScale.loadFinals(filename)
         else:
             try:
                 r = requests.get(url, stream=True)
@@ -38,6 +38,8 @@ class Dome(PyQt5.QtCore.QObject):
 
     CYCLE = 200
     CYCLE_STATUS = 500
+    # turning speed of the dome in degrees per second, if not set in config key DomeSpeed
+    DOME_SPEED = 4.0
 
     def __init__(self, app, thread):
         super().__init__()
@@ -47,6 +49,7 @@ class Dome(PyQt5.QtCore.QObject):
         self.dataTimer = None
         self.statusTimer = None
         self.cycleTimer = None
+        self.domeSpeed = self.DOME_SPEED
 
         self.app = app
         self.thread = thread
@@ -82,6 +85,8 @@ class Dome(PyQt5.QtCore.QObject):
                     self.app.ui.le_ascomDomeDriverName.setText(self.app.config['DomeAscomDriverName'])
             if 'Dome' in self.app.config:
                 self.app.ui.pd_chooseDome.setCurrentIndex(int(self.app.config['Dome']))
+            if 'DomeSpeed' in self.app.config and float(self.app.config['DomeSpeed']) > 0:
+                self.domeSpeed = float(self.app.config['DomeSpeed'])
         except Exception as e:
             self.logger.error('Item in config.cfg for dome could not be initialized, error:{0}'.format(e))
         finally:
@@ -92,6 +97,7 @@ class Dome(PyQt5.QtCore.QObject):
         if platform.system() == 'Windows':
             self.app.config['DomeAscomDriverName'] = self.ascom.driverName
         self.app.config['Dome'] = self.app.ui.pd_chooseDome.currentIndex()
+        self.app.config['DomeSpeed'] = self.domeSpeed
 
     def chooserDome(self):
         self.mutexChooser.lock()
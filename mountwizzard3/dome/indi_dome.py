@@ -35,25 +35,28 @@ class INDIDome:
         self.application['Available'] = False
         self.application['Name'] = 'INDI Dome'
         self.application['Status'] = ''
+        self.motionDevice = ''
 
     def start(self):
         self.connect()
+        # the end of a slew is taken from the changes of the dome motion
+        if self.app.workerINDI.domeDevice != '':
+            self.motionDevice = self.app.workerINDI.domeDevice
+            self.app.workerINDI.properties.subscribe(self.motionDevice, 'DOME_MOTION', self.updateMotion)
 
     def stop(self):
-        pass
+        if self.motionDevice:
+            self.app.workerINDI.properties.unsubscribe(self.motionDevice, 'DOME_MOTION', self.updateMotion)
+            self.motionDevice = ''
 
     def connect(self):
         timeStart = time.time()
-        while True:
-            if time.time() - timeStart > self.START_DOME_TIMEOUT:
-                self.app.messageQueue.put('Timeout connect environment device\n')
-                break
-            if self.app.workerINDI.domeDevice:
-                if 'CONNECTION' in self.app.workerINDI.data['Device'][self.app.workerINDI.domeDevice]:
-                    break
-            time.sleep(0.1)
+        properties = self.app.workerINDI.properties
+        device = self.app.workerINDI.waitDevice('domeDevice', self.START_DOME_TIMEOUT)
+        if not device or not properties.waitVector(device, 'CONNECTION', max(0.0, self.START_DOME_TIMEOUT - (time.time() - timeStart))):
+            self.app.messageQueue.put('Timeout connect environment device\n')
         if self.app.workerINDI.domeDevice != '':
-            if self.app.workerINDI.data['Device'][self.app.workerINDI.domeDevice]['CONNECTION']['CONNECT'] == 'Off':
+            if not properties.getValue(self.app.workerINDI.domeDevice, 'CONNECTION', 'CONNECT', False):
                 self.app.INDICommandQueue.put(indiXML.newSwitchVector([indiXML.oneSwitch('On', indi_attr={'name': 'CONNECT'})], indi_attr={'name': 'CONNECTION', 'device': self.app.workerINDI.domeDevice}))
 
     def slewToAzimuth(self, azimuth):
@@ -67,30 +70,31 @@ class INDIDome:
         else:
             self.application['Available'] = False
         self.app.sharedDomeDataLock.lockForWrite()
-        if self.app.workerINDI.domeDevice in self.app.workerINDI.data['Device']:
+        if self.app.workerINDI.properties.hasDevice(self.app.workerINDI.domeDevice):
             self.application['Status'] = 'OK'
-            self.data['Connected'] = self.app.workerINDI.data['Device'][self.app.workerINDI.domeDevice]['CONNECTION']['CONNECT'] == 'On'
+            self.data['Connected'] = self.app.workerINDI.properties.getValue(self.app.workerINDI.domeDevice, 'CONNECTION', 'CONNECT', False)
         else:
             self.data['Connected'] = False
             self.application['Status'] = 'ERROR'
         self.app.sharedDomeDataLock.unlock()
 
     def getData(self):
+        properties = self.app.workerINDI.properties
         # check if client has device found
         if self.app.workerINDI.domeDevice != '':
             # and device is connected
-            if self.app.workerINDI.data['Device'][self.app.workerINDI.domeDevice]['CONNECTION']['CONNECT'] == 'On':
-                # than get the data
+            if properties.getValue(self.app.workerINDI.domeDevice, 'CONNECTION', 'CONNECT', False):
+                # than get the data, the position is already a number
                 self.app.sharedDomeDataLock.lockForWrite()
-                if 'DOME_ABSOLUTE_POSITION' in self.app.workerINDI.data['Device'][self.app.workerINDI.domeDevice]['ABS_DOME_POSITION']:
-                    self.data['Azimuth'] = float(self.app.workerINDI.data['Device'][self.app.workerINDI.domeDevice]['ABS_DOME_POSITION']['DOME_ABSOLUTE_POSITION'])
-                else:
-                    self.data['Azimuth'] = 0.0
-                if self.app.workerINDI.data['Device'][self.app.workerINDI.domeDevice]['DOME_MOTION']['state'] == 'Busy':
-                    self.data['Slewing'] = True
-                else:
-                    if self.data['Slewing']:
-                        self.main.signalSlewFinished.emit()
-                        self.app.audioCommandQueue.put('DomeSlew')
-                    self.data['Slewing'] = False
+                self.data['Azimuth'] = properties.getValue(self.app.workerINDI.domeDevice, 'ABS_DOME_POSITION', 'DOME_ABSOLUTE_POSITION', 0.0)
                 self.app.sharedDomeDataLock.unlock()
+
+    def updateMotion(self, device, vector):
+        # called by the indi client thread with every change of the dome motion
+        isSlewing = self.app.workerINDI.properties.getValue(device, vector, 'state') == 'Busy'
+        self.app.sharedDomeDataLock.lockForWrite()
+        if self.data['Slewing'] and not isSlewing:
+            self.main.signalSlewFinished.emit()
+            self.app.audioCommandQueue.put('DomeSlew')
+        self.data['Slewing'] = isSlewing
+        self.app.sharedDomeDataLock.unlock()
@@ -44,16 +44,12 @@ class INDIEnvironment:
 
     def connect(self):
         timeStart = time.time()
-        while True:
-            if time.time() - timeStart > self.START_ENVIRONMENT_TIMEOUT:
-                self.app.messageQueue.put('Timeout connect environment device\n')
-                break
-            if self.app.workerINDI.environmentDevice:
-                if 'CONNECTION' in self.app.workerINDI.data['Device'][self.app.workerINDI.environmentDevice]:
-                    break
-            time.sleep(0.1)
+        properties = self.app.workerINDI.properties
+        device = self.app.workerINDI.waitDevice('environmentDevice', self.START_ENVIRONMENT_TIMEOUT)
+        if not device or not properties.waitVector(device, 'CONNECTION', max(0.0, self.START_ENVIRONMENT_TIMEOUT - (time.time() - timeStart))):
+            self.app.messageQueue.put('Timeout connect environment device\n')
         if self.app.workerINDI.environmentDevice != '':
-            if self.app.workerINDI.data['Device'][self.app.workerINDI.environmentDevice]['CONNECTION']['CONNECT'] == 'Off':
+            if not properties.getValue(self.app.workerINDI.environmentDevice, 'CONNECTION', 'CONNECT', False):
                 self.app.INDICommandQueue.put(indiXML.newSwitchVector([indiXML.oneSwitch('On', indi_attr={'name': 'CONNECT'})], indi_attr={'name': 'CONNECTION', 'device': self.app.workerINDI.environmentDevice}))
 
     def getStatus(self):
@@ -62,46 +58,33 @@ class INDIEnvironment:
         else:
             self.application['Available'] = False
         self.app.sharedEnvironmentDataLock.lockForWrite()
-        if self.app.workerINDI.environmentDevice in self.app.workerINDI.data['Device']:
+        if self.app.workerINDI.properties.hasDevice(self.app.workerINDI.environmentDevice):
             self.application['Status'] = 'OK'
-            self.data['Connected'] = self.app.workerINDI.data['Device'][self.app.workerINDI.environmentDevice]['CONNECTION']['CONNECT'] == 'On'
+            self.data['Connected'] = self.app.workerINDI.properties.getValue(self.app.workerINDI.environmentDevice, 'CONNECTION', 'CONNECT', False)
         else:
             self.data['Connected'] = False
             self.application['Status'] = 'ERROR'
         self.app.sharedEnvironmentDataLock.unlock()
 
     def getData(self):
+        properties = self.app.workerINDI.properties
         # check if client has device found
         if self.app.workerINDI.environmentDevice != '':
             # and device is connected
-            if self.app.workerINDI.data['Device'][self.app.workerINDI.environmentDevice]['CONNECTION']['CONNECT'] == 'On':
-                # than get the data
+            if properties.getValue(self.app.workerINDI.environmentDevice, 'CONNECTION', 'CONNECT', False):
+                # than get the data, the values are already numbers
+                weather = properties.getVector(self.app.workerINDI.environmentDevice, 'WEATHER_PARAMETERS')
                 self.app.sharedEnvironmentDataLock.lockForWrite()
-                if 'WEATHER_DEWPOINT' in self.app.workerINDI.data['Device'][self.app.workerINDI.environmentDevice]['WEATHER_PARAMETERS']:
-                    self.data['DewPoint'] = float(self.app.workerINDI.data['Device'][self.app.workerINDI.environmentDevice]['WEATHER_PARAMETERS']['WEATHER_DEWPOINT'])
-                else:
-                    self.data['DewPoint'] = 0
-                if 'WEATHER_TEMPERATURE' in self.app.workerINDI.data['Device'][self.app.workerINDI.environmentDevice]['WEATHER_PARAMETERS']:
-                    self.data['Temperature'] = float(self.app.workerINDI.data['Device'][self.app.workerINDI.environmentDevice]['WEATHER_PARAMETERS']['WEATHER_TEMPERATURE'])
-                else:
-                    self.data['Temperature'] = 0
-                if 'WEATHER_HUMIDITY' in self.app.workerINDI.data['Device'][self.app.workerINDI.environmentDevice]['WEATHER_PARAMETERS']:
-                    self.data['Humidity'] = float(self.app.workerINDI.data['Device'][self.app.workerINDI.environmentDevice]['WEATHER_PARAMETERS']['WEATHER_HUMIDITY'])
-                else:
-                    self.data['Humidity'] = 0
-                if 'WEATHER_BAROMETER' in self.app.workerINDI.data['Device'][self.app.workerINDI.environmentDevice]['WEATHER_PARAMETERS']:
-                    self.data['Pressure'] = float(self.app.workerINDI.data['Device'][self.app.workerINDI.environmentDevice]['WEATHER_PARAMETERS']['WEATHER_BAROMETER'])
-                else:
-                    self.data['Pressure'] = 0
+                self.data['DewPoint'] = weather.get('WEATHER_DEWPOINT', 0)
+                self.data['Temperature'] = weather.get('WEATHER_TEMPERATURE', 0)
+                self.data['Humidity'] = weather.get('WEATHER_HUMIDITY', 0)
+                self.data['Pressure'] = weather.get('WEATHER_BAROMETER', 0)
                 self.app.sharedEnvironmentDataLock.unlock()
 
         # check if client has device SQM found
         if self.app.workerINDI.auxDevice != '':
-            if self.app.workerINDI.data['Device'][self.app.workerINDI.auxDevice]['CONNECTION']['CONNECT'] == 'On':
+            if properties.getValue(self.app.workerINDI.auxDevice, 'CONNECTION', 'CONNECT', False):
                 # than get the data
                 self.app.sharedEnvironmentDataLock.lockForWrite()
-                if 'SKY_BRIGHTNESS' in self.app.workerINDI.data['Device'][self.app.workerINDI.auxDevice]['SKY_QUALITY']:
-                    self.data['SQR'] = float(self.app.workerINDI.data['Device'][self.app.workerINDI.auxDevice]['SKY_QUALITY']['SKY_BRIGHTNESS'])
-                else:
-                    self.data['SQR'] = 0
+                self.data['SQR'] = properties.getValue(self.app.workerINDI.auxDevice, 'SKY_QUALITY', 'SKY_BRIGHTNESS', 0)
                 self.app.sharedEnvironmentDataLock.unlock()
@@ -2653,6 +2653,29 @@ class Ui_MainWindow(object):
         font.setPointSize(10)
         self.label_204.setFont(font)
         self.label_204.setObjectName("label_204")
+        self.btn_generateBudgetPoints = QtWidgets.QPushButton(self.tab_6)
+        self.btn_generateBudgetPoints.setGeometry(QtCore.QRect(400, 260, 271, 31))
+        self.btn_generateBudgetPoints.setObjectName("btn_generateBudgetPoints")
+        self.numberMinutesBudget = QtWidgets.QDoubleSpinBox(self.tab_6)
+        self.numberMinutesBudget.setGeometry(QtCore.QRect(680, 262, 51, 26))
+        font = QtGui.QFont()
+        font.setFamily("Arial")
+        font.setBold(False)
+        font.setWeight(50)
+        self.numberMinutesBudget.setFont(font)
+        self.numberMinutesBudget.setAlignment(QtCore.Qt.AlignRight|QtCore.Qt.AlignTrailing|QtCore.Qt.AlignVCenter)
+        self.numberMinutesBudget.setDecimals(0)
+        self.numberMinutesBudget.setMinimum(5.0)
+        self.numberMinutesBudget.setMaximum(300.0)
+        self.numberMinutesBudget.setSingleStep(5.0)
+        self.numberMinutesBudget.setProperty("value", 30.0)
+        self.numberMinutesBudget.setObjectName("numberMinutesBudget")
+        self.label_266 = QtWidgets.QLabel(self.tab_6)
+        self.label_266.setGeometry(QtCore.QRect(735, 265, 21, 21))
+        font = QtGui.QFont()
+        font.setPointSize(10)
+        self.label_266.setFont(font)
+        self.label_266.setObjectName("label_266")
         self.line_38 = QtWidgets.QFrame(self.tab_6)
         self.line_38.setGeometry(QtCore.QRect(400, 165, 351, 1))
         self.line_38.setFrameShadow(QtWidgets.QFrame.Plain)
@@ -2903,6 +2926,9 @@ class Ui_MainWindow(object):
         self.label_203.raise_()
         self.btn_generateMinPoints.raise_()
         self.label_204.raise_()
+        self.btn_generateBudgetPoints.raise_()
+        self.numberMinutesBudget.raise_()
+        self.label_266.raise_()
         self.line_38.raise_()
         self.label_138.raise_()
         self.label_113.raise_()
@@ -6010,7 +6036,9 @@ class Ui_MainWindow(object):
         MainWindow.setTabOrder(self.btn_generateDSOPoints, self.numberHoursDSO)
         MainWindow.setTabOrder(self.numberHoursDSO, self.numberPointsDSO)
         MainWindow.setTabOrder(self.numberPointsDSO, self.numberHoursPreview)
-        MainWindow.setTabOrder(self.numberHoursPreview, self.btn_runFullModel)
+        MainWindow.setTabOrder(self.numberHoursPreview, self.btn_generateBudgetPoints)
+        MainWindow.setTabOrder(self.btn_generateBudgetPoints, self.numberMinutesBudget)
+        MainWindow.setTabOrder(self.numberMinutesBudget, self.btn_runFullModel)
         MainWindow.setTabOrder(self.btn_runFullModel, self.btn_cancelFullModel)
         MainWindow.setTabOrder(self.btn_cancelFullModel, self.btn_deleteWorstPoint)
         MainWindow.setTabOrder(self.btn_deleteWorstPoint, self.btn_reloadAlignmentModel)
@@ -6462,6 +6490,10 @@ class Ui_MainWindow(object):
         self.btn_generateMinPoints.setToolTip(_translate("MainWindow", "<html><head/><body><p>Generates a pointcloud with greater circles: low number of stars.</p></body></html>"))
         self.btn_generateMinPoints.setText(_translate("MainWindow", "Minimal"))
         self.label_204.setText(_translate("MainWindow", "h"))
+        self.btn_generateBudgetPoints.setToolTip(_translate("MainWindow", "<html><head/><body><p>Generates evenly distributed model points over the visible sky, as many as could be done in the given time.</p></body></html>"))
+        self.btn_generateBudgetPoints.setText(_translate("MainWindow", "Generate Model Points for Time"))
+        self.numberMinutesBudget.setToolTip(_translate("MainWindow", "<html><head/><body><p>Time for the model run in minutes.</p></body></html>"))
+        self.label_266.setText(_translate("MainWindow", "min"))
         self.label_138.setText(_translate("MainWindow", "Full Model"))
         self.label_113.setText(_translate("MainWindow", "Generate Model Points based on greater circles"))
         self.label_136.setText(_translate("MainWindow", "Generate Model Points based on tracks"))
@@ -25,7 +25,6 @@ import PyQt5
 import queue
 import copy
 import astropy.io.fits as pyfits
-from astrometry import transform
 from imaging import none_camera
 from imaging import indi_camera
 if platform.system() == 'Windows':
@@ -73,7 +72,7 @@ class Imaging(PyQt5.QtCore.QObject):
         self.data['CONNECTION'] = {'CONNECT': 'Off'}
 
         # external classes
-        self.transform = transform.Transform(self.app)
+        self.transform = self.app.transform
         if platform.system() == 'Windows':
             self.SGPro = sgpro_camera.SGPro(self, self.app, self.data)
             self.MaximDL = maximdl_camera.MaximDL(self, self.app, self.data)
@@ -20,6 +20,7 @@
 import logging
 import PyQt5
 import time
+import threading
 import indi.indi_xml as indiXML
 
 
@@ -29,6 +30,8 @@ class INDICamera:
     # timeout for getting an download is 30 seconds
     MAX_DOWNLOAD_TIMEOUT = 30
     START_CAMERA_TIMEOUT = 3
+    # the exposure loops wait for changes of the exposure vector, the timeout limits the reaction on cancel
+    WAIT_CHANGE = 0.2
 
     def __init__(self, main, app, data):
         # make main sources available
@@ -37,7 +40,6 @@ class INDICamera:
         self.data = data
         self.cancel = False
         self.mutexCancel = PyQt5.QtCore.QMutex()
-        self.mutexReceived = PyQt5.QtCore.QMutex()
 
         self.application = dict()
         self.application['Available'] = False
@@ -47,7 +49,8 @@ class INDICamera:
         self.application['Runtime'] = 'Sequence Generator.exe'
 
         self.counter = 0
-        self.receivedImage = True
+        # set by the indi client, when the image is written
+        self.imageReceived = threading.Event()
 
         self.application['Status'] = ''
         self.application['CONNECTION'] = {'CONNECT': 'Off'}
@@ -55,33 +58,27 @@ class INDICamera:
         self.application['Name'] = 'INDICamera'
         self.application['InstallPath'] = ''
 
-        self.app.workerINDI.receivedImage.connect(self.setReceivedImage)
+        self.app.workerINDI.receivedImage.connect(self.setReceivedImage, type=PyQt5.QtCore.Qt.DirectConnection)
 
     def start(self):
         # connect the camera if not present
         timeStart = time.time()
-        while True:
-            if time.time() - timeStart > self.START_CAMERA_TIMEOUT:
-                self.app.messageQueue.put('Timeout connect camera\n')
-                break
-            if self.app.workerINDI.cameraDevice:
-                if 'CONNECTION' in self.app.workerINDI.data['Device'][self.app.workerINDI.cameraDevice]:
-                    # Enable BLOB mode it also enables listen to send images
-                    self.app.INDICommandQueue.put(indiXML.enableBLOB('Also', indi_attr={'device': self.app.workerINDI.cameraDevice}))
-                    break
-            time.sleep(0.1)
+        device = self.app.workerINDI.waitDevice('cameraDevice', self.START_CAMERA_TIMEOUT)
+        if device and self.app.workerINDI.properties.waitVector(device, 'CONNECTION', max(0.0, self.START_CAMERA_TIMEOUT - (time.time() - timeStart))):
+            # Enable BLOB mode it also enables listen to send images
+            self.app.INDICommandQueue.put(indiXML.enableBLOB('Also', indi_attr={'device': device}))
+        else:
+            self.app.messageQueue.put('Timeout connect camera\n')
         self.connect()
 
     def stop(self):
         pass
 
     def setReceivedImage(self, status):
-        self.mutexReceived.lock()
         if status:
-            self.receivedImage = True
+            self.imageReceived.set()
         else:
-            self.receivedImage = False
-        self.mutexReceived.unlock()
+            self.imageReceived.clear()
 
     def getStatus(self):
         # check if INDIClient is running and camera device is there
@@ -91,8 +88,9 @@ class INDICamera:
                 self.application['Status'] = 'OK'
                 self.application['Name'] = self.app.workerINDI.cameraDevice
                 # check if data from INDI server already received
-                if 'CONNECTION' in self.app.workerINDI.data['Device'][self.app.workerINDI.cameraDevice]:
-                    self.data['CONNECTION']['CONNECT'] = self.app.workerINDI.data['Device'][self.app.workerINDI.cameraDevice]['CONNECTION']['CONNECT']
+                connection = self.app.workerINDI.properties.getVector(self.app.workerINDI.cameraDevice, 'CONNECTION')
+                if 'CONNECT' in connection:
+                    self.data['CONNECTION']['CONNECT'] = 'On' if connection['CONNECT'] else 'Off'
                 else:
                     self.logger.error('Unknown camera status')
             else:
@@ -104,8 +102,9 @@ class INDICamera:
         self.data['Gain'] = 'High'
         self.data['Speed'] = 'High'
         self.data['CCD_INFO'] = {}
-        self.data['CCD_INFO']['CCD_MAX_X'] = self.app.workerINDI.data['Device'][self.app.workerINDI.cameraDevice]['CCD_INFO']['CCD_MAX_X']
-        self.data['CCD_INFO']['CCD_MAX_Y'] = self.app.workerINDI.data['Device'][self.app.workerINDI.cameraDevice]['CCD_INFO']['CCD_MAX_Y']
+        ccdInfo = self.app.workerINDI.properties.getVector(self.app.workerINDI.cameraDevice, 'CCD_INFO')
+        self.data['CCD_INFO']['CCD_MAX_X'] = int(ccdInfo['CCD_MAX_X'])
+        self.data['CCD_INFO']['CCD_MAX_Y'] = int(ccdInfo['CCD_MAX_Y'])
 
     def getImage(self, imageParams):
         if self.application['Status'] != 'OK':
@@ -123,8 +122,10 @@ class INDICamera:
         # setting image path in INDI client to know where to store the image
         self.app.workerINDI.imagePath = imagePath
 
-        cam = self.app.workerINDI.data['Device'][self.app.workerINDI.cameraDevice]
-        if self.app.workerINDI.cameraDevice != '' and cam['CONNECTION']['CONNECT'] == 'On':
+        properties = self.app.workerINDI.properties
+        device = self.app.workerINDI.cameraDevice
+        timeRequested = time.time()
+        if device != '' and properties.getValue(device, 'CONNECTION', 'CONNECT', False):
             # Enable BLOB mode.
             self.app.INDICommandQueue.put(indiXML.enableBLOB('Also', indi_attr={'device': self.app.workerINDI.cameraDevice}))
             # set to raw - no compression mode
@@ -151,72 +152,73 @@ class INDICamera:
             self.app.INDICommandQueue.put(
                 indiXML.newNumberVector([indiXML.oneNumber(exposure, indi_attr={'name': 'CCD_EXPOSURE_VALUE'})],
                                         indi_attr={'name': 'CCD_EXPOSURE', 'device': self.app.workerINDI.cameraDevice}))
+            # send the commands now and not with the next cycle of the client
+            self.app.workerINDI.signalSendCommand.emit()
         else:
             self.mutexCancel.lock()
             self.cancel = True
             self.mutexCancel.unlock()
 
-        self.mutexReceived.lock()
-        self.receivedImage = False
-        self.mutexReceived.unlock()
+        self.imageReceived.clear()
 
-        # waiting for start integrating
+        # waiting for start integrating. the loops wake up with every change of the exposure vector
         self.main.cameraStatusText.emit('START')
+        version = properties.getVersion(device, 'CCD_EXPOSURE')
         while not self.cancel:
-            if 'CONNECTION' and 'CCD_EXPOSURE' in cam:
-                if cam['CONNECTION']['CONNECT'] == 'On':
-                    if cam['CCD_EXPOSURE']['state'] in ['Busy']:
+            exposureVector = properties.getVector(device, 'CCD_EXPOSURE')
+            if exposureVector:
+                if properties.getValue(device, 'CONNECTION', 'CONNECT', False):
+                    if exposureVector['state'] in ['Busy']:
+                        self.app.workerINDI.metrics['ExposureStartLatency'] = time.time() - timeRequested
+                        self.logger.info('Exposure started after {0:4.2f} s'.format(self.app.workerINDI.metrics['ExposureStartLatency']))
                         break
                 else:
                     self.main.cameraStatusText.emit('DISCONN')
             else:
                 self.main.cameraStatusText.emit('ERROR')
-            time.sleep(0.1)
+            version = properties.waitChange(device, 'CCD_EXPOSURE', version, self.WAIT_CHANGE)
 
         # loop for integrating
         self.main.cameraStatusText.emit('INTEGRATE')
         while not self.cancel:
-            if 'CONNECTION' and 'CCD_EXPOSURE' in cam:
-                if cam['CONNECTION']['CONNECT'] == 'On':
-                    if not float(cam['CCD_EXPOSURE']['CCD_EXPOSURE_VALUE']):
+            exposureVector = properties.getVector(device, 'CCD_EXPOSURE')
+            if exposureVector:
+                if properties.getValue(device, 'CONNECTION', 'CONNECT', False):
+                    if not exposureVector['CCD_EXPOSURE_VALUE']:
                         break
                 else:
                     self.main.cameraStatusText.emit('DISCONN')
+                self.main.cameraExposureTime.emit('{0:02.0f}'.format(exposureVector['CCD_EXPOSURE_VALUE']))
             else:
                 self.main.cameraStatusText.emit('ERROR')
-            if 'CCD_EXPOSURE' in cam:
-                self.main.cameraExposureTime.emit('{0:02.0f}'.format(float(cam['CCD_EXPOSURE']['CCD_EXPOSURE_VALUE'])))
-            else:
                 self.main.cameraExposureTime.emit('')
-            time.sleep(0.1)
+            version = properties.waitChange(device, 'CCD_EXPOSURE', version, self.WAIT_CHANGE)
 
         # loop for download
         self.main.imageIntegrated.emit()
         self.main.cameraStatusText.emit('DOWNLOAD')
         while not self.cancel:
-            if 'CCD_EXPOSURE' in cam:
-                if cam['CONNECTION']['CONNECT'] == 'On':
-                    if cam['CCD_EXPOSURE']['state'] in ['Ok', 'Idle']:
+            exposureVector = properties.getVector(device, 'CCD_EXPOSURE')
+            if exposureVector:
+                if properties.getValue(device, 'CONNECTION', 'CONNECT', False):
+                    if exposureVector['state'] in ['Ok', 'Idle']:
                         break
-                    elif cam['CCD_EXPOSURE']['state'] == 'Error':
+                    elif exposureVector['state'] == 'Error':
                         self.main.cameraStatusText.emit('ERROR')
                 else:
                     self.main.cameraStatusText.emit('DISCONN')
+                self.main.cameraExposureTime.emit('{0:02.0f}'.format(exposureVector['CCD_EXPOSURE_VALUE']))
             else:
                 self.main.cameraStatusText.emit('ERROR')
-            if 'CCD_EXPOSURE' in cam:
-                self.main.cameraExposureTime.emit('{0:02.0f}'.format(float(cam['CCD_EXPOSURE']['CCD_EXPOSURE_VALUE'])))
-            else:
                 self.main.cameraExposureTime.emit('')
-            time.sleep(0.1)
+            version = properties.waitChange(device, 'CCD_EXPOSURE', version, self.WAIT_CHANGE)
 
         # loop for saving
         self.main.imageDownloaded.emit()
         self.main.cameraStatusText.emit('SAVING')
-        while not self.cancel:
-            if self.receivedImage:
+        while not self.imageReceived.wait(self.WAIT_CHANGE):
+            if self.cancel:
                 break
-            time.sleep(0.1)
 
         # finally idle
         self.main.cameraStatusText.emit('IDLE')
@@ -227,10 +229,10 @@ class INDICamera:
     def connect(self):
         # connect the camera
         if self.app.workerINDI.cameraDevice != '':
-            if self.app.workerINDI.data['Device'][self.app.workerINDI.cameraDevice]['CONNECTION']['CONNECT'] == 'Off':
+            if not self.app.workerINDI.properties.getValue(self.app.workerINDI.cameraDevice, 'CONNECTION', 'CONNECT', False):
                 self.app.INDICommandQueue.put(indiXML.newSwitchVector([indiXML.oneSwitch('On', indi_attr={'name': 'CONNECT'})], indi_attr={'name': 'CONNECTION', 'device': self.app.workerINDI.cameraDevice}))
 
     def disconnect(self):
         if self.app.workerINDI.cameraDevice != '':
-            if self.app.workerINDI.data['Device'][self.app.workerINDI.cameraDevice]['CONNECTION']['CONNECT'] == 'On':
+            if self.app.workerINDI.properties.getValue(self.app.workerINDI.cameraDevice, 'CONNECTION', 'CONNECT', False):
                 self.app.INDICommandQueue.put(indiXML.newSwitchVector([indiXML.oneSwitch('Off', indi_attr={'name': 'CONNECT'})], indi_attr={'name': 'CONNECTION', 'device': self.app.workerINDI.cameraDevice}))
@@ -20,15 +20,96 @@
 import logging
 import time
 import zlib
+import base64
 import queue
+import threading
 import os
+import re
 from xml.etree import ElementTree
 import PyQt5
 import indi.indi_xml as indiXML
+from indi import indi_properties
 import astropy.io.fits as pyfits
 from baseclasses import checkIP
 
 
+class BLOBWorker(PyQt5.QtCore.QRunnable):
+
+    def __init__(self, fn, *args):
+        super(BLOBWorker, self).__init__()
+        self.fn = fn
+        self.args = args
+
+    @PyQt5.QtCore.pyqtSlot()
+    def run(self):
+        self.fn(*self.args)
+
+
+class StreamParser:
+    # the stream of a connection is one xml document without root, so a root is given at the start. the parser
+    # works incrementally on the received bytes, every complete top level element is given once and then removed
+    # from the tree
+    logger = logging.getLogger(__name__)
+
+    # top level elements, which an INDI server sends to a client. after a parse error the bytes up to the next of
+    # these start tags are dropped and a new parser takes up the stream there
+    START_TAG = re.compile(b'<(?:def|set)(?:Text|Number|Switch|Light|BLOB)Vector|<message|<delProperty')
+    # length of the longest start tag, the end of the dropped bytes is kept as it could be the beginning of one
+    START_TAG_LENGTH = 16
+
+    def __init__(self):
+        self.parser = None
+        self.depth = 0
+        self.root = None
+        self.isResyncing = False
+        self.resyncBuffer = b''
+        self.numberDropped = 0
+        self.reset()
+
+    def reset(self):
+        self.parser = ElementTree.XMLPullParser(events=('start', 'end'))
+        self.parser.feed(b'<data>')
+        self.depth = 0
+        self.root = None
+        self.isResyncing = False
+        self.resyncBuffer = b''
+        self.numberDropped = 0
+
+    def resync(self, data):
+        # called after a parse error with the fed data. the element, which broke the parser, is not taken again,
+        # so the search for the next start tag begins after the first byte
+        self.reset()
+        self.isResyncing = True
+        self.resyncBuffer = data[1:]
+        self.numberDropped = min(len(data), 1)
+
+    def feed(self, data):
+        if self.isResyncing:
+            data = self.resyncBuffer + data
+            match = self.START_TAG.search(data)
+            if match is None:
+                numberKept = min(len(data), self.START_TAG_LENGTH - 1)
+                self.numberDropped += len(data) - numberKept
+                self.resyncBuffer = data[len(data) - numberKept:]
+                return
+            numberDropped = self.numberDropped + match.start()
+            self.reset()
+            self.logger.warning('INDI XML stream resynced at <{0}, dropped {1} bytes'.format(match.group()[1:].decode(), numberDropped))
+            data = data[match.start():]
+        self.parser.feed(data)
+        for event, element in self.parser.read_events():
+            if event == 'start':
+                if self.root is None:
+                    self.root = element
+                else:
+                    self.depth += 1
+            elif event == 'end':
+                self.depth -= 1
+                if self.depth == 0:
+                    yield element
+                    self.root.clear()
+
+
 class INDIClient(PyQt5.QtCore.QObject):
     logger = logging.getLogger(__name__)
     status = PyQt5.QtCore.pyqtSignal(int)
@@ -37,6 +118,7 @@ class INDIClient(PyQt5.QtCore.QObject):
     statusDome = PyQt5.QtCore.pyqtSignal(bool)
     receivedImage = PyQt5.QtCore.pyqtSignal(bool)
     processMessage = PyQt5.QtCore.pyqtSignal(object)
+    signalSendCommand = PyQt5.QtCore.pyqtSignal()
 
     signalDestruct = PyQt5.QtCore.pyqtSignal()
 
@@ -58,6 +140,22 @@ class INDIClient(PyQt5.QtCore.QObject):
 
     CYCLE = 200
     CONNECTION_TIMEOUT = 2000
+    READ_SIZE = 100000
+    # blobs are decoded in chunks of base64 characters of the received text. one worker keeps the order of the images
+    BLOB_CHUNK = 1 << 20
+    BLOB_WORKERS = 1
+    # default for the separate connection for blobs, could be changed in the config file
+    BLOB_CONNECTION = True
+    BLOB_TAGS = ['defBLOBVector', 'setBLOBVector']
+    # setup vectors, which are not sent again, if the device has already the values
+    SETUP_VECTORS = ['CCD_COMPRESSION', 'CCD_FRAME_TYPE', 'CCD_BINNING', 'CCD_FRAME']
+
+    # order of the checks for the device type shown in the gui
+    STATUS_INTERFACES = [('CCD', CCD_INTERFACE),
+                         ('Environment', WEATHER_INTERFACE),
+                         ('Dome', DOME_INTERFACE),
+                         ('Telescope', TELESCOPE_INTERFACE),
+                         ('Aux', AUX_INTERFACE)]
 
     data = {
         'ServerIP': '',
@@ -72,8 +170,28 @@ class INDIClient(PyQt5.QtCore.QObject):
         self.thread = thread
         self.isRunning = False
         self.connectCounter = 0
-        self.tagFrame = ''
-        self.messageString = ''
+        self.connectCounterBLOB = 0
+        self.isTimeoutBLOB = False
+        self.parser = StreamParser()
+        # typed properties of all devices, data['Device'] is the same dict for reading
+        self.properties = indi_properties.PropertyStore()
+        self.data['Device'] = self.properties.devices
+        self.statusDevices = dict()
+        # wakes up the devices waiting for their shortcut
+        self.deviceFound = threading.Condition()
+        # second connection only for blobs, so the control messages do not wait behind an image transfer
+        self.useBLOBConnection = self.BLOB_CONNECTION
+        self.blobSocket = None
+        self.blobParser = StreamParser()
+        self.blobPool = PyQt5.QtCore.QThreadPool()
+        self.blobPool.setMaxThreadCount(self.BLOB_WORKERS)
+        # time from receiving an image to the written file and time, the thread is blocked by one message
+        self.metrics = {'ImageReceivedLatency': 0.0, 'ThreadStallLast': 0.0, 'ThreadStallMax': 0.0,
+                        'ExposureStartLatency': 0.0, 'CommandsSkipped': 0}
+        # blob mode per device, which was last sent to the server
+        self.blobModes = dict()
+        # values of setup vectors, which are sent and not answered yet
+        self.pendingValues = dict()
         self.mutexIPChange = PyQt5.QtCore.QMutex()
         self.mutexIsRunning = PyQt5.QtCore.QMutex()
         self.checkIP = checkIP.CheckIP()
@@ -103,6 +221,9 @@ class INDIClient(PyQt5.QtCore.QObject):
                 self.app.ui.checkEnableINDIListening.setChecked(self.app.config['CheckEnableINDIListening'])
             if 'CheckEnableINDISolving' in self.app.config:
                 self.app.ui.checkEnableINDISolving.setChecked(self.app.config['CheckEnableINDISolving'])
+            # the separate blob connection is only in the config file
+            if 'INDIBLOBConnection' in self.app.config:
+                self.useBLOBConnection = bool(self.app.config['INDIBLOBConnection'])
         except Exception as e:
             self.logger.error('item in config.cfg not be initialize, error:{0}'.format(e))
         finally:
@@ -117,6 +238,7 @@ class INDIClient(PyQt5.QtCore.QObject):
         self.app.config['CheckEnableINDI'] = self.app.ui.checkEnableINDI.isChecked()
         self.app.config['CheckEnableINDIListening'] = self.app.ui.checkEnableINDIListening.isChecked()
         self.app.config['CheckEnableINDISolving'] = self.app.ui.checkEnableINDISolving.isChecked()
+        self.app.config['INDIBLOBConnection'] = self.useBLOBConnection
 
     def changedINDIClientConnectionSettings(self):
         if self.isRunning:
@@ -157,7 +279,14 @@ class INDIClient(PyQt5.QtCore.QObject):
         self.socket.disconnected.connect(self.handleDisconnect)
         self.socket.readyRead.connect(self.handleReadyRead)
         self.socket.error.connect(self.handleError)
+        if self.useBLOBConnection:
+            self.blobSocket = PyQt5.QtNetwork.QTcpSocket()
+            self.blobSocket.setSocketOption(PyQt5.QtNetwork.QAbstractSocket.KeepAliveOption, 1)
+            self.blobSocket.connected.connect(self.handleConnectedBLOB)
+            self.blobSocket.disconnected.connect(self.handleDisconnectBLOB)
+            self.blobSocket.readyRead.connect(self.handleReadyReadBLOB)
         self.processMessage.connect(self.handleReceived)
+        self.signalSendCommand.connect(self.sendCommands)
         self.signalDestruct.connect(self.destruct, type=PyQt5.QtCore.Qt.BlockingQueuedConnection)
         self.cycleTimer = PyQt5.QtCore.QTimer(self)
         self.cycleTimer.setSingleShot(False)
@@ -178,6 +307,7 @@ class INDIClient(PyQt5.QtCore.QObject):
     @PyQt5.QtCore.pyqtSlot()
     def destruct(self):
         self.cycleTimer.stop()
+        self.signalSendCommand.disconnect(self.sendCommands)
         self.signalDestruct.disconnect(self.destruct)
         self.socket.hostFound.disconnect(self.handleHostFound)
         self.socket.connected.disconnect(self.handleConnected)
@@ -186,15 +316,80 @@ class INDIClient(PyQt5.QtCore.QObject):
         self.socket.readyRead.disconnect(self.handleReadyRead)
         self.socket.error.disconnect(self.handleError)
         self.socket.abort()
+        if self.blobSocket:
+            self.blobSocket.connected.disconnect(self.handleConnectedBLOB)
+            self.blobSocket.disconnected.disconnect(self.handleDisconnectBLOB)
+            self.blobSocket.readyRead.disconnect(self.handleReadyReadBLOB)
+            self.blobSocket.abort()
+            self.blobSocket = None
 
     def doCommand(self):
         self.doReconnect()
+        self.doReconnectBLOB()
         self.handleNewDevice()
-        self.app.sharedINDIDataLock.lockForRead()
-        if not self.app.INDICommandQueue.empty() and (self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState):
+        self.sendCommands()
+
+    @PyQt5.QtCore.pyqtSlot()
+    def sendCommands(self):
+        # all queued commands are sent at once. the sockets buffer the writes, so each connection gets a single
+        # write with the flush. producers could emit signalSendCommand to have them sent without waiting for the cycle
+        if self.socket.state() != PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
+            return
+        numberCommands = 0
+        while not self.app.INDICommandQueue.empty():
             indiCommand = self.app.INDICommandQueue.get()
+            if self.isCurrent(indiCommand):
+                self.metrics['CommandsSkipped'] += 1
+                self.logger.debug('Skipped {0}, device has already the values'.format(indiCommand.attr['name']))
+                continue
+            self.setPending(indiCommand)
             self.sendMessage(indiCommand)
-        self.app.sharedINDIDataLock.unlock()
+            numberCommands += 1
+        if numberCommands:
+            self.flushSockets()
+
+    def isSetupVector(self, indiCommand):
+        if not isinstance(indiCommand, (indiXML.NewSwitchVector, indiXML.NewNumberVector, indiXML.NewTextVector)):
+            return False
+        return indiCommand.attr.get('name') in self.SETUP_VECTORS and 'device' in indiCommand.attr
+
+    def setPending(self, indiCommand):
+        # the values sent for a setup vector are pending, until the server answers with a new version of the vector
+        if not self.isSetupVector(indiCommand):
+            return
+        key = (indiCommand.attr['device'], indiCommand.attr['name'])
+        values = dict()
+        if key in self.pendingValues:
+            values.update(self.pendingValues[key]['Values'])
+        for element in indiCommand.elt_list:
+            values[element.attr['name']] = self.properties.parseValue(element)
+        self.pendingValues[key] = {'Values': values, 'Version': self.properties.getVersion(*key)}
+
+    def isCurrent(self, indiCommand):
+        # true for a setup vector, whose values are all set on the device. the latest values sent are compared
+        # first, as long as the server did not answer them, as the state of the stored vector is still the old one
+        if not self.isSetupVector(indiCommand):
+            return False
+        key = (indiCommand.attr['device'], indiCommand.attr['name'])
+        vector = self.properties.getVector(*key)
+        if key in self.pendingValues and self.pendingValues[key]['Version'] != self.properties.getVersion(*key):
+            del self.pendingValues[key]
+        if key in self.pendingValues:
+            values = dict(vector)
+            values.update(self.pendingValues[key]['Values'])
+        elif vector.get('state') in ['Ok', 'Idle']:
+            values = vector
+        else:
+            return False
+        for element in indiCommand.elt_list:
+            if values.get(element.attr['name']) != self.properties.parseValue(element):
+                return False
+        return True
+
+    def flushSockets(self):
+        self.socket.flush()
+        if self.blobSocket:
+            self.blobSocket.flush()
 
     def doReconnect(self):
         if self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.UnconnectedState:
@@ -221,6 +416,49 @@ class INDIClient(PyQt5.QtCore.QObject):
                 # connected
                 pass
 
+    def doReconnectBLOB(self):
+        # the blob connection follows the control connection
+        if not self.blobSocket:
+            return
+        if self.socket.state() != PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
+            return
+        if self.blobSocket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
+            return
+        if self.blobSocket.state() == PyQt5.QtNetwork.QAbstractSocket.UnconnectedState and self.connectCounterBLOB == 0:
+            self.app.sharedINDIDataLock.lockForRead()
+            self.blobSocket.connectToHost(self.data['ServerIP'], self.data['ServerPort'])
+            self.app.sharedINDIDataLock.unlock()
+        if self.connectCounterBLOB * self.CYCLE > self.CONNECTION_TIMEOUT:
+            self.blobSocket.abort()
+            self.connectCounterBLOB = 0
+            # images are received on the control connection meanwhile, the message is shown once per outage
+            if not self.isTimeoutBLOB:
+                self.isTimeoutBLOB = True
+                self.logger.warning('Timeout of INDI connection for blobs')
+                self.app.messageQueue.put('Timeout INDI connection for images, using main connection\n')
+        else:
+            self.connectCounterBLOB += 1
+
+    @PyQt5.QtCore.pyqtSlot()
+    def handleConnectedBLOB(self):
+        self.logger.info('INDI Server connected for blobs')
+        self.connectCounterBLOB = 0
+        self.isTimeoutBLOB = False
+        self.blobParser.reset()
+        # the server sends the properties to this connection as well, so both have the same device model
+        self.writeMessage(self.blobSocket, indiXML.clientGetProperties(indi_attr={'version': '1.7'}))
+        if self.cameraDevice:
+            self.setEnableBLOB(self.cameraDevice)
+        self.flushSockets()
+
+    @PyQt5.QtCore.pyqtSlot()
+    def handleDisconnectBLOB(self):
+        self.logger.info('INDI client connection for blobs is disconnected from host')
+        # images are taken on the control connection again
+        if self.cameraDevice and self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
+            self.setEnableBLOB(self.cameraDevice)
+            self.flushSockets()
+
     @PyQt5.QtCore.pyqtSlot()
     def handleHostFound(self):
         self.app.sharedINDIDataLock.lockForRead()
@@ -232,6 +470,7 @@ class INDIClient(PyQt5.QtCore.QObject):
         self.app.sharedINDIDataLock.lockForRead()
         self.logger.info('INDI Server connected at {0}:{1}'.format(self.data['ServerIP'], self.data['ServerPort']))
         self.app.sharedINDIDataLock.unlock()
+        self.parser.reset()
         # get all informations about existing devices on the choosen indi server
         self.app.INDICommandQueue.put(indiXML.clientGetProperties(indi_attr={'version': '1.7'}))
 
@@ -241,32 +480,37 @@ class INDIClient(PyQt5.QtCore.QObject):
             # now place the information about accessible devices in the gui and set the connection status
             # and configure the new devices adequately
             # todo: handling of multiple devices of one type and doing the selection
-            self.app.sharedINDIDataLock.lockForRead()
-            if device in self.data['Device']:
-                if 'DRIVER_INFO' in self.data['Device'][device]:
-                    if int(self.data['Device'][device]['DRIVER_INFO']['DRIVER_INTERFACE']) & self.CCD_INTERFACE:
+            if self.properties.hasDevice(device):
+                interface = self.properties.getInterface(device)
+                if interface is not None:
+                    if interface & self.CCD_INTERFACE:
                         # make a shortcut for later use and knowing which is a Camera
                         self.cameraDevice = device
                         self.app.INDICommandQueue.put(
                             indiXML.newSwitchVector([indiXML.oneSwitch('On', indi_attr={'name': 'ABORT'})],
                                                     indi_attr={'name': 'CCD_ABORT_EXPOSURE', 'device': self.app.workerINDI.cameraDevice}))
-                    elif int(self.data['Device'][device]['DRIVER_INFO']['DRIVER_INTERFACE']) & self.WEATHER_INTERFACE:
+                    elif interface & self.WEATHER_INTERFACE:
                         # make a shortcut for later use
                         self.environmentDevice = device
-                    elif int(self.data['Device'][device]['DRIVER_INFO']['DRIVER_INTERFACE']) & self.TELESCOPE_INTERFACE:
+                    elif interface & self.TELESCOPE_INTERFACE:
                         # make a shortcut for later use
                         self.telescopeDevice = device
-                    elif int(self.data['Device'][device]['DRIVER_INFO']['DRIVER_INTERFACE']) & self.DOME_INTERFACE:
+                    elif interface & self.DOME_INTERFACE:
                         # make a shortcut for later use
                         self.domeDevice = device
                     elif device == 'SQM':
                         self.auxDevice = device
-                    # elif int(self.data['Device'][device]['DRIVER_INFO']['DRIVER_INTERFACE']) == 0:
-                        # make a shortcut for later use
+                    with self.deviceFound:
+                        self.deviceFound.notify_all()
                 else:
                     # if not ready, put it on the stack again !
                     self.newDeviceQueue.put(device)
-            self.app.sharedINDIDataLock.unlock()
+
+    def waitDevice(self, name, timeout):
+        # name of the shortcut like 'domeDevice', returns the device or '' after the timeout
+        with self.deviceFound:
+            self.deviceFound.wait_for(lambda: getattr(self, name) != '', timeout)
+        return getattr(self, name)
 
     @PyQt5.QtCore.pyqtSlot(PyQt5.QtNetwork.QAbstractSocket.SocketError)
     def handleError(self, socketError):
@@ -281,9 +525,13 @@ class INDIClient(PyQt5.QtCore.QObject):
     @PyQt5.QtCore.pyqtSlot()
     def handleDisconnect(self):
         self.logger.info('INDI client connection is disconnected from host')
-        self.app.sharedINDIDataLock.lockForWrite()
-        self.data['Device'] = {}
-        self.app.sharedINDIDataLock.unlock()
+        if self.blobSocket:
+            self.blobSocket.abort()
+        self.properties.clear()
+        self.statusDevices = dict()
+        self.blobModes = dict()
+        self.pendingValues = dict()
+        self.connectCounterBLOB = 0
         self.cameraDevice = ''
         self.environmentDevice = ''
         self.domeDevice = ''
@@ -301,74 +549,21 @@ class INDIClient(PyQt5.QtCore.QObject):
         if 'device' not in message.attr:
             return
         device = message.attr['device']
-        # receiving all definitions for vectors in indi and building them up in self.data['Device']
-        if isinstance(message, indiXML.DefBLOBVector):
-            self.app.sharedINDIDataLock.lockForWrite()
-            if device not in self.data['Device']:
-                self.data['Device'][device] = {}
-            if device in self.data['Device']:
-                if 'name' in message.attr:
-                    defVector = message.attr['name']
-                    if defVector not in self.data['Device'][device]:
-                        self.data['Device'][device][defVector] = {}
-                    for elt in message.elt_list:
-                        self.data['Device'][device][defVector][elt.attr['name']] = ''
-            self.app.sharedINDIDataLock.unlock()
-
-        elif isinstance(message, indiXML.SetBLOBVector):
-            self.app.sharedINDIDataLock.lockForRead()
-            if device in self.data['Device']:
-                if int(self.data['Device'][device]['DRIVER_INFO']['DRIVER_INTERFACE']) & self.CCD_INTERFACE:
+        timeReceived = time.time()
+        if isinstance(message, indiXML.SetBLOBVector):
+            if self.properties.hasDevice(device):
+                if (self.properties.getInterface(device) or 0) & self.CCD_INTERFACE:
                     name = message.attr['name']
                     # ccd1 is the main camera in INDI
                     if name == 'CCD1':
                         # format tells me raw or compressed format
                         if 'format' in message.getElt(0).attr:
-                            try:
-                                if self.imagePath != '':
-                                    if message.getElt(0).attr['format'] == '.fits':
-                                        HDU = pyfits.HDUList.fromstring(message.getElt(0).getValue())
-                                        imageHDU = HDU[0]
-                                        pyfits.writeto(self.imagePath, imageHDU.data, imageHDU.header, overwrite=True)
-                                        self.logger.debug('Image BLOB is in raw fits format')
-                                    elif message.getElt(0).attr['format'] == '.fits.fz':
-                                        HDU = pyfits.HDUList.fromstring(message.getElt(0).getValue())
-                                        imageHDU = HDU[1]
-                                        pyfits.writeto(self.imagePath, imageHDU.data, imageHDU.header, overwrite=True)
-                                        self.logger.debug('Image BLOB is in fpack compressed fits format')
-                                    elif message.getElt(0).attr['format'] == '.fits.z':
-                                        HDU = pyfits.HDUList.fromstring(zlib.decompress(message.getElt(0).getValue()))
-                                        imageHDU = HDU[0]
-                                        pyfits.writeto(self.imagePath, imageHDU.data, imageHDU.header, overwrite=True)
-                                        self.logger.debug('Image BLOB is compressed fits format')
-                                    else:
-                                        self.logger.debug('Image BLOB is not supported')
-                                    self.receivedImage.emit(True)
-                                else:
-                                    # here are some functions to listen to image transfer on ethernet
-                                    if self.app.ui.checkEnableINDIListening.isChecked():
-                                        # received an image without asking for it. just listening
-                                        path = os.getcwd() + '/images/listen.fit'
-                                        if message.getElt(0).attr['format'] == '.fits':
-                                            imageHDU = pyfits.HDUList.fromstring(message.getElt(0).getValue())
-                                            imageHDU.writeto(path, overwrite=True)
-                                            self.logger.debug('Image while listening is received in raw fits format')
-                                        else:
-                                            imageHDU = pyfits.HDUList.fromstring(zlib.decompress(message.getElt(0).getValue()))
-                                            imageHDU.writeto(path, overwrite=True)
-                                            self.logger.debug('Image while listening is received in compressed fits format')
-                                        self.app.imageWindow.signalShowFitsImage.emit(path)
-                                        # if there is a hint, we could solve it as well automatically
-                                        if self.app.ui.checkEnableINDISolving.isChecked():
-                                            self.app.imageWindow.signalSolveFitsImage.emit(path)
-                                    else:
-                                        # do nothing
-                                        pass
-                            except Exception as e:
-                                self.receivedImage.emit(False)
-                                self.logger.debug('Could not receive Image, error:{0}'.format(e))
-                            finally:
-                                pass
+                            # decoding and writing is done in the pool, the path is taken now, because it is reset
+                            # by the camera after receiving the image
+                            self.blobPool.start(BLOBWorker(self.processBLOB, message.getElt(0), self.imagePath,
+                                                           self.app.ui.checkEnableINDIListening.isChecked(),
+                                                           self.app.ui.checkEnableINDISolving.isChecked(),
+                                                           timeReceived))
                         else:
                             self.logger.debug('Could not find format in message from device: {0}'.format(device))
                     else:
@@ -377,159 +572,141 @@ class INDIClient(PyQt5.QtCore.QObject):
                     self.logger.debug('Got unexpected BLOB from device: {0}'.format(device))
             else:
                 self.logger.debug('Did not find device: {0} in device list'.format(device))
-            self.app.sharedINDIDataLock.unlock()
 
         # deleting properties from devices
         elif isinstance(message, indiXML.DelProperty):
-            self.app.sharedINDIDataLock.lockForWrite()
-            if device in self.data['Device']:
-                if 'name' in message.attr:
-                    delVector = message.attr['name']
-                    if delVector in self.data['Device'][device]:
-                        del self.data['Device'][device][delVector]
-            self.app.sharedINDIDataLock.unlock()
+            if 'name' in message.attr:
+                self.properties.delete(device, message.attr['name'])
 
-        # receiving changes from vectors and updating them ins self.data['Device]
-        elif isinstance(message, indiXML.SetSwitchVector) or \
-                isinstance(message, indiXML.SetTextVector) or \
-                isinstance(message, indiXML.SetLightVector) or \
-                isinstance(message, indiXML.SetNumberVector):
-            self.app.sharedINDIDataLock.lockForWrite()
-            if device in self.data['Device']:
-                if 'name' in message.attr:
-                    setVector = message.attr['name']
-                    if setVector not in self.data['Device'][device]:
-                        self.data['Device'][device][setVector] = {}
-                        self.logger.warning('SetVector before DefVector in INDI protocol, device: {0}, vector: {1}'.format(device, setVector))
-                    if 'state' in message.attr:
-                        self.data['Device'][device][setVector]['state'] = message.attr['state']
-                    if 'timeout' in message.attr:
-                        self.data['Device'][device][setVector]['timeout'] = message.attr['timeout']
-                    for elt in message.elt_list:
-                        self.data['Device'][device][setVector][elt.attr['name']] = elt.getValue()
-            self.app.sharedINDIDataLock.unlock()
+        # receiving changes from vectors and updating them in the property store
+        elif isinstance(message, (indiXML.SetSwitchVector, indiXML.SetTextVector, indiXML.SetLightVector, indiXML.SetNumberVector)):
+            self.properties.update(device, message, False)
 
-        # receiving all definitions for vectors in indi and building them up in self.data['Device']
-        elif isinstance(message, indiXML.DefSwitchVector) or \
-                isinstance(message, indiXML.DefTextVector) or \
-                isinstance(message, indiXML.DefLightVector) or \
-                isinstance(message, indiXML.DefNumberVector):
-            self.app.sharedINDIDataLock.lockForWrite()
-            if device not in self.data['Device']:
+        # receiving all definitions for vectors in indi and building them up in the property store
+        elif isinstance(message, (indiXML.DefSwitchVector, indiXML.DefTextVector, indiXML.DefLightVector, indiXML.DefNumberVector, indiXML.DefBLOBVector)):
+            if self.properties.update(device, message, True):
                 # new device !
-                self.data['Device'][device] = {}
                 self.newDeviceQueue.put(device)
-            if device in self.data['Device']:
-                if 'name' in message.attr:
-                    defVector = message.attr['name']
-                    if defVector not in self.data['Device'][device]:
-                        self.data['Device'][device][defVector] = {}
-                    if 'state' in message.attr:
-                        self.data['Device'][device][defVector]['state'] = message.attr['state']
-                    if 'perm' in message.attr:
-                        self.data['Device'][device][defVector]['perm'] = message.attr['perm']
-                    if 'timeout' in message.attr:
-                        self.data['Device'][device][defVector]['timeout'] = message.attr['timeout']
-                    for elt in message.elt_list:
-                        self.data['Device'][device][defVector][elt.attr['name']] = elt.getValue()
-            self.app.sharedINDIDataLock.unlock()
-
-        self.app.sharedINDIDataLock.lockForRead()
-        if device in self.data['Device']:
-            if 'DRIVER_INFO' in self.data['Device'][device]:
-                if 'DRIVER_INTERFACE' in self.data['Device'][device]['DRIVER_INFO']:
-                    if int(self.data['Device'][device]['DRIVER_INFO']['DRIVER_INTERFACE']) & self.CCD_INTERFACE:
-                        self.app.INDIStatusQueue.put({'Name': 'CCD', 'value': device})
-                    elif int(self.data['Device'][device]['DRIVER_INFO']['DRIVER_INTERFACE']) & self.WEATHER_INTERFACE:
-                        self.app.INDIStatusQueue.put({'Name': 'Environment', 'value': device})
-                    elif int(self.data['Device'][device]['DRIVER_INFO']['DRIVER_INTERFACE']) & self.DOME_INTERFACE:
-                        self.app.INDIStatusQueue.put({'Name': 'Dome', 'value': device})
-                    elif int(self.data['Device'][device]['DRIVER_INFO']['DRIVER_INTERFACE']) & self.TELESCOPE_INTERFACE:
-                        self.app.INDIStatusQueue.put({'Name': 'Telescope', 'value': device})
-                    elif int(self.data['Device'][device]['DRIVER_INFO']['DRIVER_INTERFACE']) & self.AUX_INTERFACE:
-                        self.app.INDIStatusQueue.put({'Name': 'Aux', 'value': device})
-        self.app.sharedINDIDataLock.unlock()
 
-    @PyQt5.QtCore.pyqtSlot()
-    def handleReadyRead(self):
-        # Add starting tag if this is new message.
-        # we have to check and keep the first XML tag
-        if len(self.messageString) == 0:
-            self.messageString = "<data>"
-        # Get message from socket.
-        while self.socket.bytesAvailable() and self.isRunning:
-            # print(self.socket.bytesAvailable(), len(self.messageString))
+        # the gui gets the device types only, when they change
+        interface = self.properties.getInterface(device)
+        if interface is not None:
+            for name, bit in self.STATUS_INTERFACES:
+                if interface & bit:
+                    if self.statusDevices.get(name) != device:
+                        self.statusDevices[name] = device
+                        self.app.INDIStatusQueue.put({'Name': name, 'value': device})
+                    break
+
+    def writeBLOB(self, text, path, decompressor=None):
+        # the base64 text is decoded in chunks and written to the file, so there is no second copy of the image as
+        # bytes. the text itself is still held as a whole, because the xml parser collects it for the element.
+        # whitespace is removed per chunk and the rest, which is not a multiple of 4, is kept
+        with open(path, 'wb') as outfile:
+            rest = ''
+            for i in range(0, len(text), self.BLOB_CHUNK):
+                chunk = rest + ''.join(text[i:i + self.BLOB_CHUNK].split())
+                length = len(chunk) // 4 * 4
+                rest = chunk[length:]
+                data = base64.b64decode(chunk[:length])
+                if decompressor:
+                    data = decompressor.decompress(data)
+                outfile.write(data)
+            if decompressor:
+                outfile.write(decompressor.flush())
+
+    def processBLOB(self, element, imagePath, isListening, isSolving, timeReceived):
+        # runs in the blob pool. raw fits are written straight to the file, zlib compressed ones are decompressed
+        # on the way. fpack compressed fits have to be unpacked by astropy
+        if imagePath == '' and not isListening:
+            return
+        if imagePath == '':
+            # received an image without asking for it. just listening
+            path = os.getcwd() + '/images/listen.fit'
+        else:
+            path = imagePath
+        try:
+            blobFormat = element.attr['format']
+            if blobFormat == '.fits':
+                self.writeBLOB(element.getText(), path)
+                self.logger.debug('Image BLOB is in raw fits format')
+            elif blobFormat == '.fits.z':
+                self.writeBLOB(element.getText(), path, zlib.decompressobj())
+                self.logger.debug('Image BLOB is compressed fits format')
+            elif blobFormat == '.fits.fz':
+                HDU = pyfits.HDUList.fromstring(element.getValue())
+                imageHDU = HDU[1]
+                pyfits.writeto(path, imageHDU.data, imageHDU.header, overwrite=True)
+                self.logger.debug('Image BLOB is in fpack compressed fits format')
+            else:
+                self.logger.debug('Image BLOB is not supported')
+        except Exception as e:
+            self.receivedImage.emit(False)
+            self.logger.debug('Could not receive Image, error:{0}'.format(e))
+            return
+        self.metrics['ImageReceivedLatency'] = time.time() - timeReceived
+        self.logger.info('Image written after {0:4.2f} s, max stall of indi thread {1:4.3f} s'.format(self.metrics['ImageReceivedLatency'], self.metrics['ThreadStallMax']))
+        if imagePath != '':
+            self.receivedImage.emit(True)
+        else:
+            self.app.imageWindow.signalShowFitsImage.emit(path)
+            # if there is a hint, we could solve it as well automatically
+            if isSolving:
+                self.app.imageWindow.signalSolveFitsImage.emit(path)
+
+    def readSocket(self, socket, parser, tags=None):
+        # with tags only these top level elements are processed
+        while socket.bytesAvailable() and self.isRunning:
+            data = bytes(socket.read(self.READ_SIZE))
             try:
-                self.messageString += self.socket.read(100000).decode()
+                for element in parser.feed(data):
+                    if tags and element.tag not in tags:
+                        continue
+                    timeStart = time.time()
+                    self.processMessage.emit(indiXML.parseETree(element))
+                    # the processing of a message blocks all others
+                    self.metrics['ThreadStallLast'] = time.time() - timeStart
+                    self.metrics['ThreadStallMax'] = max(self.metrics['ThreadStallMax'], self.metrics['ThreadStallLast'])
+            except ElementTree.ParseError as e:
+                self.logger.error('INDI XML message parse error: {0}, resyncing the stream'.format(e))
+                parser.resync(data)
             except Exception as e:
-                self.logger.error('Cannot decode, error:{0}'.format(e))
+                self.logger.error('INDI XML message could not be processed, error: {0}'.format(e))
             finally:
                 pass
-        # Add closing tag.
-        self.messageString += "</data>"
-        # Try and parse the message !
-        try:
-            messages = ElementTree.fromstring(self.messageString)
-            self.messageString = ""
-            for message in messages:
-                xmlMessage = indiXML.parseETree(message)
-                self.processMessage.emit(xmlMessage)
-        # Message is incomplete, remove </data> and try again with more data
-        except ElementTree.ParseError:
-            self.messageString = self.messageString[:-7]
-        finally:
-            pass
 
     @PyQt5.QtCore.pyqtSlot()
-    def handleReadyReadNew(self):
-        # Get message from socket.
-        while self.socket.bytesAvailable() and self.isRunning:
-            # decode message and catch error
-            try:
-                self.messageString += self.socket.read(10000).decode()
-            except Exception as e:
-                self.logger.error('INDI message raw decode, error:{0}'.format(e))
-            finally:
-                pass
-        # get first tag frame
-        if self.tagFrame == '':
-            self.tagFrame = self.messageString[1:50].split(' ')[0]
-            print('start: ', self.tagFrame, len(self.messageString))
-        # checking if closing first tag is there
-        if self.messageString.endswith('</' + self.tagFrame + '>') or self.messageString.endswith('</' + self.tagFrame + '>\n'):
-            # last part of message, process now
-            messageComplete = True
-            print('finished: ' + self.tagFrame)
-        else:
-            # otherwise continue
-            messageComplete = False
-            print(len(self.messageString), self.messageString[len(self.messageString)-30:], ord(self.messageString[-2]), ord(self.messageString[-1]))
+    def handleReadyRead(self):
+        self.readSocket(self.socket, self.parser)
 
-        if messageComplete:
-            # adding frame tags for INDI
-            self.messageString = "<data>" + self.messageString + "</data>"
-            try:
-                # decode INDI XML elements
-                messages = ElementTree.fromstring(self.messageString)
-                # clear message
-                for message in messages:
-                    # print('message: ', message)
-                    xmlMessage = indiXML.parseETree(message)
-                    self.processMessage.emit(xmlMessage)
-            except ElementTree.ParseError:
-                print('error parse')
-                self.logger.error('INDI XML message parse error')
-            finally:
-                print('reset to next round')
-                self.messageString = ''
-                self.tagFrame = ''
+    @PyQt5.QtCore.pyqtSlot()
+    def handleReadyReadBLOB(self):
+        # all other messages come on the control connection as well
+        self.readSocket(self.blobSocket, self.blobParser, tags=self.BLOB_TAGS)
+
+    def setEnableBLOB(self, device):
+        # with the blob connection the images come only there and the control connection gets none, otherwise the
+        # control connection gets them in between. the mode is only sent, when it changes
+        if self.blobSocket and self.blobSocket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
+            if self.blobModes.get(device) != 'Only':
+                self.writeMessage(self.blobSocket, indiXML.enableBLOB('Only', indi_attr={'device': device}))
+                self.writeMessage(self.socket, indiXML.enableBLOB('Never', indi_attr={'device': device}))
+                self.blobModes[device] = 'Only'
         else:
-            # move on
-            pass
+            if self.blobModes.get(device) != 'Also':
+                self.writeMessage(self.socket, indiXML.enableBLOB('Also', indi_attr={'device': device}))
+                self.blobModes[device] = 'Also'
+
+    def writeMessage(self, socket, indiCommand):
+        # the message is buffered by the socket until the flush or the next run of the event loop
+        if socket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
+            socket.write(indiCommand.toXML() + b'\n')
+        else:
+            self.logger.warning('Socket not connected')
 
     def sendMessage(self, indiCommand):
-        if self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
-            self.socket.write(indiCommand.toXML() + b'\n')
-            self.socket.flush()
+        # the blob connection is chosen here, so the devices do not have to know about it
+        if isinstance(indiCommand, indiXML.EnableBLOB) and 'device' in indiCommand.attr:
+            self.setEnableBLOB(indiCommand.attr['device'])
         else:
-            self.logger.warning('Socket not connected')
+            self.writeMessage(self.socket, indiCommand)
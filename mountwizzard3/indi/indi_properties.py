@@ -0,0 +1,188 @@
+############################################################
+# -*- coding: utf-8 -*-
+#
+#       #   #  #   #   #  ####
+#      ##  ##  #  ##  #     #
+#     # # # #  # # # #     ###
+#    #  ##  #  ##  ##        #
+#   #   #   #  #   #     ####
+#
+# Python-based Tool for interaction with the 10micron mounts
+# GUI with PyQT5 for python
+# Python  v3.6.4
+#
+# Michael Würtenberger
+# (c) 2016, 2017, 2018
+#
+# Licence APL2.0
+#
+###########################################################
+import logging
+import threading
+import time
+import indi.indi_xml as indiXML
+
+
+class PropertyStore:
+    logger = logging.getLogger(__name__)
+
+    # store of the INDI properties as devices[device][vector][element]. the values are parsed once when they are
+    # received: numbers to float, switches to bool, lights and texts stay strings, as do the attributes state, perm
+    # and timeout. a vector is replaced as a whole with every update and never changed afterwards, so readers get
+    # consistent snapshots without locking. writers of a device are serialized by a lock per device.
+    # every update counts up the version of the vector and wakes up the consumers waiting for this vector and its
+    # subscribers only. versions, subscribers and conditions are guarded by one lock
+    NUMBER_TYPES = (indiXML.DefNumber, indiXML.OneNumber)
+    SWITCH_TYPES = (indiXML.DefSwitch, indiXML.OneSwitch)
+
+    def __init__(self):
+        self.devices = dict()
+        self.versions = dict()
+        self.deviceLocks = dict()
+        self.subscribers = dict()
+        self.lock = threading.Lock()
+        # condition per (device, vector), made when the first consumer waits for it
+        self.conditions = dict()
+
+    @staticmethod
+    def parseNumber(value):
+        # INDI numbers could be sexagesimal
+        try:
+            return float(value)
+        except ValueError:
+            pass
+        try:
+            parts = [float(part) for part in value.replace(' ', ':').split(':') if part != '']
+            sign = -1 if value.strip().startswith('-') else 1
+            return sign * sum(abs(part) / 60 ** i for i, part in enumerate(parts))
+        except ValueError:
+            return 0.0
+
+    def parseValue(self, element):
+        if isinstance(element, self.NUMBER_TYPES):
+            return self.parseNumber(element.getValue())
+        elif isinstance(element, self.SWITCH_TYPES):
+            return element.getValue() == 'On'
+        else:
+            return element.getValue()
+
+    def getDeviceLock(self, device):
+        with self.lock:
+            if device not in self.deviceLocks:
+                self.deviceLocks[device] = threading.Lock()
+            return self.deviceLocks[device]
+
+    def hasDevice(self, device):
+        return device in self.devices
+
+    def getVector(self, device, vector):
+        # snapshot of the vector or an empty dict
+        return self.devices.get(device, {}).get(vector, {})
+
+    def getValue(self, device, vector, element, default=None):
+        return self.getVector(device, vector).get(element, default)
+
+    def getVersion(self, device, vector):
+        with self.lock:
+            return self.versions.get((device, vector), 0)
+
+    def countVersion(self, device, vector):
+        with self.lock:
+            self.versions[(device, vector)] = self.versions.get((device, vector), 0) + 1
+
+    def getInterface(self, device):
+        # the driver interface is a text, which is parsed only once per change
+        return self.getVector(device, 'DRIVER_INFO').get('Interface')
+
+    def update(self, device, message, isDefinition):
+        # message is a def or set vector from the indi client. returns true for a new device
+        if 'name' not in message.attr:
+            return False
+        name = message.attr['name']
+        isNewDevice = False
+        with self.getDeviceLock(device):
+            if device not in self.devices:
+                self.devices[device] = dict()
+                isNewDevice = True
+            if name not in self.devices[device] and not isDefinition:
+                self.logger.warning('SetVector before DefVector in INDI protocol, device: {0}, vector: {1}'.format(device, name))
+            vector = dict(self.devices[device].get(name, {}))
+            for key in ['state', 'perm', 'timeout']:
+                if key in message.attr and (isDefinition or key != 'perm'):
+                    vector[key] = message.attr[key]
+            for element in message.elt_list:
+                if isinstance(element, indiXML.DefBLOB):
+                    vector[element.attr['name']] = ''
+                else:
+                    vector[element.attr['name']] = self.parseValue(element)
+            if name == 'DRIVER_INFO' and 'DRIVER_INTERFACE' in vector:
+                try:
+                    vector['Interface'] = int(vector['DRIVER_INTERFACE'])
+                except ValueError:
+                    vector['Interface'] = 0
+            self.devices[device][name] = vector
+            self.countVersion(device, name)
+        self.notify(device, name)
+        return isNewDevice
+
+    def delete(self, device, name):
+        with self.getDeviceLock(device):
+            if device in self.devices and name in self.devices[device]:
+                del self.devices[device][name]
+                self.countVersion(device, name)
+        self.notify(device, name)
+
+    def clear(self):
+        # the dict is cleared in place, as the client shares it as data['Device']
+        keys = list()
+        with self.lock:
+            for device in list(self.devices):
+                for name in self.devices[device]:
+                    self.versions[(device, name)] = self.versions.get((device, name), 0) + 1
+                    keys.append((device, name))
+            self.devices.clear()
+        for device, name in keys:
+            self.notify(device, name)
+
+    def subscribe(self, device, vector, callback):
+        # the callback is called with device and vector name in the thread of the indi client
+        with self.lock:
+            self.subscribers.setdefault((device, vector), []).append(callback)
+
+    def unsubscribe(self, device, vector, callback):
+        with self.lock:
+            if callback in self.subscribers.get((device, vector), []):
+                self.subscribers[(device, vector)].remove(callback)
+
+    def notify(self, device, vector):
+        with self.lock:
+            condition = self.conditions.get((device, vector))
+            callbacks = list(self.subscribers.get((device, vector), []))
+        if condition:
+            with condition:
+                condition.notify_all()
+        for callback in callbacks:
+            try:
+                callback(device, vector)
+            except Exception as e:
+                self.logger.error('Subscriber of {0}.{1} failed, error: {2}'.format(device, vector, e))
+
+    def waitChange(self, device, vector, version, timeout):
+        # waits until the vector has a newer version than the given one or the timeout is over, returns the version
+        with self.lock:
+            if (device, vector) not in self.conditions:
+                self.conditions[(device, vector)] = threading.Condition()
+            condition = self.conditions[(device, vector)]
+        with condition:
+            condition.wait_for(lambda: self.getVersion(device, vector) != version, timeout)
+        return self.getVersion(device, vector)
+
+    def waitVector(self, device, vector, timeout):
+        # waits until the vector is defined, returns true if it is there
+        timeEnd = time.time() + timeout
+        version = self.getVersion(device, vector)
+        while not self.getVector(device, vector):
+            if time.time() >= timeEnd:
+                return False
+            version = self.waitChange(device, vector, version, timeEnd - time.time())
+        return True
@@ -302,14 +302,32 @@ class OneSwitch(INDIElement):
 
 class OneBLOB(INDIElement):
     def __init__(self, etype, value, attr_dict, etree):
-        INDIElement.__init__(self, etype, None, attr_dict, etree)
-
         #
-        # Convert value to bytes from base64 if this object
-        # was created from XML from the indi server.
+        # If this object was created from XML from the indi server,
+        # the base64 text is kept and taken from the tree, so there
+        # is no further copy of a large payload. The whole text stays
+        # in memory until it is written. It is converted to bytes
+        # with the first getValue, which is normally done in a worker
+        # and not in the thread of the indi client.
         #
         if etree is not None:
-            self.value = base64.standard_b64decode(self.value)
+            INDIBase.__init__(self, etype, None, attr_dict, etree)
+            self.value = None
+            self.text = etree.text or ''
+            etree.text = None
+        else:
+            INDIElement.__init__(self, etype, None, attr_dict, etree)
+            self.text = None
+
+    def getText(self):
+        return self.text
+
+    def getValue(self):
+        # the decoder skips whitespace, so the text is not stripped before
+        if self.value is None and self.text is not None:
+            self.value = base64.b64decode(self.text)
+            self.text = None
+        return self.value
 
     def __str__(self):
         return INDIBase.__str__(self) + "\n    " + self.attr["size"] + "\n    " + self.attr["format"] + "\n"
@@ -23,12 +23,15 @@ import shutil
 import datetime
 import time
 import math
+import os
+import threading
 import PyQt5
 import indi.indi_xml as indiXML
 from analyse import analysedata
 from modeling import model_points
+from modeling import model_timing
+from modeling import model_journal
 from queue import Queue
-from astrometry import transform
 import astropy.io.fits as pyfits
 
 
@@ -39,7 +42,6 @@ class Slewpoint(PyQt5.QtCore.QObject):
     signalStartSlewing = PyQt5.QtCore.pyqtSignal()
     signalPointImaged = PyQt5.QtCore.pyqtSignal(float, float)
 
-    CYCLE = 250
     signalDestruct = PyQt5.QtCore.pyqtSignal()
 
     def __init__(self, main, thread):
@@ -50,13 +52,14 @@ class Slewpoint(PyQt5.QtCore.QObject):
         self.mutexTakeNextPoint = PyQt5.QtCore.QMutex()
         self.isRunning = True
         self.takeNextPoint = False
-        self.cycleTimer = None
-        self.signalStartSlewing.connect(self.startSlewing)
 
     def startSlewing(self):
+        # the stages are chained by signals: the next point is taken, as soon as the image of the last one is
+        # integrated or the points are queued at the start
         self.mutexTakeNextPoint.lock()
         self.takeNextPoint = True
         self.mutexTakeNextPoint.unlock()
+        self.doCommand()
 
     def run(self):
         self.logger.info('model build slewpoint started')
@@ -65,10 +68,7 @@ class Slewpoint(PyQt5.QtCore.QObject):
             self.isRunning = True
         self.mutexIsRunning.unlock()
         self.signalDestruct.connect(self.destruct, type=PyQt5.QtCore.Qt.BlockingQueuedConnection)
-        self.cycleTimer = PyQt5.QtCore.QTimer(self)
-        self.cycleTimer.setSingleShot(False)
-        self.cycleTimer.timeout.connect(self.doCommand)
-        self.cycleTimer.start(self.CYCLE)
+        self.signalStartSlewing.connect(self.startSlewing)
 
     def stop(self):
         self.mutexIsRunning.lock()
@@ -82,7 +82,7 @@ class Slewpoint(PyQt5.QtCore.QObject):
 
     @PyQt5.QtCore.pyqtSlot()
     def destruct(self):
-        self.cycleTimer.stop()
+        self.signalStartSlewing.disconnect(self.startSlewing)
         self.signalDestruct.disconnect(self.destruct)
 
     def doCommand(self):
@@ -93,11 +93,17 @@ class Slewpoint(PyQt5.QtCore.QObject):
             modelingData = self.queuePoint.get()
             self.main.app.messageQueue.put('#BGSlewing to point {0:2d}  @ Az: {1:3.0f}\xb0 Alt: {2:2.0f}\xb0\n'.format(modelingData['Index'] + 1, modelingData['Azimuth'], modelingData['Altitude']))
             self.logger.info('Slewing to point {0:2d}  @ Az: {1:3.0f}\xb0 Alt: {2:2.0f}\xb0'.format(modelingData['Index'] + 1, modelingData['Azimuth'], modelingData['Altitude']))
+            modelingData['TimeSlewStart'] = time.time()
+            self.main.setPointSlewing(modelingData)
             self.main.slewMountDome(modelingData)
-            self.main.app.messageQueue.put('\tWait mount settling / delay time:  {0:02d} sec\n'.format(modelingData['SettlingTime']))
-            self.main.app.messageQueue.put('Slewed>{0:02d}'.format(modelingData['Index'] + 1))
-            time.sleep(modelingData['SettlingTime'])
+            modelingData['TimeSlewEnd'] = time.time()
+            self.main.app.messageQueue.put('\tWait mount settling / max delay time:  {0:02d} sec\n'.format(modelingData['SettlingTime']))
+            modelingData['SettleTime'] = self.main.waitMountSettled(modelingData)
+            modelingData['TimeSettleEnd'] = time.time()
+            self.main.app.messageQueue.put('\tMount settled after {0:3.1f} sec\n'.format(modelingData['SettleTime']))
+            self.main.app.messageQueue.put('Slewed>{0:02d}'.format(modelingData['Sequence'] + 1))
             self.main.workerImage.queueImage.put(copy.copy(modelingData))
+            self.main.workerImage.signalProcess.emit()
             # make signal for hemisphere that point is imaged
             self.signalPointImaged.emit(modelingData['Azimuth'], modelingData['Altitude'])
             # if I have flexure or hysterese, I wait for the next point to slew
@@ -116,8 +122,9 @@ class Image(PyQt5.QtCore.QObject):
 
     queueImage = Queue()
     signalImaging = PyQt5.QtCore.pyqtSignal()
+    # emitted with every point put to the queue
+    signalProcess = PyQt5.QtCore.pyqtSignal()
 
-    CYCLE = 250
     signalDestruct = PyQt5.QtCore.pyqtSignal()
 
     def __init__(self, main, thread):
@@ -125,24 +132,18 @@ class Image(PyQt5.QtCore.QObject):
         self.main = main
         self.thread = thread
         self.isRunning = True
-        self.imageIntegrated = False
-        self.imageSaved = False
-        self.cycleTimer = None
+        # the events are set directly from the imaging thread, because this thread waits for them
+        self.imageIntegrated = threading.Event()
+        self.imageSaved = threading.Event()
         self.mutexIsRunning = PyQt5.QtCore.QMutex()
-        self.mutexImageIntegrated = PyQt5.QtCore.QMutex()
-        self.mutexImageSaved = PyQt5.QtCore.QMutex()
-        self.main.app.workerImaging.imageIntegrated.connect(self.setImageIntegrated)
-        self.main.app.workerImaging.imageSaved.connect(self.setImageSaved)
+        self.main.app.workerImaging.imageIntegrated.connect(self.setImageIntegrated, type=PyQt5.QtCore.Qt.DirectConnection)
+        self.main.app.workerImaging.imageSaved.connect(self.setImageSaved, type=PyQt5.QtCore.Qt.DirectConnection)
 
     def setImageIntegrated(self):
-        self.mutexImageIntegrated.lock()
-        self.imageIntegrated = True
-        self.mutexImageIntegrated.unlock()
+        self.imageIntegrated.set()
 
     def setImageSaved(self):
-        self.mutexImageSaved.lock()
-        self.imageSaved = True
-        self.mutexImageSaved.unlock()
+        self.imageSaved.set()
 
     def run(self):
         self.logger.info('model build imaging started')
@@ -151,10 +152,7 @@ class Image(PyQt5.QtCore.QObject):
             self.isRunning = True
         self.mutexIsRunning.unlock()
         self.signalDestruct.connect(self.destruct, type=PyQt5.QtCore.Qt.BlockingQueuedConnection)
-        self.cycleTimer = PyQt5.QtCore.QTimer(self)
-        self.cycleTimer.setSingleShot(False)
-        self.cycleTimer.timeout.connect(self.doCommand)
-        self.cycleTimer.start(self.CYCLE)
+        self.signalProcess.connect(self.doCommand)
 
     def stop(self):
         self.mutexIsRunning.lock()
@@ -169,45 +167,51 @@ class Image(PyQt5.QtCore.QObject):
 
     @PyQt5.QtCore.pyqtSlot()
     def destruct(self):
-        self.cycleTimer.stop()
+        self.signalProcess.disconnect(self.doCommand)
         self.signalDestruct.disconnect(self.destruct)
 
+    def waitEvent(self, event):
+        # returns false, if modeling was cancelled
+        while not event.wait(self.main.SLEW_WAIT):
+            if self.main.cancel:
+                return False
+        return True
+
     def doCommand(self):
         if not self.queueImage.empty():
             modelingData = self.queueImage.get()
-            self.mutexImageSaved.lock()
-            self.imageSaved = False
-            self.mutexImageSaved.unlock()
-            self.mutexImageIntegrated.lock()
-            self.imageIntegrated = False
-            self.mutexImageIntegrated.unlock()
+            self.imageSaved.clear()
+            self.imageIntegrated.clear()
             modelingData['File'] = 'Model_Image_' + '{0:03d}'.format(modelingData['Index']) + '.fit'
             modelingData['Imagepath'] = ''
             self.main.app.messageQueue.put('\tCapturing image for model point {0:2d}\n'.format(modelingData['Index'] + 1))
             self.logger.info('Capturing image for model point {0:2d}'.format(modelingData['Index'] + 1))
             # getting next image
+            modelingData['TimeExposureStart'] = time.time()
             self.main.app.workerImaging.imagingCommandQueue.put(modelingData)
             # wait for imaging ready
-            while not self.imageIntegrated and not self.main.cancel:
-                time.sleep(0.1)
-                PyQt5.QtWidgets.QApplication.processEvents()
+            self.waitEvent(self.imageIntegrated)
+            modelingData['TimeExposureEnd'] = time.time()
             # next point after integrating but during downloading if possible or after IDLE
             self.main.workerSlewpoint.signalStartSlewing.emit()
             # we have to wait until image is downloaded before being able to plate solve
-            while not self.imageSaved and not self.main.cancel:
-                time.sleep(0.1)
-                PyQt5.QtWidgets.QApplication.processEvents()
-            self.main.app.messageQueue.put('Imaged>{0:02d}'.format(modelingData['Index'] + 1))
+            self.waitEvent(self.imageSaved)
+            modelingData['TimeDownloadEnd'] = time.time()
+            if modelingData['Imagepath'] != '':
+                self.main.modelJournal.addImaged(modelingData)
+            self.main.app.messageQueue.put('Imaged>{0:02d}'.format(modelingData['Sequence'] + 1))
             self.logger.info('Imaged {0:02d}'.format(modelingData['Index'] + 1))
             self.main.workerPlatesolve.queuePlatesolve.put(copy.copy(modelingData))
+            self.main.workerPlatesolve.signalProcess.emit()
 
 
 class Platesolve(PyQt5.QtCore.QObject):
     logger = logging.getLogger(__name__)
 
     queuePlatesolve = Queue()
+    # emitted with every point put to the queue
+    signalProcess = PyQt5.QtCore.pyqtSignal()
 
-    CYCLE = 250
     signalDestruct = PyQt5.QtCore.pyqtSignal()
 
     def __init__(self, main, thread):
@@ -215,16 +219,13 @@ class Platesolve(PyQt5.QtCore.QObject):
         self.main = main
         self.thread = thread
         self.mutexIsRunning = PyQt5.QtCore.QMutex()
-        self.mutexImageDataDownloaded = PyQt5.QtCore.QMutex()
         self.isRunning = True
-        self.cycleTimer = None
-        self.imageDataDownloaded = False
-        self.main.app.workerAstrometry.imageDataDownloaded.connect(self.setImageDataDownloaded)
+        # the event is set directly from the astrometry thread, because this thread waits for it
+        self.imageDataDownloaded = threading.Event()
+        self.main.app.workerAstrometry.imageDataDownloaded.connect(self.setImageDataDownloaded, type=PyQt5.QtCore.Qt.DirectConnection)
 
     def setImageDataDownloaded(self):
-        self.mutexImageDataDownloaded.lock()
-        self.imageDataDownloaded = True
-        self.mutexImageDataDownloaded.unlock()
+        self.imageDataDownloaded.set()
 
     def run(self):
         self.logger.info('model build solving started')
@@ -233,10 +234,7 @@ class Platesolve(PyQt5.QtCore.QObject):
             self.isRunning = True
         self.mutexIsRunning.unlock()
         self.signalDestruct.connect(self.destruct, type=PyQt5.QtCore.Qt.BlockingQueuedConnection)
-        self.cycleTimer = PyQt5.QtCore.QTimer(self)
-        self.cycleTimer.setSingleShot(False)
-        self.cycleTimer.timeout.connect(self.doCommand)
-        self.cycleTimer.start(self.CYCLE)
+        self.signalProcess.connect(self.doCommand)
 
     def stop(self):
         self.mutexIsRunning.lock()
@@ -250,23 +248,23 @@ class Platesolve(PyQt5.QtCore.QObject):
 
     @PyQt5.QtCore.pyqtSlot()
     def destruct(self):
-        self.cycleTimer.stop()
+        self.signalProcess.disconnect(self.doCommand)
         self.signalDestruct.disconnect(self.destruct)
 
     def doCommand(self):
         if not self.queuePlatesolve.empty():
-            self.mutexImageDataDownloaded.lock()
-            self.imageDataDownloaded = False
-            self.mutexImageDataDownloaded.unlock()
+            self.imageDataDownloaded.clear()
             modelingData = self.queuePlatesolve.get()
             if modelingData['Imagepath'] != '':
                 self.main.app.messageQueue.put('\tSolving image for model point {0}\n'.format(modelingData['Index'] + 1))
                 self.logger.info('Solving image for model point {0}'.format(modelingData['Index'] + 1))
+                modelingData['TimeSolveSubmit'] = time.time()
                 self.main.app.workerAstrometry.astrometryCommandQueue.put(modelingData)
                 # wait for solving ready
-                while not self.imageDataDownloaded and not self.main.cancel:
-                    time.sleep(0.1)
-                    PyQt5.QtWidgets.QApplication.processEvents()
+                while not self.imageDataDownloaded.wait(self.main.SLEW_WAIT):
+                    if self.main.cancel:
+                        break
+                modelingData['TimeSolveEnd'] = time.time()
                 if modelingData.get('Solved', False):
                     ra_sol_Jnow, dec_sol_Jnow = self.main.transform.transformERFA(modelingData['RaJ2000Solved'], modelingData['DecJ2000Solved'], 3)
                     modelingData['RaJNowSolved'] = ra_sol_Jnow
@@ -278,6 +276,8 @@ class Platesolve(PyQt5.QtCore.QObject):
                     self.main.app.messageQueue.put('\tImage path: {0}\n'.format(modelingData['Imagepath']))
                     self.main.app.messageQueue.put('\tRA_diff:  {0:2.1f}    DEC_diff: {1:2.1f}\n'.format(modelingData['RaError'], modelingData['DecError']))
                     self.logger.info('RA_diff:  {0:2.1f}    DEC_diff: {1:2.1f}, image path: {2}'.format(modelingData['RaError'], modelingData['DecError'], modelingData['Imagepath']))
+                    modelingData['TimeAccepted'] = time.time()
+                    self.main.modelJournal.addSolved(modelingData)
                     self.main.solvedPointsQueue.put(copy.copy(modelingData))
                 else:
                     if 'Message' in modelingData:
@@ -286,35 +286,45 @@ class Platesolve(PyQt5.QtCore.QObject):
                     else:
                         self.main.app.messageQueue.put('\tSolving canceled\n')
                         self.logger.warning('Solving canceled')
+            self.main.modelTiming.addPoint(modelingData)
+            # points are counted, because a resumed run solves the images of the former run first
+            self.main.numberProcessedPoints += 1
             # write progress to hemisphere windows
-            self.main.app.messageQueue.put('Solved>{0:02d}'.format(modelingData['Index'] + 1))
-            # write progress estimation to main gui
-            modelingDone = (modelingData['Index'] + 1) / modelingData['NumberPoints']
-            timeElapsed = time.time() - self.main.timeStart
-            if modelingDone != 0:
-                timeEstimation = (1 / modelingDone * timeElapsed) * (1 - modelingDone)
-            else:
-                timeEstimation = 0
+            self.main.app.messageQueue.put('Solved>{0:02d}'.format(self.main.numberProcessedPoints))
+            # write progress to main gui, the time estimation is done in the main loop of the run
+            modelingDone = self.main.numberProcessedPoints / modelingData['NumberPoints']
             self.main.app.messageQueue.put('percent{0:4.3f}'.format(modelingDone))
-            self.main.app.messageQueue.put('timeEst{0}'.format(time.strftime('%M:%S', time.gmtime(timeEstimation))))
-            finished = datetime.timedelta(seconds=timeEstimation) + datetime.datetime.now()
-            self.main.app.messageQueue.put('timeFin{0}'.format(finished.strftime('%H:%M:%S')))
             # we come to an end
-            if modelingData['NumberPoints'] == modelingData['Index'] + 1:
-                self.main.modelingHasFinished = True
+            if self.main.numberProcessedPoints == modelingData['NumberPoints']:
+                self.main.modelingFinished.set()
 
 
 class ModelingBuild:
     logger = logging.getLogger(__name__)
 
+    # the slew finished events are set by signal, the timeout is only for checking cancel
+    SLEW_WAIT = 0.2
+    # update cycle of the elapsed time in the gui while modeling
+    ELAPSED_UPDATE = 1.0
+    # default for the settle detection: position stable within tolerance in arcsec for the stable time in seconds
+    SETTLE_TOLERANCE = 10.0
+    SETTLE_STABLE_TIME = 1.0
+    # estimation of the image download and solve time in seconds, as long as there are no measured stage times
+    DOWNLOAD_TIME = 5.0
+    SOLVE_TIME = 10.0
+    # number of the latest analyse data files, which are taken as history for the time estimation
+    HISTORY_FILES = 5
+
     def __init__(self, app):
         # make environment available to class
         self.app = app
 
         # assign support classes
         self.analyseData = analysedata.Analyse(self.app)
-        self.transform = transform.Transform(self.app)
+        self.transform = self.app.transform
         self.modelPoints = model_points.ModelPoints(self.app)
+        self.modelTiming = model_timing.ModelTiming()
+        self.modelJournal = model_journal.ModelJournal()
 
         # initialize the parallel thread modeling parts
         self.threadSlewpoint = PyQt5.QtCore.QThread()
@@ -339,42 +349,74 @@ class ModelingBuild:
         self.modelingResultData = []
         self.modelAlignmentData = []
         self.modelRun = False
-        self.modelingHasFinished = False
+        self.modelingFinished = threading.Event()
         self.numberPointsMax = 0
         self.numberSolvedPoints = 0
+        self.numberProcessedPoints = 0
         self.cancel = False
-        self.imageReady = False
-        self.solveReady = False
-        self.mountSlewFinished = False
-        self.domeSlewFinished = False
+        self.imageReady = threading.Event()
+        self.solveReady = threading.Event()
+        self.mountSlewFinished = threading.Event()
+        self.domeSlewFinished = threading.Event()
+        self.mountSettled = threading.Event()
+        self.settleTolerance = self.SETTLE_TOLERANCE
+        self.settleStableTime = self.SETTLE_STABLE_TIME
+        # state for the time estimation: predicted slew times of the run, point actually slewing and its start
+        self.predictedSlewTimes = []
+        self.indexSlewing = -1
+        self.timeSlewing = 0
+        self.timeEstimated = '--:--'
+        self.timeFinished = '--:--:--'
 
         # signal slot
         self.app.workerMountDispatcher.signalSlewFinished.connect(self.setMountSlewFinished)
+        self.app.workerMountDispatcher.signalMountSettled.connect(self.setMountSettled)
         self.app.workerDome.signalSlewFinished.connect(self.setDomeSlewFinished)
-        self.app.workerImaging.imageSaved.connect(self.setImageReady)
-        self.app.workerAstrometry.imageDataDownloaded.connect(self.setSolveReady)
+        self.app.workerImaging.imageSaved.connect(self.setImageReady, type=PyQt5.QtCore.Qt.DirectConnection)
+        self.app.workerAstrometry.imageDataDownloaded.connect(self.setSolveReady, type=PyQt5.QtCore.Qt.DirectConnection)
 
     def initConfig(self):
         self.modelPoints.initConfig()
+        # settle detection parameters are only in the config file, there is no gui for them:
+        #   SettleTolerance:  the position has to be stable within this tolerance in arcsec, default 10.0
+        #   SettleStableTime: for this time in seconds, default 1.0
+        # the settle time in the gui (config key SettlingTime) stays the upper bound for the wait
+        try:
+            if 'SettleTolerance' in self.app.config and float(self.app.config['SettleTolerance']) > 0:
+                self.settleTolerance = float(self.app.config['SettleTolerance'])
+            if 'SettleStableTime' in self.app.config and float(self.app.config['SettleStableTime']) > 0:
+                self.settleStableTime = float(self.app.config['SettleStableTime'])
+        except Exception as e:
+            self.logger.error('item in config.cfg could not be initialize, error:{0}'.format(e))
+        finally:
+            pass
 
     def storeConfig(self):
         self.modelPoints.storeConfig()
+        self.app.config['SettleTolerance'] = self.settleTolerance
+        self.app.config['SettleStableTime'] = self.settleStableTime
 
     def setCancel(self):
         self.cancel = True
+        # wakes up the main loop of the model run
+        self.modelingFinished.set()
 
     def setImageReady(self):
-        self.imageReady = True
+        self.imageReady.set()
 
     def setSolveReady(self):
-        self.solveReady = True
+        self.solveReady.set()
 
     def setMountSlewFinished(self):
         self.logger.debug('signal slew mount finished')
-        self.mountSlewFinished = True
+        self.mountSlewFinished.set()
+
+    def setMountSettled(self, settleTime):
+        self.logger.debug('signal mount settled after {0:4.2f} s'.format(settleTime))
+        self.mountSettled.set()
 
     def setDomeSlewFinished(self):
-        self.domeSlewFinished = True
+        self.domeSlewFinished.set()
         self.logger.debug('signal slew dome finished')
 
     def clearAlignmentModel(self):
@@ -388,8 +430,10 @@ class ModelingBuild:
         self.logger.debug(modelingData)
         altitude = modelingData['Altitude']
         azimuth = modelingData['Azimuth']
-        self.mountSlewFinished = False
-        self.domeSlewFinished = False
+        self.mountSlewFinished.clear()
+        self.domeSlewFinished.clear()
+        self.mountSettled.clear()
+        self.app.workerMountDispatcher.workerMountStatusRunnerFast.setSettleParameters(self.settleTolerance, self.settleStableTime)
         # limit azimuth and altitude
         if azimuth >= 360:
             azimuth = 359.9
@@ -404,20 +448,79 @@ class ModelingBuild:
         if modelingData['DomeIsConnected']:
             self.app.domeCommandQueue.put(('SlewAzimuth', azimuth))
             self.logger.debug('start slewing dome')
-            while not self.domeSlewFinished or not self.mountSlewFinished:
+            while not (self.mountSlewFinished.wait(self.SLEW_WAIT) and self.domeSlewFinished.wait(self.SLEW_WAIT)):
                 if self.cancel:
                     self.logger.info('Modeling cancelled in loop mount and dome wait while for stop slewing')
                     break
-                time.sleep(0.2)
             self.logger.debug('slews finished, move on')
         else:
-            while not self.mountSlewFinished:
+            while not self.mountSlewFinished.wait(self.SLEW_WAIT):
                 if self.cancel:
                     self.logger.info('Modeling cancelled in loop mount wait while for stop slewing')
                     break
-                time.sleep(0.2)
             self.logger.debug('slews finished, move on')
 
+    def waitMountSettled(self, modelingData):
+        # the settling time of the user is the upper bound, the fast status tells, when the position is stable
+        timeStart = time.time()
+        while not self.mountSettled.wait(self.SLEW_WAIT):
+            if self.cancel:
+                self.logger.info('Modeling cancelled in loop mount wait while for settling')
+                break
+            if time.time() - timeStart >= modelingData['SettlingTime']:
+                self.logger.info('Mount not settled within settling time {0} s'.format(modelingData['SettlingTime']))
+                break
+        settleTime = time.time() - timeStart
+        self.logger.info('Point {0:2d} settle time {1:4.2f} s'.format(modelingData['Index'] + 1, settleTime))
+        return settleTime
+
+    def setPointSlewing(self, modelingData):
+        self.timeSlewing = modelingData['TimeSlewStart']
+        self.indexSlewing = modelingData['Sequence']
+
+    def getStageDefaults(self):
+        return {'SlewRatio': 1.0,
+                'Settle': float(self.app.ui.settlingTime.value()),
+                'Exposure': float(self.app.ui.cameraExposure.value()),
+                'Download': self.DOWNLOAD_TIME,
+                'Solve': self.SOLVE_TIME}
+
+    def getTimePerPoint(self):
+        # time of a point without the slew: settling, imaging and download
+        estimates = self.modelTiming.getStageEstimates(self.getStageDefaults())
+        return estimates['Settle'] + estimates['Exposure'] + estimates['Download']
+
+    def loadTimingHistory(self):
+        # the latest analyse data files are the history of the stage times
+        directory = os.getcwd() + self.analyseData.filepath
+        try:
+            filenames = sorted([filename for filename in os.listdir(directory) if filename.endswith('.dat')],
+                               key=lambda filename: os.path.getmtime(directory + '/' + filename),
+                               reverse=True)
+        except Exception as e:
+            self.logger.error('analyse data directory {0} could not be read, error: {1}'.format(directory, e))
+            return
+        dataList = list()
+        for filename in filenames[:self.HISTORY_FILES]:
+            try:
+                data = self.analyseData.loadDataRaw(filename[:-4])
+            except Exception as e:
+                self.logger.warning('analyse data file {0} could not be loaded, error: {1}'.format(filename, e))
+                continue
+            if isinstance(data, dict):
+                dataList.append(data)
+        self.modelTiming.setHistory(dataList)
+
+    def updateTimeEstimation(self, messageQueue):
+        timeNow = time.time()
+        timeRemaining = self.modelTiming.getTimeRemaining(self.predictedSlewTimes, self.indexSlewing,
+                                                          timeNow - self.timeSlewing, self.getStageDefaults())
+        timeFinished = self.modelTiming.getTimeFinished(timeNow, timeRemaining)
+        self.timeEstimated = time.strftime('%M:%S', time.gmtime(max(0.0, timeFinished - timeNow)))
+        self.timeFinished = datetime.datetime.fromtimestamp(timeFinished).strftime('%H:%M:%S')
+        messageQueue.put('timeEst{0}'.format(self.timeEstimated))
+        messageQueue.put('timeFin{0}'.format(self.timeFinished))
+
     def runModelCore(self, messageQueue, runPoints, modelingData):
         self.app.imageWindow.signalSetManualEnable.emit(False)
         # start clearing the data
@@ -430,6 +533,8 @@ class ModelingBuild:
         messageQueue.put('timeEla--:--')
         messageQueue.put('timeEst--:--')
         messageQueue.put('timeFin--:--:--')
+        self.timeEstimated = '--:--'
+        self.timeFinished = '--:--:--'
         self.logger.info('modelingData: {0}'.format(modelingData))
         # start tracking
         self.app.mountCommandQueue.put(':PO#')
@@ -446,49 +551,81 @@ class ModelingBuild:
         # wait until threads started
         while not self.workerImage.isRunning and not self.workerPlatesolve.isRunning and not self.workerSlewpoint.isRunning:
             time.sleep(0.2)
-        if len(runPoints) > 100:
+        # the stage times of former runs are the base for the time estimation
+        self.modelTiming.clear()
+        self.loadTimingHistory()
+        # a run with the same point set resumes the journal of the former run: solved points are taken as they
+        # are, images, which are not solved, are solved again and only the other points are slewed to and imaged
+        if self.modelJournal.open(runPoints, modelingData):
+            messageQueue.put('#BGResumed model run in directory {0}: {1} points recovered, {2} solved, {3} images to solve\n'.format(modelingData['Directory'], len(self.modelJournal.solved) + len(self.modelJournal.imaged), len(self.modelJournal.solved), len(self.modelJournal.imaged)))
+        pendingPoints = [i for i in range(0, len(runPoints)) if i not in self.modelJournal.solved and i not in self.modelJournal.imaged]
+        # points following a target are placed, where the target is, when they are imaged
+        runPoints = self.modelPoints.schedulePoints([runPoints[i] for i in pendingPoints], self.getTimePerPoint(), self.app.ui.checkSortPoints.isChecked(), withIndex=True)
+        numberPointsFree = 100 - len(self.modelJournal.solved) - len(self.modelJournal.imaged)
+        if len(runPoints) > numberPointsFree:
             messageQueue.put('#BYMore than 100 points defined, using only first 100 points for model build\n')
             messageQueue.put('ToModel>{0:02d}'.format(100))
-        # loading the points to the queue, but only the first 100, because mount computer does only allow 100 points
-        for i, (p_az, p_alt) in enumerate(runPoints[:100]):
-            modelingData['Index'] = i
+        # only the first 100, because mount computer does only allow 100 points
+        runPoints = runPoints[:numberPointsFree]
+        modelOrder, start, startSide, meridianLimitGuide = self.modelPoints.getModelOrder()
+        self.predictedSlewTimes = modelOrder.getSlewTimes(runPoints, start, startSide).tolist()
+        self.indexSlewing = -1
+        self.numberProcessedPoints = 0
+        self.modelingFinished.clear()
+        for data in self.modelJournal.solved.values():
+            self.solvedPointsQueue.put(data)
+        # loading the points to the queue
+        numberPoints = len(runPoints) + len(self.modelJournal.imaged)
+        for i, (p_az, p_alt, index) in enumerate(runPoints):
+            modelingData['Index'] = self.modelJournal.nextIndex + i
+            modelingData['Sequence'] = i
+            modelingData['PointIndex'] = pendingPoints[index]
             modelingData['Azimuth'] = p_az
             modelingData['Altitude'] = p_alt
-            modelingData['NumberPoints'] = len(runPoints)
+            modelingData['NumberPoints'] = numberPoints
+            modelingData['TimeQueued'] = time.time()
+            modelingData['PredictedSlewTime'] = self.predictedSlewTimes[i]
             # has to be a copy, otherwise we have always the same content because it will be overwritten
             self.workerSlewpoint.queuePoint.put(copy.copy(modelingData))
         # start process
-        self.modelingHasFinished = False
         self.timeStart = time.time()
+        for data in self.modelJournal.imaged.values():
+            data['NumberPoints'] = numberPoints
+            self.workerPlatesolve.queuePlatesolve.put(data)
+            self.workerPlatesolve.signalProcess.emit()
         self.workerSlewpoint.signalStartSlewing.emit()
-        while self.modelRun:
-            # stop loop if modeling is cancelled from external
-            if self.cancel:
-                self.app.workerAstrometry.astrometryCancel.emit()
-                self.app.workerImaging.imagingCancel.emit()
-                break
-            # stop loop if finished
-            if self.modelingHasFinished:
-                break
+        if numberPoints == 0:
+            self.modelingFinished.set()
+        # the stages work on their own, here only the elapsed time is shown until finished or cancelled
+        while not self.modelingFinished.wait(self.ELAPSED_UPDATE):
             timeElapsed = time.time() - self.timeStart
             messageQueue.put('timeEla{0}'.format(time.strftime('%M:%S', time.gmtime(timeElapsed))))
-            time.sleep(0.2)
-            PyQt5.QtWidgets.QApplication.processEvents()
+            self.updateTimeEstimation(messageQueue)
+        if self.cancel:
+            self.app.workerAstrometry.astrometryCancel.emit()
+            self.app.workerImaging.imagingCancel.emit()
         if self.cancel:
             # clearing the gui
             messageQueue.put('percent0')
             messageQueue.put('timeEst--:--')
             self.logger.info('Modeling cancelled in main loop')
+        self.timeEstimated = '--:--'
+        self.timeFinished = '--:--:--'
         self.workerSlewpoint.stop()
         self.workerImage.stop()
         self.workerPlatesolve.stop()
         self.modelRun = False
+        # a cancelled run keeps the journal and the images for resuming
+        self.modelJournal.close(isFinished=not self.cancel)
+        for line in self.modelTiming.getSummaryText(self.modelTiming.getSummary()):
+            self.logger.info(line)
+            messageQueue.put(line + '\n')
         while not self.solvedPointsQueue.empty():
             modelingData = copy.copy(self.solvedPointsQueue.get())
             # clean up intermediate data
             results.append(modelingData)
         if 'KeepImages' and 'BaseDirImages' in modelingData:
-            if not modelingData['KeepImages']:
+            if not modelingData['KeepImages'] and not self.cancel:
                 shutil.rmtree(modelingData['BaseDirImages'], ignore_errors=True)
         # limit number of point to 99:
         results = results[:99]
@@ -659,18 +796,18 @@ class ModelingBuild:
         imageParams['Directory'] = time.strftime('%Y-%m-%d', time.gmtime())
         imageParams['File'] = 'platesolvesync.fit'
         self.app.messageQueue.put('#BWExposing Image: {0} for {1} seconds\n'.format(imageParams['File'], imageParams['Exposure']))
-        self.imageReady = False
+        self.imageReady.clear()
         self.app.workerImaging.imagingCommandQueue.put(imageParams)
-        while not self.imageReady and not self.cancel:
-            time.sleep(0.1)
-            PyQt5.QtWidgets.QApplication.processEvents()
+        while not self.imageReady.wait(self.SLEW_WAIT):
+            if self.cancel:
+                break
         self.app.messageQueue.put('#BWSolving Image: {0}\n'.format(imageParams['Imagepath']))
         # wait for solving
-        self.solveReady = False
+        self.solveReady.clear()
         self.app.workerAstrometry.astrometryCommandQueue.put(imageParams)
-        while not self.solveReady and not self.cancel:
-            time.sleep(0.1)
-            PyQt5.QtWidgets.QApplication.processEvents()
+        while not self.solveReady.wait(self.SLEW_WAIT):
+            if self.cancel:
+                break
         if 'Solved' in imageParams:
             if imageParams['Solved']:
                 self.app.messageQueue.put('#BWSolving result: RA: {0}, DEC: {1}\n'.format(self.transform.decimalToDegree(imageParams['RaJ2000Solved'], False, False),
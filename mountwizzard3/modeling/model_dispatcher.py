@@ -44,7 +44,8 @@ class ModelingDispatcher(PyQt5.QtCore.QObject):
         self.commandDispatcherQueue = queue.Queue()
         self.modelingRunner = model_build.ModelingBuild(self.app)
         # signal for stopping modeling
-        self.signalCancel.connect(self.modelingRunner.setCancel)
+        # the model run blocks this thread, so cancel has to be delivered directly
+        self.signalCancel.connect(self.modelingRunner.setCancel, type=PyQt5.QtCore.Qt.DirectConnection)
 
         # definitions for the command dispatcher. this enables spawning commands from outside into the current thread for running
         self.commandDispatch = {
@@ -103,7 +104,7 @@ class ModelingDispatcher(PyQt5.QtCore.QObject):
                         {
                             'Button': self.app.ui.btn_generateDSOPoints,
                             'Method': self.modelingRunner.modelPoints.generateDSOPoints,
-                            'Parameter': ['self.app.ui.checkSortPoints.isChecked()',
+                            'Parameter': ['self.app.ui.checkDeletePointsHorizonMask.isChecked()',
                                           'int(self.app.ui.numberHoursDSO.value())',
                                           'int(self.app.ui.numberPointsDSO.value())',
                                           'int(self.app.ui.numberHoursPreview.value())'
@@ -147,6 +148,19 @@ class ModelingDispatcher(PyQt5.QtCore.QObject):
                         }
                     ]
                 },
+            'GenerateBudgetPoints':
+                {
+                    'Worker': [
+                        {
+                            'Button': self.app.ui.btn_generateBudgetPoints,
+                            'Method': self.modelingRunner.modelPoints.generateBudgetPoints,
+                            'Parameter': ['self.app.ui.checkDeletePointsHorizonMask.isChecked()',
+                                          'float(self.app.ui.numberMinutesBudget.value()) * 60',
+                                          'self.modelingRunner.getTimePerPoint()'
+                                          ]
+                        }
+                    ]
+                },
             'ShowInitialPoints':
                 {
                     'Worker': [
@@ -217,6 +231,7 @@ class ModelingDispatcher(PyQt5.QtCore.QObject):
         self.app.ui.btn_generateNormalPoints.clicked.connect(lambda: self.commandDispatcherQueue.put('GenerateNormalPoints'))
         self.app.ui.btn_generateMinPoints.clicked.connect(lambda: self.commandDispatcherQueue.put('GenerateMinPoints'))
         self.app.ui.btn_generateGridPoints.clicked.connect(lambda: self.commandDispatcherQueue.put('GenerateGridPoints'))
+        self.app.ui.btn_generateBudgetPoints.clicked.connect(lambda: self.commandDispatcherQueue.put('GenerateBudgetPoints'))
         self.app.ui.numberGridPointsRow.valueChanged.connect(lambda: self.commandDispatcherQueue.put('GenerateGridPoints'))
         self.app.ui.numberGridPointsCol.valueChanged.connect(lambda: self.commandDispatcherQueue.put('GenerateGridPoints'))
         self.app.ui.altitudeMin.valueChanged.connect(lambda: self.commandDispatcherQueue.put('GenerateGridPoints'))
@@ -227,8 +242,20 @@ class ModelingDispatcher(PyQt5.QtCore.QObject):
         self.app.ui.numberBase.valueChanged.connect(lambda: self.commandDispatcherQueue.put('GenerateInitialPoints'))
         self.app.ui.btn_runFlexure.clicked.connect(lambda: self.commandDispatcherQueue.put('RunFlexure'))
         self.app.ui.btn_runHysterese.clicked.connect(lambda: self.commandDispatcherQueue.put('RunHysterese'))
-        self.app.ui.btn_runFullModel.clicked.connect(lambda: self.commandDispatcherQueue.put('RunFullModel'))
-        self.app.ui.btn_runInitialModel.clicked.connect(lambda: self.commandDispatcherQueue.put('RunInitialModel'))
+        self.app.ui.btn_runFullModel.clicked.connect(lambda: self.startModelRun('RunFullModel'))
+        self.app.ui.btn_runInitialModel.clicked.connect(lambda: self.startModelRun('RunInitialModel'))
+
+    def startModelRun(self, command):
+        # runs in the gui thread. if the points belong to a cancelled run, the user decides about resuming it. a
+        # declined resume removes the journal and the run starts new
+        directory = self.modelingRunner.modelJournal.getResumeDirectory(self.modelingRunner.modelPoints.modelPoints)
+        if directory is not None:
+            question = 'The model points belong to the cancelled model run {0}.\n\nOk resumes this run, Cancel starts a new run.'.format(directory)
+            value = self.app.dialogMessage(self.app, 'Resume model run', question)
+            if value != PyQt5.QtWidgets.QMessageBox.Ok:
+                self.modelingRunner.modelJournal.remove()
+                self.app.messageQueue.put('Cancelled model run {0} not resumed, starting new run\n'.format(directory))
+        self.commandDispatcherQueue.put(command)
 
     def initConfig(self):
         # before changing value through config (which fires the signals) i have to disable them
@@ -263,6 +290,8 @@ class ModelingDispatcher(PyQt5.QtCore.QObject):
                 self.app.ui.numberPointsDSO.setValue(self.app.config['NumberPointsDSO'])
             if 'NumberHoursDSO' in self.app.config:
                 self.app.ui.numberHoursDSO.setValue(self.app.config['NumberHoursDSO'])
+            if 'NumberMinutesBudget' in self.app.config:
+                self.app.ui.numberMinutesBudget.setValue(self.app.config['NumberMinutesBudget'])
 
         except Exception as e:
             self.logger.error('item in config.cfg not be initialize, error:{0}'.format(e))
@@ -292,6 +321,7 @@ class ModelingDispatcher(PyQt5.QtCore.QObject):
         self.app.config['AltitudeMax'] = self.app.ui.altitudeMax.value()
         self.app.config['NumberPointsDSO'] = self.app.ui.numberPointsDSO.value()
         self.app.config['NumberHoursDSO'] = self.app.ui.numberHoursDSO.value()
+        self.app.config['NumberMinutesBudget'] = self.app.ui.numberMinutesBudget.value()
         # and calling the underlying classes as well
         self.modelingRunner.storeConfig()
 
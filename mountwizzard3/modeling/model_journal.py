@@ -0,0 +1,149 @@
+############################################################
+# -*- coding: utf-8 -*-
+#
+#       #   #  #   #   #  ####
+#      ##  ##  #  ##  #     #
+#     # # # #  # # # #     ###
+#    #  ##  #  ##  ##        #
+#   #   #   #  #   #     ####
+#
+# Python-based Tool for interaction with the 10micron mounts
+# GUI with PyQT5 for python
+# Python  v3.6.4
+#
+# Michael Würtenberger
+# (c) 2016, 2017, 2018
+#
+# Licence APL2.0
+#
+###########################################################
+import json
+import logging
+import os
+import threading
+
+
+class ModelJournal:
+    logger = logging.getLogger(__name__)
+
+    # journal of a model run: the first line is the header with the directory and the point set, then one line
+    # per imaged and per solved point with its modeling data. every line is flushed and synced to disk at once,
+    # that is some lines per minute. a run, which is started with the same point set, resumes the journal and its
+    # directory. the journal is removed, when a run finishes without cancel
+    JOURNAL_FILE = os.getcwd() + '/config/model_journal.dat'
+    # points are compared with this number of decimals in degrees
+    POINT_DECIMALS = 2
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.outfile = None
+        # records of a resumed run, with the position in the point set as key
+        self.solved = dict()
+        self.imaged = dict()
+        self.nextIndex = 0
+
+    @staticmethod
+    def toJson(value):
+        # numpy values and others, which json does not know
+        if hasattr(value, 'item'):
+            return value.item()
+        return str(value)
+
+    def getPointSet(self, points):
+        return [[round(float(point[0]), self.POINT_DECIMALS), round(float(point[1]), self.POINT_DECIMALS)] for point in points]
+
+    def loadJournal(self, points):
+        # returns the header and the records, if the journal belongs to the point set, otherwise none
+        if not os.path.isfile(self.JOURNAL_FILE):
+            return None, []
+        header = None
+        records = list()
+        try:
+            with open(self.JOURNAL_FILE, 'r') as infile:
+                for line in infile:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # the last line could be incomplete after a crash
+                        self.logger.warning('Incomplete line in model journal skipped')
+                        continue
+                    if header is None:
+                        header = record
+                    else:
+                        records.append(record)
+        except Exception as e:
+            self.logger.error('Model journal {0} could not be loaded, error: {1}'.format(self.JOURNAL_FILE, e))
+            return None, []
+        if header is None or header.get('Points') != self.getPointSet(points):
+            self.logger.info('Model journal belongs to another point set, starting new run')
+            return None, []
+        return header, records
+
+    def getResumeDirectory(self, points):
+        # returns the directory of the cancelled run, which would be resumed with the point set, otherwise none
+        header, records = self.loadJournal(points)
+        if header is None:
+            return None
+        return header['Directory']
+
+    def remove(self):
+        # the cancelled run is not resumed, the next run starts a new journal
+        self.close(isFinished=True)
+
+    def open(self, points, modelingData):
+        # points as the list of (az, alt) of the run before scheduling. if a journal for the same point set exists,
+        # the directory of modeling data is set to the one of the journal and the records are available in solved
+        # and imaged. returns true for a resumed run
+        self.close()
+        header, records = self.loadJournal(points)
+        self.solved = dict()
+        self.imaged = dict()
+        self.nextIndex = 0
+        for record in records:
+            data = record['Data']
+            self.nextIndex = max(self.nextIndex, data['Index'] + 1)
+            if record['Type'] == 'Solved':
+                self.solved[data['PointIndex']] = data
+                self.imaged.pop(data['PointIndex'], None)
+            elif record['Type'] == 'Imaged' and data['PointIndex'] not in self.solved:
+                # an image is only solved again, if it is still there
+                if os.path.isfile(data['Imagepath']):
+                    self.imaged[data['PointIndex']] = data
+        try:
+            if header is not None:
+                modelingData['Directory'] = header['Directory']
+                self.outfile = open(self.JOURNAL_FILE, 'a')
+            else:
+                self.outfile = open(self.JOURNAL_FILE, 'w')
+                self.writeLine({'Directory': modelingData['Directory'], 'Points': self.getPointSet(points)})
+        except Exception as e:
+            self.logger.error('Model journal {0} could not be opened, error: {1}'.format(self.JOURNAL_FILE, e))
+            self.outfile = None
+        if header is not None:
+            self.logger.info('Resuming model run {0}: {1} points recovered, {2} solved, {3} images to solve'.format(header['Directory'], len(self.solved) + len(self.imaged), len(self.solved), len(self.imaged)))
+        return header is not None
+
+    def writeLine(self, record):
+        with self.lock:
+            if not self.outfile:
+                return
+            try:
+                self.outfile.write(json.dumps(record, default=self.toJson) + '\n')
+                self.outfile.flush()
+                os.fsync(self.outfile.fileno())
+            except Exception as e:
+                self.logger.error('Model journal could not be written, error: {0}'.format(e))
+
+    def addImaged(self, modelingData):
+        self.writeLine({'Type': 'Imaged', 'Data': modelingData})
+
+    def addSolved(self, modelingData):
+        self.writeLine({'Type': 'Solved', 'Data': modelingData})
+
+    def close(self, isFinished=False):
+        with self.lock:
+            if self.outfile:
+                self.outfile.close()
+                self.outfile = None
+        if isFinished and os.path.isfile(self.JOURNAL_FILE):
+            os.remove(self.JOURNAL_FILE)
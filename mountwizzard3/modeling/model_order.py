@@ -0,0 +1,178 @@
+############################################################
+# -*- coding: utf-8 -*-
+#
+#       #   #  #   #   #  ####
+#      ##  ##  #  ##  #     #
+#     # # # #  # # # #     ###
+#    #  ##  #  ##  ##        #
+#   #   #   #  #   #     ####
+#
+# Python-based Tool for interaction with the 10micron mounts
+# GUI with PyQT5 for python
+# Python  v3.6.4
+#
+# Michael Würtenberger
+# (c) 2016, 2017, 2018
+#
+# Licence APL2.0
+#
+###########################################################
+import logging
+import time
+import numpy
+
+
+class ModelOrder:
+    logger = logging.getLogger(__name__)
+
+    # ordering of model points for minimal slew time. the cost of a slew is computed from the axis angles of the
+    # german equatorial mount: both axes move at the same time with the slew rate in degrees per second, so the
+    # longer axis move counts. a point is on the pier side given by its hour angle, only inside the meridian limit
+    # for slewing it could be reached from both sides. a meridian flip needs no extra handling, as the axis angles
+    # of the two pier sides are 180 degrees apart. if a dome is present, it turns at the same time and the slower
+    # one counts. the tour is built by nearest neighbour and improved by 2-opt
+    SLEW_OVERHEAD = 2.0
+    DEFAULT_SLEW_RATE = 2.0
+    OPTIMIZE_TIMEOUT = 2.0
+
+    def __init__(self, latitude, slewRate, meridianLimitSlew, domeSpeed=None):
+        self.latitude = latitude
+        if slewRate is None or slewRate <= 0:
+            slewRate = self.DEFAULT_SLEW_RATE
+        self.slewRate = slewRate
+        self.meridianLimitSlew = meridianLimitSlew
+        self.domeSpeed = domeSpeed
+
+    def getHourAngleDec(self, az, alt):
+        # az, alt in degrees, returns hour angle and dec in degrees
+        az = numpy.radians(az)
+        alt = numpy.radians(alt)
+        lat = numpy.radians(self.latitude)
+        dec = numpy.arcsin(numpy.sin(lat) * numpy.sin(alt) + numpy.cos(lat) * numpy.cos(alt) * numpy.cos(az))
+        ha = numpy.arctan2(-numpy.sin(az) * numpy.cos(alt),
+                           numpy.cos(lat) * numpy.sin(alt) - numpy.sin(lat) * numpy.cos(alt) * numpy.cos(az))
+        return numpy.degrees(ha), numpy.degrees(dec)
+
+    @staticmethod
+    def getAxisAngles(ha, dec, side):
+        # side 0 for targets west of the meridian, side 1 for the east, which is the flipped position
+        raAxis = numpy.where(side == 0, ha, ha + 180.0)
+        decAxis = numpy.where(side == 0, dec, 180.0 - dec)
+        return raAxis, decAxis
+
+    def getPierSides(self, ha, dec):
+        # points outside the meridian limit have a fixed side, the others join the side with the nearest point
+        side = numpy.where(ha >= 0, 0, 1)
+        isFree = numpy.abs(ha) <= self.meridianLimitSlew
+        isFixed = ~isFree
+        if not isFree.any() or not isFixed.any():
+            return side
+        distance = list()
+        for candidate in [0, 1]:
+            fixed = isFixed & (side == candidate)
+            if not fixed.any():
+                distance.append(numpy.full(isFree.sum(), numpy.inf))
+                continue
+            raFree, decFree = self.getAxisAngles(ha[isFree], dec[isFree], numpy.full(isFree.sum(), candidate))
+            raFixed, decFixed = self.getAxisAngles(ha[fixed], dec[fixed], numpy.full(fixed.sum(), candidate))
+            distance.append(numpy.maximum(numpy.abs(raFree[:, None] - raFixed[None, :]),
+                                          numpy.abs(decFree[:, None] - decFixed[None, :])).min(axis=1))
+        side[isFree] = numpy.where(distance[0] <= distance[1], 0, 1)
+        return side
+
+    def getCostMatrix(self, az, alt, side):
+        # slew times in seconds between all points, without the overhead per slew
+        ha, dec = self.getHourAngleDec(az, alt)
+        raAxis, decAxis = self.getAxisAngles(ha, dec, side)
+        cost = numpy.maximum(numpy.abs(raAxis[:, None] - raAxis[None, :]),
+                             numpy.abs(decAxis[:, None] - decAxis[None, :])) / self.slewRate
+        if self.domeSpeed:
+            domeDistance = numpy.abs(az[:, None] - az[None, :]) % 360
+            domeDistance = numpy.minimum(domeDistance, 360 - domeDistance)
+            cost = numpy.maximum(cost, domeDistance / self.domeSpeed)
+        return cost
+
+    @staticmethod
+    def getNearestNeighbourTour(cost):
+        # open path starting with node 0
+        number = len(cost)
+        tour = [0]
+        isVisited = numpy.zeros(number, dtype=bool)
+        isVisited[0] = True
+        for _ in range(1, number):
+            distance = numpy.where(isVisited, numpy.inf, cost[tour[-1]])
+            nextNode = int(numpy.argmin(distance))
+            tour.append(nextNode)
+            isVisited[nextNode] = True
+        return tour
+
+    def optimizeTour(self, tour, cost):
+        # 2-opt on an open path with fixed start. a virtual end node with zero cost to all nodes makes the last
+        # edge free, so the formula is the same for all moves
+        number = len(cost)
+        extended = numpy.zeros((number + 1, number + 1))
+        extended[:number, :number] = cost
+        tour = numpy.array(list(tour) + [number])
+        timeStart = time.time()
+        isImproved = True
+        while isImproved and time.time() - timeStart < self.OPTIMIZE_TIMEOUT:
+            isImproved = False
+            for i in range(0, len(tour) - 3):
+                a = tour[i]
+                b = tour[i + 1]
+                c = tour[i + 2:-1]
+                d = tour[i + 3:]
+                delta = extended[a, c] + extended[b, d] - extended[a, b] - extended[c, d]
+                j = int(numpy.argmin(delta))
+                if delta[j] < -1e-9:
+                    tour[i + 1:i + 3 + j] = tour[i + 1:i + 3 + j][::-1].copy()
+                    isImproved = True
+        return tour[:-1].tolist()
+
+    def getSlewTime(self, cost, tour):
+        if len(tour) < 2:
+            return 0.0
+        tour = numpy.asarray(tour)
+        return float(cost[tour[:-1], tour[1:]].sum()) + self.SLEW_OVERHEAD * (len(tour) - 1)
+
+    def getNodes(self, points, start, startSide):
+        # the start position of the mount is node 0, if present. returns the nodes, their hour angle, dec and pier side
+        nodes = numpy.array(([start] if start is not None else []) + [(point[0], point[1]) for point in points], dtype=float)
+        ha, dec = self.getHourAngleDec(nodes[:, 0], nodes[:, 1])
+        side = self.getPierSides(ha, dec)
+        if start is not None and startSide is not None:
+            side[0] = startSide
+        return nodes, ha, dec, side
+
+    def getSlewTimes(self, points, start=None, startSide=None):
+        # slew time in seconds to reach each point in the given order, including the overhead per slew
+        if len(points) == 0:
+            return numpy.zeros(0)
+        nodes, ha, dec, side = self.getNodes(points, start, startSide)
+        cost = self.getCostMatrix(nodes[:, 0], nodes[:, 1], side)
+        slewTimes = numpy.diagonal(cost, offset=1) + self.SLEW_OVERHEAD
+        if start is None:
+            slewTimes = numpy.concatenate(([self.SLEW_OVERHEAD], slewTimes))
+        return slewTimes
+
+    def getOrder(self, points, start=None, startSide=None):
+        # points as list of (az, alt), start the actual (az, alt) of the mount and startSide its pier side (0 or 1).
+        # returns the ordered points and the predicted slew time in seconds for the whole run
+        if len(points) < 2 and start is None:
+            return list(points), 0.0
+        nodes, ha, dec, side = self.getNodes(points, start, startSide)
+        cost = self.getCostMatrix(nodes[:, 0], nodes[:, 1], side)
+        if start is None:
+            # without a start position, the run begins at the point with the lowest hour angle of the first side
+            first = int(numpy.lexsort((ha, side))[0])
+            order = [first] + [i for i in range(0, len(nodes)) if i != first]
+            cost = cost[numpy.ix_(order, order)]
+        else:
+            order = list(range(0, len(nodes)))
+        tour = self.optimizeTour(self.getNearestNeighbourTour(cost), cost)
+        slewTime = self.getSlewTime(cost, tour)
+        tour = [order[i] for i in tour]
+        if start is not None:
+            tour = [i - 1 for i in tour if i != 0]
+        self.logger.info('Ordered {0} points, predicted slew time {1:4.0f} s'.format(len(tour), slewTime))
+        return [points[i] for i in tour], slewTime
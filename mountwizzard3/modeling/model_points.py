@@ -24,18 +24,38 @@ import time
 import copy
 import operator
 import numpy
-from astrometry import transform
+from modeling import model_order
 
 
 class ModelPoints:
     logger = logging.getLogger(__name__)
 
+    # the horizon mask is compiled to a lookup of the altitude limit over azimuth in steps of degrees, so checking
+    # points is an index operation and independent of the number of horizon points
+    HORIZON_RESOLUTION = 0.1
+    # the batch conversion of the presets agrees with a conversion point by point within this tolerance in degrees
+    POINT_TOLERANCE = 1e-9
+    # ratio of sidereal to solar time and the number of rounds for scheduling order and visiting times
+    SIDEREAL_RATE = 1.00273790935
+    SCHEDULE_ITERATIONS = 2
+    # budget points: candidates on the sky, the minimum altitude, the mount limit of points, the first guess for the
+    # slew time per point in seconds and the rounds for fitting the number of points to the budget
+    BUDGET_CANDIDATES = 3000
+    BUDGET_ALTITUDE_MIN = 10
+    BUDGET_POINTS_MAX = 100
+    BUDGET_SLEW_TIME = 10.0
+    BUDGET_ITERATIONS = 5
+
     def __init__(self, app):
         self.app = app
-        self.transform = transform.Transform(self.app)
+        self.transform = self.app.transform
         self.horizonPoints = list()
+        self.horizonMask = numpy.zeros(int(360 / self.HORIZON_RESOLUTION) + 1)
         self.modelPoints = list()
         self.celestialEquator = list()
+        self.predictedSlewTime = 0
+        # ra, dec of the points, which follow a target, referenced by the (az, alt) point
+        self.equatorialPoints = dict()
         # signal slot
         self.app.ui.btn_loadInitialModelPoints.clicked.connect(self.selectInitialModelPointsFileName)
         self.app.ui.btn_saveInitialModelPoints.clicked.connect(self.saveInitialModelPoints)
@@ -200,25 +220,86 @@ class ModelPoints:
         finally:
             return p, msg
 
+    def getModelOrder(self):
+        # ordering engine with the actual mount and dome parameters, the start position and the meridian guide limit
+        self.app.sharedMountDataLock.lockForRead()
+        data = self.app.workerMountDispatcher.data
+        slewRate = float(data.get('SlewRate', 0))
+        meridianLimitSlew = float(data.get('MeridianLimitSlew', 0))
+        meridianLimitGuide = float(data.get('MeridianLimitGuide', 0))
+        if 'Az' in data and 'Alt' in data:
+            start = (data['Az'], data['Alt'])
+            startSide = 0 if data.get('Pierside', 'E') == 'E' else 1
+        else:
+            start = None
+            startSide = None
+        self.app.sharedMountDataLock.unlock()
+        domeSpeed = None
+        if not self.app.ui.pd_chooseDome.currentText().startswith('No Dome') and self.app.workerDome.data['Connected']:
+            # turning speed of the dome in degrees per second for the ordering of the points
+            domeSpeed = self.app.workerDome.domeSpeed
+        modelOrder = model_order.ModelOrder(self.transform.site[0], slewRate, meridianLimitSlew, domeSpeed)
+        return modelOrder, start, startSide, meridianLimitGuide
+
     def sortPoints(self):
         if len(self.modelPoints) == 0:
             self.logger.warning('There are no points to sort')
             return
-        westSide = []
-        eastSide = []
-        a = sorted(self.modelPoints, key=operator.itemgetter(0))
-        for i in range(0, len(a)):
-            if a[i][0] >= 180:
-                westSide.append((a[i][0], a[i][1]))
-            else:
-                eastSide.append((a[i][0], a[i][1]))
-        westSide = sorted(westSide, key=operator.itemgetter(1))
-        eastSide = sorted(eastSide, key=operator.itemgetter(1))
-        self.modelPoints = westSide + eastSide
+        modelOrder, start, startSide, meridianLimitGuide = self.getModelOrder()
+        self.modelPoints, self.predictedSlewTime = modelOrder.getOrder(self.modelPoints, start, startSide)
+        self.app.messageQueue.put('Predicted slew time for {0} points: {1:4.0f} s\n'.format(len(self.modelPoints), self.predictedSlewTime))
+
+    def getEquatorialPositions(self, ra, dec, timeOffset):
+        # az, alt of targets ra in hours, dec in degrees after time offset in seconds. the earth rotation is applied
+        # to ra, so all points are transformed in one batch with the actual context
+        return self.transform.transformERFA(ra - timeOffset / 3600 * self.SIDEREAL_RATE, dec, 1)
+
+    def schedulePoints(self, points, timePerPoint, doSortingPoints, withIndex=False):
+        # points, which are defined by a target in ra / dec, move during the run. their position is computed for the
+        # predicted time of the visit, which is built from the slew times and the time per point for settling,
+        # imaging and download. points, which would be below the horizon mask or pass the meridian limit for
+        # tracking while imaging, are dropped. fixed az / alt points stay unchanged, so does the order without sorting.
+        # with index the points are returned as (az, alt, index in points)
+        target = [self.equatorialPoints.get(tuple(point[:2])) for point in points]
+        if len(points) == 0 or not any(target):
+            if withIndex:
+                return [(point[0], point[1], i) for i, point in enumerate(points)]
+            return list(points)
+        isEquatorial = numpy.array([value is not None for value in target])
+        ra = numpy.array([value[0] if value else 0.0 for value in target])
+        dec = numpy.array([value[1] if value else 0.0 for value in target])
+        modelOrder, start, startSide, meridianLimitGuide = self.getModelOrder()
+        # the index of the point is carried as third element through the ordering
+        scheduled = [(point[0], point[1], i) for i, point in enumerate(points)]
+        timeVisit = numpy.zeros(len(points))
+        for _ in range(0, self.SCHEDULE_ITERATIONS):
+            if doSortingPoints:
+                scheduled, slewTime = modelOrder.getOrder(scheduled, start, startSide)
+            index = numpy.array([point[2] for point in scheduled])
+            slewTimes = modelOrder.getSlewTimes(scheduled, start, startSide)
+            timeVisit[index] = numpy.cumsum(slewTimes + timePerPoint) - timePerPoint
+            az, alt = self.getEquatorialPositions(ra, dec, timeVisit)
+            scheduled = [(az[i], alt[i], i) if isEquatorial[i] else point for point, i in zip(scheduled, index.tolist())]
+        # check start and end of the visit
+        azEnd, altEnd = self.getEquatorialPositions(ra, dec, timeVisit + timePerPoint)
+        az = numpy.array([point[0] for point in sorted(scheduled, key=operator.itemgetter(2))])
+        alt = numpy.array([point[1] for point in sorted(scheduled, key=operator.itemgetter(2))])
+        isVisible = self.isAboveHorizon(az, alt) & self.isAboveHorizon(azEnd, altEnd) & (alt > 0) & (altEnd > 0)
+        haStart, _ = modelOrder.getHourAngleDec(az, alt)
+        haEnd, _ = modelOrder.getHourAngleDec(azEnd, altEnd)
+        isPassingLimit = (haStart < meridianLimitGuide) & (haEnd >= meridianLimitGuide)
+        isDropped = isEquatorial & (~isVisible | isPassingLimit)
+        if isDropped.any():
+            self.logger.info('Scheduling dropped {0} points'.format(int(isDropped.sum())))
+            self.app.messageQueue.put('Dropped {0} points, which would be out of limits when imaged\n'.format(int(isDropped.sum())))
+        if withIndex:
+            return [(float(point[0]), float(point[1]), point[2]) for point in scheduled if not isDropped[point[2]]]
+        return [(float(point[0]), float(point[1])) for point in scheduled if not isDropped[point[2]]]
 
     def loadHorizonPoints(self, horizonPointsFileName, horizonByFile, horizonByAltitude, altitudeMinimumHorizon):
         self.horizonPoints = []
         if not (horizonByFile or horizonByAltitude):
+            self.compileHorizonMask()
             return
         hp = []
         msg = None
@@ -254,8 +335,19 @@ class ModelPoints:
         if horizonByAltitude:
             y = numpy.clip(y, altitudeMinimumHorizon, None)
         self.horizonPoints = [list(a) for a in zip(x, y)]
+        self.compileHorizonMask()
         return msg
 
+    def compileHorizonMask(self):
+        # has to be called after every change of the horizon points. the lookup is replaced as a whole
+        if len(self.horizonPoints) < 2:
+            self.horizonMask = numpy.zeros(int(360 / self.HORIZON_RESOLUTION) + 1)
+            return
+        horizon = numpy.asarray(self.horizonPoints, dtype=float)
+        horizon = horizon[numpy.argsort(horizon[:, 0], kind='mergesort')]
+        azimuth = numpy.arange(0, int(360 / self.HORIZON_RESOLUTION) + 1) * self.HORIZON_RESOLUTION
+        self.horizonMask = numpy.interp(azimuth, horizon[:, 0], horizon[:, 1])
+
     def saveHorizonPoints(self, horizonPointsFileName):
         msg = None
         fileHandle = None
@@ -277,24 +369,26 @@ class ModelPoints:
                 fileHandle.close()
         return msg
 
+    def isAboveHorizon(self, azimuth, altitude):
+        # azimuth and altitude in degrees as arrays, returns an array of booleans
+        horizonMask = self.horizonMask
+        index = (numpy.asarray(azimuth, dtype=float) % 360 / self.HORIZON_RESOLUTION).astype(int)
+        index = numpy.clip(index, 0, len(horizonMask) - 1)
+        return numpy.asarray(altitude, dtype=float) > horizonMask[index]
+
     def isAboveHorizonLine(self, point):
-        x = range(0, 361)
-        y = numpy.interp(x, [i[0] for i in self.horizonPoints], [i[1] for i in self.horizonPoints], left=None, right=None, period=None)
-        if point[1] > y[int(point[0])]:
-            return True
-        else:
-            return False
+        return bool(self.isAboveHorizon(point[0], point[1]))
 
     def deleteBelowHorizonLine(self):
-        i = 0
-        while i < len(self.modelPoints):
-            if self.isAboveHorizonLine(self.modelPoints[i]):
-                i += 1
-            else:
-                del self.modelPoints[i]
+        if len(self.modelPoints) == 0:
+            return
+        points = numpy.asarray(self.modelPoints, dtype=float)
+        isAbove = self.isAboveHorizon(points[:, 0], points[:, 1])
+        self.modelPoints = [point for point, keep in zip(self.modelPoints, isAbove.tolist()) if keep]
 
     def deletePoints(self):
         self.modelPoints = list()
+        self.equatorialPoints = dict()
         self.app.workerModelingDispatcher.signalModelPointsRedraw.emit()
 
     def showInitialPoints(self, filename):
@@ -315,49 +409,72 @@ class ModelPoints:
         # we have no position of the mount -> therefore we can't calculate the path
         if 'RaJNow' not in self.app.workerMountDispatcher.data:
             return
-        self.modelPoints = list()
+        self.app.sharedMountDataLock.lockForRead()
         ra = copy.copy(self.app.workerMountDispatcher.data['RaJNow'])
         dec = copy.copy(self.app.workerMountDispatcher.data['DecJNow'])
-        for i in range(0, numberOfPathPoints):
-            ra = ra - float(i) * hoursPathLength / numberOfPathPoints - hoursPathLengthPreview
-            az, alt = self.transform.transformERFA(ra, dec, 1)
-            if alt > 0:
-                self.modelPoints.append((az, alt))
+        isUnattendedFlip = self.app.workerMountDispatcher.data.get('UnattendedFlip', '0') == '1'
+        self.app.sharedMountDataLock.unlock()
+        self.modelPoints = list()
+        self.equatorialPoints = dict()
+        # without points there is no path, like before the batch conversion
+        if numberOfPathPoints < 1:
+            self.app.messageQueue.put('ToModel>{0:02d}'.format(len(self.modelPoints)))
+            self.app.workerModelingDispatcher.signalModelPointsRedraw.emit()
+            return
+        # the path samples the track of the target in equal time steps in hours from the preview time on. the
+        # earth rotation for these times is applied to ra, so the whole path is one batch
+        timeOffset = hoursPathLengthPreview + numpy.arange(0, numberOfPathPoints) * hoursPathLength / numberOfPathPoints
+        raPath = ra - timeOffset * self.SIDEREAL_RATE
+        decPath = numpy.full(numberOfPathPoints, dec)
+        az, alt = self.transform.transformERFA(raPath, decPath, 1)
+        isValid = alt > 0
         if limitByHorizonMask:
-            self.deleteBelowHorizonLine()
+            isValid &= self.isAboveHorizon(az, alt)
+        # without unattended flip the mount stops tracking at the meridian limit, the path after this is not used
+        modelOrder, start, startSide, meridianLimitGuide = self.getModelOrder()
+        ha, _ = modelOrder.getHourAngleDec(az, alt)
+        if not isUnattendedFlip and ha[0] <= meridianLimitGuide:
+            isValid &= ha <= meridianLimitGuide
+        for azimuth, altitude, raPoint in zip(az[isValid].tolist(), alt[isValid].tolist(), raPath[isValid].tolist()):
+            self.modelPoints.append((azimuth, altitude))
+            # the path is kept in ra / dec, so the scheduling could follow the target
+            self.equatorialPoints[(azimuth, altitude)] = (raPoint, dec)
         self.app.messageQueue.put('ToModel>{0:02d}'.format(len(self.modelPoints)))
         self.app.workerModelingDispatcher.signalModelPointsRedraw.emit()
 
-    def generateMaxPoints(self, limitByHorizonMask, doSortingPoints):
-        west = []
-        east = []
+    @staticmethod
+    def generateHourAngleGrid(decRange, stepFunction):
+        # rows of hour angle in 1/10 hours for each dec, every second row reversed to get a meander. returns flat
+        # arrays of hour angle and dec in the order of the rows
         off = -5
-        i = 0
-        for dec in range(-15, 90, 10):
-            if dec < 30:
-                step = 10
-            elif dec < 70:
-                step = 10
-            else:
-                step = 30
+        haRows = list()
+        decRows = list()
+        for i, dec in enumerate(decRange):
+            step = stepFunction(dec)
             if i % 2:
-                for ha in range(120 + off, -120 + off, -step):
-                    az, alt = self.transform.topocentricToAzAlt(ha / 10, dec)
-                    if alt > 0:
-                        if az > 180:
-                            east.insert(0, (az, alt))
-                        else:
-                            west.append((az, alt))
+                ha = numpy.arange(120 + off, -120 + off, -step)
             else:
-                for ha in range(-120 + off, 120 + off, step):
-                    az, alt = self.transform.topocentricToAzAlt(ha / 10, dec)
-                    if alt > 0:
-                        if az > 180:
-                            east.insert(0, (az, alt))
-                        else:
-                            west.append((az, alt))
-            i += 1
-        self.modelPoints = west + east
+                ha = numpy.arange(-120 + off, 120 + off, step)
+            haRows.append(ha)
+            decRows.append(numpy.full(len(ha), dec))
+        return numpy.concatenate(haRows), numpy.concatenate(decRows)
+
+    @staticmethod
+    def splitEastWest(az, alt):
+        # visible points only, west side in the order of generation, followed by the east side in reversed order
+        points = numpy.column_stack((az, alt))
+        isVisible = alt > 0
+        isEast = az > 180
+        west = points[isVisible & ~isEast]
+        east = points[isVisible & isEast][::-1]
+        return [tuple(point) for point in numpy.concatenate((west, east)).tolist()]
+
+    def generateHemispherePoints(self, decRange, stepFunction, limitByHorizonMask, doSortingPoints):
+        ha, dec = self.generateHourAngleGrid(decRange, stepFunction)
+        # one batch conversion. against the former conversion point by point the vectorised ufuncs differ only in
+        # the last bits, the points agree within POINT_TOLERANCE degrees
+        az, alt = self.transform.topocentricToAzAlt(ha / 10, dec)
+        self.modelPoints = self.splitEastWest(az, alt)
         if limitByHorizonMask:
             self.deleteBelowHorizonLine()
         if doSortingPoints:
@@ -365,69 +482,27 @@ class ModelPoints:
         self.app.messageQueue.put('ToModel>{0:02d}'.format(len(self.modelPoints)))
         self.app.workerModelingDispatcher.signalModelPointsRedraw.emit()
 
+    def generateMaxPoints(self, limitByHorizonMask, doSortingPoints):
+        self.generateHemispherePoints(range(-15, 90, 10), lambda dec: 10 if dec < 70 else 30, limitByHorizonMask, doSortingPoints)
+
     def generateNormalPoints(self, limitByHorizonMask, doSortingPoints):
-        west = []
-        east = []
-        off = -5
-        i = 0
-        for dec in range(-15, 90, 15):
-            if dec < 60:
-                step = 10
-            else:
-                step = 20
-            if i % 2:
-                for ha in range(120 + off, -120 + off, -step):
-                    az, alt = self.transform.topocentricToAzAlt(ha / 10, dec)
-                    if alt > 0:
-                        if az > 180:
-                            east.insert(0, (az, alt))
-                        else:
-                            west.append((az, alt))
-            else:
-                for ha in range(-120 + off, 120 + off, step):
-                    az, alt = self.transform.topocentricToAzAlt(ha / 10, dec)
-                    if alt > 0:
-                        if az > 180:
-                            east.insert(0, (az, alt))
-                        else:
-                            west.append((az, alt))
-            i += 1
-        self.modelPoints = west + east
-        if limitByHorizonMask:
-            self.deleteBelowHorizonLine()
-        if doSortingPoints:
-            self.sortPoints()
-        self.app.messageQueue.put('ToModel>{0:02d}'.format(len(self.modelPoints)))
-        self.app.workerModelingDispatcher.signalModelPointsRedraw.emit()
+        self.generateHemispherePoints(range(-15, 90, 15), lambda dec: 10 if dec < 60 else 20, limitByHorizonMask, doSortingPoints)
 
     def generateMinPoints(self, limitByHorizonMask, doSortingPoints):
-        west = list()
-        east = list()
-        off = -5
-        i = 0
-        for dec in range(-15, 90, 15):
-            if dec < 60:
-                step = 15
-            else:
-                step = 30
+        self.generateHemispherePoints(range(-15, 90, 15), lambda dec: 15 if dec < 60 else 30, limitByHorizonMask, doSortingPoints)
+
+    def generateGridPoints(self, limitByHorizonMask, doSortingPoints, numberOfRows, numberOfColumns, altitudeMin, altitudeMax):
+        step = int(360 / numberOfColumns)
+        azRows = list()
+        altRows = list()
+        for i, alt in enumerate(range(altitudeMin, altitudeMax + 1, int((altitudeMax - altitudeMin) / (numberOfRows - 1)))):
             if i % 2:
-                for ha in range(120 + off, -120 + off, -step):
-                    az, alt = self.transform.topocentricToAzAlt(ha / 10, dec)
-                    if alt > 0:
-                        if az > 180:
-                            east.insert(0, (az, alt))
-                        else:
-                            west.append((az, alt))
+                az = numpy.arange(365 - step, 0, -step)
             else:
-                for ha in range(-120 + off, 120 + off, step):
-                    az, alt = self.transform.topocentricToAzAlt(ha / 10, dec)
-                    if alt > 0:
-                        if az > 180:
-                            east.insert(0, (az, alt))
-                        else:
-                            west.append((az, alt))
-            i += 1
-        self.modelPoints = west + east
+                az = numpy.arange(5, 360, step)
+            azRows.append(az)
+            altRows.append(numpy.full(len(az), alt))
+        self.modelPoints = self.splitEastWest(numpy.concatenate(azRows), numpy.concatenate(altRows))
         if limitByHorizonMask:
             self.deleteBelowHorizonLine()
         if doSortingPoints:
@@ -435,31 +510,83 @@ class ModelPoints:
         self.app.messageQueue.put('ToModel>{0:02d}'.format(len(self.modelPoints)))
         self.app.workerModelingDispatcher.signalModelPointsRedraw.emit()
 
-    def generateGridPoints(self, limitByHorizonMask, doSortingPoints, numberOfRows, numberOfColumns, altitudeMin, altitudeMax):
-        west = list()
-        east = list()
-        i = 0
-        for alt in range(altitudeMin, altitudeMax + 1, int((altitudeMax - altitudeMin) / (numberOfRows - 1))):
-            if i % 2:
-                for az in range(365 - int(360 / numberOfColumns), 0, -int(360 / numberOfColumns)):
-                    if alt > 0:
-                        if az > 180:
-                            east.insert(0, (az, alt))
-                        else:
-                            west.append((az, alt))
-            else:
-                for az in range(5, 360, int(360 / numberOfColumns)):
-                    if alt > 0:
-                        if az > 180:
-                            east.insert(0, (az, alt))
-                        else:
-                            west.append((az, alt))
-            i += 1
-        self.modelPoints = west + east
+    def getCandidatePoints(self, limitByHorizonMask):
+        # evenly spread candidates over the sky above the minimum altitude: fibonacci lattice with equal area per point
+        i = numpy.arange(0, self.BUDGET_CANDIDATES)
+        sinAltMin = numpy.sin(numpy.radians(self.BUDGET_ALTITUDE_MIN))
+        alt = numpy.degrees(numpy.arcsin(sinAltMin + (1 - sinAltMin) * (i + 0.5) / self.BUDGET_CANDIDATES))
+        az = (i * 180 * (3 - numpy.sqrt(5))) % 360
         if limitByHorizonMask:
-            self.deleteBelowHorizonLine()
-        if doSortingPoints:
-            self.sortPoints()
+            isVisible = self.isAboveHorizon(az, alt)
+            az = az[isVisible]
+            alt = alt[isVisible]
+        return az, alt
+
+    @staticmethod
+    def getUnitVectors(az, alt):
+        az = numpy.radians(az)
+        alt = numpy.radians(alt)
+        return numpy.column_stack((numpy.cos(alt) * numpy.cos(az), numpy.cos(alt) * numpy.sin(az), numpy.sin(alt)))
+
+    def selectSpreadPoints(self, vectors, side, number):
+        # greedy max-min distance: the next point is the candidate farthest from all selected ones. the points are
+        # taken alternating from both pier sides as long as a side has candidates left
+        selected = list()
+        distance = numpy.full(len(vectors), numpy.inf)
+        isFree = numpy.ones(len(vectors), dtype=bool)
+        for k in range(0, min(number, len(vectors))):
+            isSide = isFree & (side == k % 2)
+            if not isSide.any():
+                isSide = isFree
+            index = int(numpy.argmax(numpy.where(isSide, distance, -1)))
+            selected.append(index)
+            isFree[index] = False
+            angle = numpy.arccos(numpy.clip(vectors @ vectors[index], -1, 1))
+            distance = numpy.minimum(distance, angle)
+        return numpy.array(selected, dtype=int)
+
+    def getCoverage(self, vectors, selected):
+        # largest distance of a candidate to the nearest point (covering radius) and mean distance of the points to
+        # their nearest neighbour, both in degrees
+        if len(selected) < 2:
+            return 0.0, 0.0
+        angle = numpy.arccos(numpy.clip(vectors @ vectors[selected].T, -1, 1))
+        coverRadius = numpy.degrees(angle.min(axis=1).max())
+        neighbour = angle[selected]
+        neighbour[numpy.arange(len(selected)), numpy.arange(len(selected))] = numpy.inf
+        spacing = numpy.degrees(neighbour.min(axis=1).mean())
+        return coverRadius, spacing
+
+    def generateBudgetPoints(self, limitByHorizonMask, timeBudget, timePerPoint):
+        # as many evenly distributed points as fit into the time budget in seconds, including the slews. the budget
+        # is based on the slew optimal order, so the points are always ordered
+        az, alt = self.getCandidatePoints(limitByHorizonMask)
+        if len(az) == 0:
+            self.logger.warning('No visible sky for model points')
+            return
+        modelOrder, start, startSide, meridianLimitGuide = self.getModelOrder()
+        ha, dec = modelOrder.getHourAngleDec(az, alt)
+        side = numpy.where(ha >= 0, 0, 1)
+        vectors = self.getUnitVectors(az, alt)
+        number = min(self.BUDGET_POINTS_MAX, int(timeBudget / (timePerPoint + self.BUDGET_SLEW_TIME)))
+        points = list()
+        slewTime = 0
+        for _ in range(0, self.BUDGET_ITERATIONS):
+            selected = self.selectSpreadPoints(vectors, side, max(number, 1))
+            points = [(a, b) for a, b in zip(az[selected].tolist(), alt[selected].tolist())]
+            points, slewTime = modelOrder.getOrder(points, start, startSide)
+            timeRun = slewTime + len(points) * timePerPoint
+            if timeRun <= timeBudget or number <= 1:
+                break
+            number = max(1, int(number * timeBudget / timeRun))
+        coverRadius, spacing = self.getCoverage(vectors, selected)
+        numberWest = int((side[selected] == 0).sum())
+        self.modelPoints = points
+        self.predictedSlewTime = slewTime
+        message = 'Budget points: {0} ({1} west / {2} east), run time {3:4.1f} min, largest gap {4:3.1f}°, spacing {5:3.1f}°'
+        message = message.format(len(points), numberWest, len(points) - numberWest, (slewTime + len(points) * timePerPoint) / 60, coverRadius, spacing)
+        self.logger.info(message)
+        self.app.messageQueue.put(message + '\n')
         self.app.messageQueue.put('ToModel>{0:02d}'.format(len(self.modelPoints)))
         self.app.workerModelingDispatcher.signalModelPointsRedraw.emit()
 
@@ -476,10 +603,9 @@ class ModelPoints:
         self.app.workerModelingDispatcher.signalModelPointsRedraw.emit()
 
     def generateCelestialEquator(self):
-        self.celestialEquator = list()
-        off = -5
-        for dec in range(-15, 90, 15):
-            for ha in range(120 + off, -120 + off, -2):
-                az, alt = self.transform.topocentricToAzAlt(ha / 10, dec)
-                if alt > 0:
-                    self.celestialEquator.append((az, alt))
+        decRange = range(-15, 90, 15)
+        ha = numpy.tile(numpy.arange(115, -125, -2), len(decRange))
+        dec = numpy.repeat(numpy.array(decRange), len(ha) // len(decRange))
+        az, alt = self.transform.topocentricToAzAlt(ha / 10, dec)
+        isVisible = alt > 0
+        self.celestialEquator = list(zip(az[isVisible].tolist(), alt[isVisible].tolist()))
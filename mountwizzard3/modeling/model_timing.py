@@ -0,0 +1,201 @@
+############################################################
+# -*- coding: utf-8 -*-
+#
+#       #   #  #   #   #  ####
+#      ##  ##  #  ##  #     #
+#     # # # #  # # # #     ###
+#    #  ##  #  ##  ##        #
+#   #   #   #  #   #     ####
+#
+# Python-based Tool for interaction with the 10micron mounts
+# GUI with PyQT5 for python
+# Python  v3.6.4
+#
+# Michael Würtenberger
+# (c) 2016, 2017, 2018
+#
+# Licence APL2.0
+#
+###########################################################
+import logging
+import threading
+import numpy
+
+
+class ModelTiming:
+    logger = logging.getLogger(__name__)
+
+    # every point of a model run carries the timestamps of its stages in the modeling data. the timestamps are
+    # stored with the results in the analyse data, here they are collected for all points, solved or not, and
+    # summarised at the end of the run
+    TIMESTAMPS = ['TimeQueued',
+                  'TimeSlewStart',
+                  'TimeSlewEnd',
+                  'TimeSettleEnd',
+                  'TimeExposureStart',
+                  'TimeExposureEnd',
+                  'TimeDownloadEnd',
+                  'TimeSolveSubmit',
+                  'TimeSolveEnd',
+                  'TimeAccepted']
+    # stage name, start and end timestamp
+    STAGES = [('Slew', 'TimeSlewStart', 'TimeSlewEnd'),
+              ('Settle', 'TimeSlewEnd', 'TimeSettleEnd'),
+              ('Exposure', 'TimeExposureStart', 'TimeExposureEnd'),
+              ('Download', 'TimeExposureEnd', 'TimeDownloadEnd'),
+              ('Solve queue', 'TimeDownloadEnd', 'TimeSolveSubmit'),
+              ('Solve', 'TimeSolveSubmit', 'TimeSolveEnd'),
+              ('Accept', 'TimeSolveEnd', 'TimeAccepted')]
+    # idle time of a device between two points: end of use for the point before and start of use for the next one.
+    # the mount has to stand still until the exposure is finished
+    IDLE = [('Mount', 'TimeExposureEnd', 'TimeSlewStart'),
+            ('Camera', 'TimeDownloadEnd', 'TimeExposureStart'),
+            ('Solver', 'TimeSolveEnd', 'TimeSolveSubmit')]
+    # the time estimation works with the stages below. the slew is taken as ratio of the measured to the predicted
+    # slew time, so the distance of the remaining points counts. the stage times of the run are rolling medians,
+    # which are blended with the medians of former runs: the history counts like a number of points of this run
+    ESTIMATION_STAGES = ['Settle', 'Exposure', 'Download', 'Solve']
+    ROLLING_POINTS = 10
+    HISTORY_WEIGHT = 5
+    # the finish time is smoothed, so single slow points do not make it jump
+    ESTIMATION_SMOOTHING = 0.2
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.points = list()
+        self.history = dict()
+        self.timeFinished = None
+
+    def clear(self):
+        with self.lock:
+            self.points = list()
+            self.timeFinished = None
+
+    def addPoint(self, modelingData):
+        with self.lock:
+            point = {key: modelingData[key] for key in self.TIMESTAMPS if key in modelingData}
+            if 'PredictedSlewTime' in modelingData:
+                point['PredictedSlewTime'] = modelingData['PredictedSlewTime']
+            self.points.append(point)
+
+    def getStageDurations(self, points):
+        # points as list of dicts with the timestamps, returns arrays of the durations per estimation stage
+        durations = dict()
+        for name, start, end in self.STAGES:
+            if name in self.ESTIMATION_STAGES:
+                durations[name] = numpy.array([point[end] - point[start] for point in points if start in point and end in point])
+        durations['SlewRatio'] = numpy.array([(point['TimeSlewEnd'] - point['TimeSlewStart']) / point['PredictedSlewTime']
+                                              for point in points
+                                              if 'TimeSlewStart' in point and 'TimeSlewEnd' in point and point.get('PredictedSlewTime', 0) > 0])
+        return durations
+
+    def setHistory(self, dataList):
+        # data as list of analyse data, which are dicts of lists. older files without timestamps are skipped
+        points = list()
+        for data in dataList:
+            keys = [key for key in self.TIMESTAMPS + ['PredictedSlewTime'] if key in data]
+            if 'TimeSlewStart' not in keys:
+                continue
+            points += [dict(zip(keys, values)) for values in zip(*[data[key] for key in keys])]
+        history = dict()
+        for name, durations in self.getStageDurations(points).items():
+            if len(durations) > 0:
+                history[name] = float(numpy.median(durations))
+        self.history = history
+        self.logger.info('Stage time history from {0} points: {1}'.format(len(points), history))
+
+    def getStageEstimates(self, defaults):
+        # defaults as dict with the estimation stages and the slew ratio for the case without any data
+        with self.lock:
+            points = self.points[-self.ROLLING_POINTS:]
+        durations = self.getStageDurations(points)
+        estimates = dict()
+        for name, default in defaults.items():
+            number = len(durations.get(name, []))
+            if name in self.history:
+                value = self.history[name]
+                if number > 0:
+                    value = (number * float(numpy.median(durations[name])) + self.HISTORY_WEIGHT * value) / (number + self.HISTORY_WEIGHT)
+            elif number > 0:
+                value = float(numpy.median(durations[name]))
+            else:
+                value = default
+            estimates[name] = value
+        return estimates
+
+    def getTimeRemaining(self, predictedSlewTimes, indexSlewing, timeSlewing, defaults):
+        # predicted slew times of all points in the order of the run, index of the point, which is actually slewed
+        # to or imaged and time since its slew started. a point is finished after slew, settle and exposure, then
+        # the mount is free for the next point, while the camera downloads and the solver works in parallel. so
+        # each of the remaining points takes the longest of the chains and the last one adds download and solve
+        estimates = self.getStageEstimates(defaults)
+        slewTimes = numpy.asarray(predictedSlewTimes, dtype=float) * estimates['SlewRatio']
+        cycle = numpy.maximum(slewTimes[indexSlewing + 1:] + estimates['Settle'] + estimates['Exposure'],
+                              max(estimates['Exposure'] + estimates['Download'], estimates['Solve']))
+        timeRemaining = float(cycle.sum()) + estimates['Download'] + estimates['Solve']
+        if indexSlewing >= 0:
+            timeRemaining += max(0.0, slewTimes[indexSlewing] + estimates['Settle'] + estimates['Exposure'] - timeSlewing)
+        return timeRemaining
+
+    def getTimeFinished(self, timeNow, timeRemaining):
+        # smoothed finish time as epoch seconds
+        with self.lock:
+            if self.timeFinished is None:
+                self.timeFinished = timeNow + timeRemaining
+            else:
+                self.timeFinished += self.ESTIMATION_SMOOTHING * (timeNow + timeRemaining - self.timeFinished)
+            return self.timeFinished
+
+    def getTimestamps(self):
+        # array of points x timestamps in the order of the points, missing stamps are nan
+        with self.lock:
+            points = list(self.points)
+        values = numpy.full((len(points), len(self.TIMESTAMPS)), numpy.nan)
+        for i, point in enumerate(points):
+            for j, key in enumerate(self.TIMESTAMPS):
+                values[i, j] = point.get(key, numpy.nan)
+        values = values[numpy.argsort(values[:, self.TIMESTAMPS.index('TimeSlewStart')], kind='mergesort')]
+        return values
+
+    @staticmethod
+    def getStatistics(durations):
+        durations = durations[~numpy.isnan(durations)]
+        if len(durations) == 0:
+            return None
+        return {'Median': float(numpy.median(durations)),
+                'P95': float(numpy.percentile(durations, 95)),
+                'Total': float(durations.sum()),
+                'Number': len(durations)}
+
+    def getSummary(self):
+        values = self.getTimestamps()
+        summary = {'Stages': dict(), 'Idle': dict(), 'Overlap': 0.0, 'RunTime': 0.0}
+        if len(values) == 0:
+            return summary
+        column = {key: values[:, i] for i, key in enumerate(self.TIMESTAMPS)}
+        for name, start, end in self.STAGES:
+            summary['Stages'][name] = self.getStatistics(column[end] - column[start])
+        for name, end, start in self.IDLE:
+            summary['Idle'][name] = self.getStatistics(column[start][1:] - column[end][:-1])
+        # the overlap is the sum of the busy times of all points divided by the run time. without any parallel
+        # work it is 1, the better the stages overlap, the higher it is
+        busy = column['TimeSolveEnd'] - column['TimeSlewStart']
+        busy = busy[~numpy.isnan(busy)]
+        timeStart = numpy.nanmin(column['TimeSlewStart']) if not numpy.isnan(column['TimeSlewStart']).all() else numpy.nan
+        timeEnd = numpy.nanmax(column['TimeSolveEnd']) if not numpy.isnan(column['TimeSolveEnd']).all() else numpy.nan
+        if not numpy.isnan(timeStart) and not numpy.isnan(timeEnd) and timeEnd > timeStart:
+            summary['RunTime'] = float(timeEnd - timeStart)
+            summary['Overlap'] = float(busy.sum() / summary['RunTime'])
+        return summary
+
+    def getSummaryText(self, summary):
+        lines = ['Stage timing of {0:3.0f} s run, overlap {1:3.2f}'.format(summary['RunTime'], summary['Overlap'])]
+        for name, start, end in self.STAGES:
+            value = summary['Stages'].get(name)
+            if value:
+                lines.append('\t{0:12s} median {1:6.1f} s  p95 {2:6.1f} s  total {3:6.0f} s'.format(name, value['Median'], value['P95'], value['Total']))
+        for name, end, start in self.IDLE:
+            value = summary['Idle'].get(name)
+            if value:
+                lines.append('\t{0:12s} idle median {1:6.1f} s  p95 {2:6.1f} s  total {3:6.0f} s'.format(name, value['Median'], value['P95'], value['Total']))
+        return lines
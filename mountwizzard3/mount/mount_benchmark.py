@@ -0,0 +1,218 @@
+############################################################
+# -*- coding: utf-8 -*-
+#
+#       #   #  #   #   #  ####
+#      ##  ##  #  ##  #     #
+#     # # # #  # # # #     ###
+#    #  ##  #  ##  ##        #
+#   #   #   #  #   #     ####
+#
+# Python-based Tool for interaction with the 10micron mounts
+# GUI with PyQT5 for python
+# Python  v3.6.4
+#
+# Michael Würtenberger
+# (c) 2016, 2017, 2018
+#
+# Licence APL2.0
+#
+###########################################################
+import argparse
+import logging
+import queue
+import sys
+import time
+import unittest.mock
+import PyQt5
+import PyQt5.QtCore
+import PyQt5.QtNetwork
+from astrometry import transform
+from mount import mount_command
+from mount import mount_dispatcher
+from mount import mount_simulator
+
+# benchmark of the mount dispatcher with its runners and protocol engine against the local mount simulator. the
+# status cycle latency, alignment model upload and download time, command throughput and the reconnect behaviour
+# are measured without hardware. run from the mountwizzard3 directory:
+#   python3 -m mount.mount_benchmark --latency 0.005 --points 100
+
+
+class BenchmarkApp(PyQt5.QtCore.QObject):
+    # the parts of the main app the mount dispatcher and its runners need. there is no gui in the benchmark
+    signalMountSiteData = PyQt5.QtCore.pyqtSignal([str, str, str])
+    signalJulianDate = PyQt5.QtCore.pyqtSignal(float)
+    signalChangeStylesheet = PyQt5.QtCore.pyqtSignal(object, str, object)
+    signalSetMountStatus = PyQt5.QtCore.pyqtSignal(int)
+
+    def __init__(self):
+        super().__init__()
+        self.config = {}
+        self.mountCommandQueue = mount_command.MountCommandQueue()
+        self.messageQueue = queue.Queue()
+        self.audioCommandQueue = queue.Queue()
+        self.sharedMountDataLock = PyQt5.QtCore.QReadWriteLock()
+        self.sharedModelingDataLock = PyQt5.QtCore.QReadWriteLock()
+        self.sharedEnvironmentDataLock = PyQt5.QtCore.QReadWriteLock()
+        self.transform = transform.Transform(self)
+        self.ui = unittest.mock.MagicMock()
+        # no refraction updates, as there is no environment
+        self.ui.checkAutoRefractionNone.isChecked.return_value = True
+        self.ui.checkAutoRefractionContinous.isChecked.return_value = False
+        self.ui.checkAutoRefractionNotTracking.isChecked.return_value = False
+        self.workerModelingDispatcher = unittest.mock.MagicMock()
+        self.workerMountDispatcher = None
+
+
+class MountBenchmark:
+    logger = logging.getLogger(__name__)
+
+    TIMEOUT = 20
+
+    def __init__(self, simulator):
+        self.simulator = simulator
+        self.app = BenchmarkApp()
+        self.threadDispatcher = PyQt5.QtCore.QThread()
+        self.dispatcher = mount_dispatcher.MountDispatcher(self.app, self.threadDispatcher)
+        self.app.workerMountDispatcher = self.dispatcher
+        self.dispatcher.data['MountIP'] = simulator.host
+        self.dispatcher.data['MountPort'] = simulator.port
+        self.dispatcher.moveToThread(self.threadDispatcher)
+        self.threadDispatcher.started.connect(self.dispatcher.run)
+        self.protocol = self.dispatcher.workerMountProtocol
+
+    def start(self):
+        self.threadDispatcher.start()
+
+    def stop(self):
+        self.dispatcher.stop()
+
+    @staticmethod
+    def getStatistics(samples):
+        # returns number, mean, median, 95% and max of the samples in ms
+        samples = sorted(samples)
+        if len(samples) == 0:
+            return {'Number': 0, 'Mean': 0, 'Median': 0, 'P95': 0, 'Max': 0}
+        return {
+            'Number': len(samples),
+            'Mean': sum(samples) / len(samples) * 1000,
+            'Median': samples[len(samples) // 2] * 1000,
+            'P95': samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+            'Max': samples[-1] * 1000
+        }
+
+    def waitReady(self):
+        # the once runner makes the protocol engine ready after every new connection
+        timeStart = time.time()
+        while time.time() - timeStart < self.TIMEOUT:
+            if self.protocol.isReady():
+                return time.time() - timeStart
+            time.sleep(0.01)
+        raise TimeoutError('mount simulator not ready within {0} s'.format(self.TIMEOUT))
+
+    @staticmethod
+    def waitFuture(future, timeout):
+        timeStart = time.time()
+        future.result(timeout)
+        return time.time() - timeStart
+
+    def getStatusFast(self):
+        future = self.dispatcher.workerMountStatusRunnerFast.getStatusFast()
+        if future is None:
+            raise ConnectionError('mount simulator not ready')
+        return self.waitFuture(future, self.TIMEOUT)
+
+    def getAlignmentModel(self):
+        return self.waitFuture(self.dispatcher.workerMountGetAlignmentModel.getAlignmentModel(), self.TIMEOUT)
+
+    def setAlignmentModel(self, data):
+        duration = self.waitFuture(self.dispatcher.workerMountSetAlignmentModel.setAlignmentModel(data), self.TIMEOUT)
+        if not self.dispatcher.workerMountSetAlignmentModel.result:
+            raise ValueError('alignment model not accepted by the mount simulator')
+        return duration
+
+    @staticmethod
+    def getAlignmentData(number, siderealTime):
+        # modeling data in the format of the model build: mount coordinates, solved coordinates with an error of
+        # some arcsec and the sidereal time of each point
+        data = {'Index': [], 'RaJNow': [], 'DecJNow': [], 'Pierside': [], 'RaJNowSolved': [], 'DecJNowSolved': [],
+                'LocalSiderealTimeFloat': []}
+        for i in range(0, number):
+            data['Index'].append(i)
+            data['RaJNow'].append((siderealTime + i * 24.0 / max(number, 1) - 12) % 24)
+            data['DecJNow'].append(10.0 + i % 60)
+            data['Pierside'].append('W' if i % 2 else 'E')
+            data['RaJNowSolved'].append(data['RaJNow'][i])
+            data['DecJNowSolved'].append(data['DecJNow'][i] + (5 + i % 7) / 3600)
+            data['LocalSiderealTimeFloat'].append(siderealTime)
+        return data
+
+    def benchmarkStatusFast(self, number):
+        return [self.getStatusFast() for _ in range(0, number)]
+
+    def benchmarkAlignmentModel(self, number):
+        return [self.getAlignmentModel() for _ in range(0, number)]
+
+    def benchmarkSetAlignmentModel(self, number, numberPoints):
+        data = self.getAlignmentData(numberPoints, self.simulator.getLocalSiderealTime())
+        return [self.setAlignmentModel(data) for _ in range(0, number)]
+
+    def benchmarkStatusFastUnderLoad(self, number):
+        # fast status while the alignment model is downloaded in parallel
+        future = self.dispatcher.workerMountGetAlignmentModel.getAlignmentModel()
+        samples = self.benchmarkStatusFast(number)
+        future.result(self.TIMEOUT)
+        return samples
+
+    def benchmarkCommands(self, number):
+        timeStart = time.time()
+        futures = [self.app.mountCommandQueue.request(':Sz{0:03d}*00#'.format(i % 360)) for i in range(0, number)]
+        for future in futures:
+            future.result(self.TIMEOUT)
+        return (time.time() - timeStart) / max(number, 1)
+
+    def benchmarkReconnect(self, number):
+        samples = list()
+        for _ in range(0, number):
+            self.simulator.dropConnections()
+            timeStart = time.time()
+            while self.protocol.isReady() and time.time() - timeStart < self.TIMEOUT:
+                time.sleep(0.001)
+            self.waitReady()
+            samples.append(time.time() - timeStart)
+        return samples
+
+    def runAll(self, number, numberReconnect, numberPoints):
+        results = dict()
+        results['Connect'] = self.getStatistics([self.waitReady()])
+        results['StatusFast'] = self.getStatistics(self.benchmarkStatusFast(number))
+        results['StatusFastUnderLoad'] = self.getStatistics(self.benchmarkStatusFastUnderLoad(number))
+        results['AlignmentModel'] = self.getStatistics(self.benchmarkAlignmentModel(max(number // 20, 1)))
+        results['SetAlignmentModel'] = self.getStatistics(self.benchmarkSetAlignmentModel(max(number // 20, 1), numberPoints))
+        results['Command'] = self.getStatistics([self.benchmarkCommands(number)])
+        results['Reconnect'] = self.getStatistics(self.benchmarkReconnect(numberReconnect))
+        results['QueueToWire'] = self.protocol.getLatencyStatistics()
+        return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='mount protocol benchmark against the mount simulator')
+    parser.add_argument('--latency', type=float, default=0.0, help='reply latency of the simulator in seconds')
+    parser.add_argument('--points', type=int, default=100, help='number of alignment points in the simulator')
+    parser.add_argument('--number', type=int, default=200, help='number of status cycles')
+    parser.add_argument('--reconnect', type=int, default=3, help='number of dropped connections')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s [%(levelname)s] %(message)s')
+    application = PyQt5.QtCore.QCoreApplication(sys.argv)
+    simulator = mount_simulator.MountSimulator(port=0, latency=args.latency)
+    simulator.alignPoints = [{'HA': (i * 24.0 / max(args.points, 1)) % 24, 'Dec': 10 + i % 60, 'Error': 5.0 + i % 7, 'Angle': (i * 37) % 360}
+                             for i in range(0, args.points)]
+    simulator.start()
+    benchmark = MountBenchmark(simulator)
+    benchmark.start()
+    try:
+        results = benchmark.runAll(args.number, args.reconnect, args.points)
+        for key in results:
+            print('{0:20s} {1}'.format(key, results[key]))
+    finally:
+        benchmark.stop()
+        simulator.stop()
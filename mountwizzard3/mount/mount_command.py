@@ -20,18 +20,46 @@
 import logging
 import PyQt5
 import time
+import concurrent.futures
+from queue import Queue
+
+
+class MountCommandQueue(Queue):
+    # queue for the user commands to the mount. every command gets the time stamp when it was put, and the command
+    # runner is woken up immediately through its signal instead of polling the queue in a timer
+    def __init__(self):
+        super().__init__()
+        self.signalPut = None
+
+    def put(self, item, block=True, timeout=None):
+        super().put((time.time(), item), block, timeout)
+        if self.signalPut is not None:
+            self.signalPut.emit()
+
+    def request(self, command):
+        # puts a command, where the reply is needed. instead of polling the reply, the caller gets a future, which
+        # is resolved with the reply or raises the error (unknown command, timeout, lost connection)
+        commandSet = {'command': command, 'reply': '', 'future': concurrent.futures.Future()}
+        self.put(commandSet)
+        return commandSet['future']
 
 
 class MountCommandRunner(PyQt5.QtCore.QObject):
     logger = logging.getLogger(__name__)
 
-    CONNECTION_TIMEOUT = 3000
-    CYCLE = 250
     signalDestruct = PyQt5.QtCore.pyqtSignal()
+    signalCommandQueued = PyQt5.QtCore.pyqtSignal()
+    signalSlewStarted = PyQt5.QtCore.pyqtSignal()
+    # commands, which start a movement of the mount. when the mount has accepted them, the fast status runner is
+    # told to watch the end of the slew
+    # slew commands are found at the end of a command, so bundles like ':PO#:hP#' for parking count as well
+    SLEW_COMMANDS = [':MS#', ':MA#', ':FLIP#', ':hP#']
+    # start of the reply, when the mount accepted the slew. park has no reply
+    SLEW_ACCEPTED = {':MS#': '0', ':MA#': '0', ':FLIP#': '1', ':hP#': ''}
     # define the number of bytes for the return bytes in case of not having them in bulk mode
     # this is needed, because the mount computer  doesn't support a transaction base like number of
     # bytes to be expected. it's just plain data and i have to find out myself how much it is.
-    # due to the fact i'm doing multi threading with multi connections some of the commands run in parallel
+    # the table is used by the protocol engine for framing the replies of single commands
     COMMAND_RETURN = {':AP#': 0,
                       ':hP#': 0,
                       ':PO#': 0,
@@ -71,23 +99,15 @@ class MountCommandRunner(PyQt5.QtCore.QObject):
                       ':newalpt': 1,
                       ':CMCFG': 1}
 
-    def __init__(self, app, thread, data, signalConnected, mountStatus):
+    def __init__(self, app, protocol, data, mountStatus):
         super().__init__()
 
         self.app = app
-        self.thread = thread
+        self.protocol = protocol
         self.data = data
-        self.signalConnected = signalConnected
         self.mountStatus = mountStatus
         self.mutexIsRunning = PyQt5.QtCore.QMutex()
         self.isRunning = False
-        self.connectCounter = 0
-        self.socket = None
-        self.sendLock = False
-        self.cycleTimer = None
-        self.messageString = ''
-        self.numberBytesToReceive = -1
-        self.commandSet = dict()
 
     def run(self):
         self.logger.info('mount command started')
@@ -95,141 +115,81 @@ class MountCommandRunner(PyQt5.QtCore.QObject):
         if not self.isRunning:
             self.isRunning = True
         self.mutexIsRunning.unlock()
-        self.socket = PyQt5.QtNetwork.QTcpSocket()
-        self.socket.setSocketOption(PyQt5.QtNetwork.QAbstractSocket.LowDelayOption, 1)
-        self.socket.setSocketOption(PyQt5.QtNetwork.QAbstractSocket.KeepAliveOption, 1)
-        self.socket.hostFound.connect(self.handleHostFound)
-        self.socket.connected.connect(self.handleConnected)
-        self.socket.stateChanged.connect(self.handleStateChanged)
-        self.socket.disconnected.connect(self.handleDisconnect)
-        self.socket.error.connect(self.handleError)
-        self.socket.readyRead.connect(self.handleReadyRead)
-
         self.signalDestruct.connect(self.destruct, type=PyQt5.QtCore.Qt.BlockingQueuedConnection)
-        self.cycleTimer = PyQt5.QtCore.QTimer(self)
-        self.cycleTimer.setSingleShot(False)
-        self.cycleTimer.timeout.connect(self.doCommand)
-        self.cycleTimer.start(self.CYCLE)
+        self.signalCommandQueued.connect(self.doCommand)
+        self.app.mountCommandQueue.signalPut = self.signalCommandQueued
+        # commands, which were put before start
+        self.doCommand()
 
     def stop(self):
         self.mutexIsRunning.lock()
         if self.isRunning:
             self.isRunning = False
             self.signalDestruct.emit()
-            self.signalConnected.emit({'Command': False})
-            self.thread.quit()
-            self.thread.wait()
         self.mutexIsRunning.unlock()
         self.logger.info('mount command stopped')
 
     @PyQt5.QtCore.pyqtSlot()
     def destruct(self):
-        self.cycleTimer.stop()
+        self.app.mountCommandQueue.signalPut = None
+        self.signalCommandQueued.disconnect(self.doCommand)
         self.signalDestruct.disconnect(self.destruct)
-        self.socket.hostFound.disconnect(self.handleHostFound)
-        self.socket.connected.disconnect(self.handleConnected)
-        self.socket.stateChanged.disconnect(self.handleStateChanged)
-        self.socket.disconnected.disconnect(self.handleDisconnect)
-        self.socket.error.disconnect(self.handleError)
-        self.socket.readyRead.disconnect(self.handleReadyRead)
-        self.socket.abort()
 
+    @PyQt5.QtCore.pyqtSlot()
     def doCommand(self):
-        self.doReconnect()
-        if not self.app.mountCommandQueue.empty() and (self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState) and not self.sendLock:
-            rawCommand = self.app.mountCommandQueue.get()
+        # all queued commands are handed over to the protocol engine, which keeps their order and writes the next
+        # one as soon as the reply of the previous one has arrived
+        while not self.app.mountCommandQueue.empty() and self.isRunning:
+            timeQueued, rawCommand = self.app.mountCommandQueue.get()
             if isinstance(rawCommand, str):
                 # only a single command without return needed
-                command = rawCommand
+                callback = None
+                errorCallback = None
+                slewCommand = self.getSlewCommand(rawCommand)
+                if slewCommand:
+                    callback = lambda message, c=slewCommand: self.handleSlewReply(c, message)
+                    # without error callback a failed job gets an empty reply, which is no slew
+                    errorCallback = lambda error: None
+                self.protocol.addJob('Command', rawCommand, self.protocol.PRIORITY_COMMAND, callback=callback,
+                                     errorCallback=errorCallback, timeQueued=timeQueued)
             elif isinstance(rawCommand, dict):
-                self.commandSet = rawCommand
-                command = rawCommand['command']
+                commandSet = rawCommand
+                job = self.protocol.addJob('Command', commandSet['command'], self.protocol.PRIORITY_COMMAND,
+                                           callback=lambda message, c=commandSet: self.handleCommandReply(c, message),
+                                           errorCallback=lambda error, c=commandSet: self.handleError(c, error),
+                                           timeQueued=timeQueued)
+                if job is None:
+                    self.handleError(commandSet, ValueError('Command {0} not known'.format(commandSet['command'])))
             else:
-                command = ''
                 self.logger.error('Mount RunnerCommand received command {0} wrong type: {1}'.format(rawCommand, type(rawCommand)))
-            if len(command) > 0:
-                # determine how many bytes to receive
-                self.numberBytesToReceive = -1
-                for key in self.COMMAND_RETURN:
-                    if command.startswith(key):
-                        self.numberBytesToReceive = self.COMMAND_RETURN[key]
-                        break
-                if self.numberBytesToReceive == -1:
-                    self.logger.error('Command >(0)< not known'.format(command))
-                elif self.numberBytesToReceive > 0:
-                    self.sendLock = True
-                    self.sendCommand(command)
-                else:
-                    self.sendLock = False
-                    self.sendCommand(command)
-
-    def doReconnect(self):
-        # to get order in connections, we wait for first connecting the once type
-        if self.mountStatus['Once'] and self.data['FW'] > 0:
-            if self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.UnconnectedState:
-                if self.connectCounter == 0:
-                    self.app.sharedMountDataLock.lockForRead()
-                    self.socket.connectToHost(self.data['MountIP'], self.data['MountPort'])
-                    self.app.sharedMountDataLock.unlock()
-                else:
-                    # connection build up is ongoing
-                    pass
-                if self.connectCounter * self.CYCLE > self.CONNECTION_TIMEOUT:
-                    self.socket.abort()
-                    self.connectCounter = 0
-                else:
-                    self.connectCounter += 1
-            else:
-                if self.socket.state() != PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
-                    if self.connectCounter * self.CYCLE > self.CONNECTION_TIMEOUT:
-                        self.socket.abort()
-                        self.connectCounter = 0
-                    else:
-                        self.connectCounter += 1
-                else:
-                    # connected
-                    pass
-
-    @PyQt5.QtCore.pyqtSlot()
-    def handleHostFound(self):
-        self.app.sharedMountDataLock.lockForRead()
-        self.logger.debug('Mount RunnerCommand found at {}:{}'.format(self.data['MountIP'], self.data['MountPort']))
-        self.app.sharedMountDataLock.unlock()
 
-    @PyQt5.QtCore.pyqtSlot()
-    def handleConnected(self):
-        self.signalConnected.emit({'Command': True})
-        self.app.sharedMountDataLock.lockForRead()
-        self.logger.info('Mount RunnerCommand connected at {0}:{1}'.format(self.data['MountIP'], self.data['MountPort']))
-        self.app.sharedMountDataLock.unlock()
-
-    @PyQt5.QtCore.pyqtSlot(PyQt5.QtNetwork.QAbstractSocket.SocketError)
-    def handleError(self, socketError):
-        self.logger.warning('Mount RunnerCommand connection fault: {0}'.format(socketError))
-
-    @PyQt5.QtCore.pyqtSlot()
-    def handleStateChanged(self):
-        self.logger.debug('Mount RunnerCommand connection has state: {0}'.format(self.socket.state()))
-
-    @PyQt5.QtCore.pyqtSlot()
-    def handleDisconnect(self):
-        self.logger.info('Mount RunnerCommand connection is disconnected from host')
-        self.signalConnected.emit({'Command': False})
-
-    @PyQt5.QtCore.pyqtSlot()
-    def handleReadyRead(self):
-        while (len(self.messageString) < self.numberBytesToReceive) and self.isRunning:
-            self.messageString += self.socket.read(1024).decode()
-        messageToProcess = self.messageString
-        self.messageString = ''
-        self.commandSet['reply'] = messageToProcess.rstrip('#')
-        self.sendLock = False
-
-    def sendCommand(self, command):
-        if self.isRunning:
-            if self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
-                self.socket.write(bytes(command + '\r', encoding='ascii'))
-                self.socket.flush()
-            else:
-                self.sendLock = False
-                self.logger.warning('Socket CommandRunner not connected')
+    def getSlewCommand(self, command):
+        # returns the slew command, which ends the command, or ''
+        for slewCommand in self.SLEW_COMMANDS:
+            if command.endswith(slewCommand):
+                return slewCommand
+        return ''
+
+    def handleSlewReply(self, command, messageToProcess):
+        # the fast polling is only started for a slew, which the mount accepted
+        if messageToProcess.startswith(self.SLEW_ACCEPTED[command]):
+            self.signalSlewStarted.emit()
+        else:
+            self.logger.info('Mount did not accept {0}, reply: {1}'.format(command, messageToProcess))
+
+    def handleCommandReply(self, commandSet, messageToProcess):
+        slewCommand = self.getSlewCommand(commandSet['command'])
+        if slewCommand:
+            self.handleSlewReply(slewCommand, messageToProcess)
+        self.handleReply(commandSet, messageToProcess)
+
+    @staticmethod
+    def handleReply(commandSet, messageToProcess):
+        commandSet['reply'] = messageToProcess.rstrip('#')
+        if 'future' in commandSet:
+            commandSet['future'].set_result(commandSet['reply'])
+
+    @staticmethod
+    def handleError(commandSet, error):
+        if 'future' in commandSet:
+            commandSet['future'].set_exception(error)
@@ -23,6 +23,7 @@ import PyQt5
 import queue
 import math
 import copy
+from mount import mount_protocol
 from mount import mount_command
 from mount import mount_statusfast
 from mount import mount_statusmedium
@@ -34,7 +35,6 @@ from mount import mount_getmodelnames
 from mount import mount_modelhandling
 from analyse import analysedata
 from baseclasses import checkIP
-from astrometry import transform
 
 
 class MountDispatcher(PyQt5.QtCore.QThread):
@@ -51,8 +51,12 @@ class MountDispatcher(PyQt5.QtCore.QThread):
     signalMountShowAlignmentModel = PyQt5.QtCore.pyqtSignal()
     signalMountShowModelNames = PyQt5.QtCore.pyqtSignal()
     signalSlewFinished = PyQt5.QtCore.pyqtSignal()
+    signalMountSettled = PyQt5.QtCore.pyqtSignal(float)
 
     CYCLE = 200
+    # timeouts in seconds for waiting on replies of the mount
+    COMMAND_TIMEOUT = 10
+    MODEL_TIMEOUT = 30
     signalDestruct = PyQt5.QtCore.pyqtSignal()
 
     statusReference = {
@@ -109,58 +113,45 @@ class MountDispatcher(PyQt5.QtCore.QThread):
         # getting all supporting classes assigned
         self.mountModelHandling = mount_modelhandling.MountModelHandling(self.app, self.data)
         self.analyse = analysedata.Analyse(self.app)
-        self.transform = transform.Transform(self.app)
+        self.transform = self.app.transform
         self.checkIP = checkIP.CheckIP()
 
         # getting all threads setup
-        # commands sending thread
-        self.threadMountCommandRunner = PyQt5.QtCore.QThread()
-        self.workerMountCommandRunner = mount_command.MountCommandRunner(self.app, self.threadMountCommandRunner, self.data, self.signalMountConnected, self.mountStatus)
-        self.threadMountCommandRunner.setObjectName("MountCommandRunner")
-        self.workerMountCommandRunner.moveToThread(self.threadMountCommandRunner)
-        self.threadMountCommandRunner.started.connect(self.workerMountCommandRunner.run)
-        # fast status thread
-        self.threadMountStatusRunnerFast = PyQt5.QtCore.QThread()
-        self.workerMountStatusRunnerFast = mount_statusfast.MountStatusRunnerFast(self.app, self.threadMountStatusRunnerFast, self.data, self.signalMountConnected, self.mountStatus)
-        self.threadMountStatusRunnerFast.setObjectName("MountStatusRunnerFast")
-        self.workerMountStatusRunnerFast.moveToThread(self.threadMountStatusRunnerFast)
-        self.threadMountStatusRunnerFast.started.connect(self.workerMountStatusRunnerFast.run)
-        # medium status thread
-        self.threadMountStatusRunnerMedium = PyQt5.QtCore.QThread()
-        self.workerMountStatusRunnerMedium = mount_statusmedium.MountStatusRunnerMedium(self.app, self.threadMountStatusRunnerMedium, self.data, self.signalMountConnected, self.mountStatus)
-        self.threadMountStatusRunnerMedium.setObjectName("MountStatusRunnerMedium")
-        self.workerMountStatusRunnerMedium.moveToThread(self.threadMountStatusRunnerMedium)
-        self.threadMountStatusRunnerMedium.started.connect(self.workerMountStatusRunnerMedium.run)
-        # slow status thread
-        self.threadMountStatusRunnerSlow = PyQt5.QtCore.QThread()
-        self.workerMountStatusRunnerSlow = mount_statusslow.MountStatusRunnerSlow(self.app, self.threadMountStatusRunnerSlow, self.data, self.signalMountConnected, self.mountStatus)
-        self.threadMountStatusRunnerSlow.setObjectName("MountStatusRunnerSlow")
-        self.workerMountStatusRunnerSlow.moveToThread(self.threadMountStatusRunnerSlow)
-        self.threadMountStatusRunnerSlow.started.connect(self.workerMountStatusRunnerSlow.run)
-        # once status thread
-        self.threadMountStatusRunnerOnce = PyQt5.QtCore.QThread()
-        self.workerMountStatusRunnerOnce = mount_statusonce.MountStatusRunnerOnce(self.app, self.threadMountStatusRunnerOnce, self.data, self.signalMountConnected, self.mountStatus)
-        self.threadMountStatusRunnerOnce.setObjectName("MountStatusRunnerOnce")
-        self.workerMountStatusRunnerOnce.moveToThread(self.threadMountStatusRunnerOnce)
-        self.threadMountStatusRunnerOnce.started.connect(self.workerMountStatusRunnerOnce.run)
+        # one protocol engine owns the connections to the mount, all runners are clients of it and share its thread
+        self.threadMountProtocol = PyQt5.QtCore.QThread()
+        self.workerMountProtocol = mount_protocol.MountProtocol(self.app, self.threadMountProtocol, self.data, self.signalMountConnected, self.mountStatus)
+        self.threadMountProtocol.setObjectName("MountProtocol")
+        self.workerMountProtocol.moveToThread(self.threadMountProtocol)
+        self.threadMountProtocol.started.connect(self.workerMountProtocol.run)
+        # commands sending
+        self.workerMountCommandRunner = mount_command.MountCommandRunner(self.app, self.workerMountProtocol, self.data, self.mountStatus)
+        # fast status
+        self.workerMountStatusRunnerFast = mount_statusfast.MountStatusRunnerFast(self.app, self.workerMountProtocol, self.data, self.mountStatus)
+        # medium status
+        self.workerMountStatusRunnerMedium = mount_statusmedium.MountStatusRunnerMedium(self.app, self.workerMountProtocol, self.data, self.mountStatus)
+        # slow status
+        self.workerMountStatusRunnerSlow = mount_statusslow.MountStatusRunnerSlow(self.app, self.workerMountProtocol, self.data, self.mountStatus)
+        # once status
+        self.workerMountStatusRunnerOnce = mount_statusonce.MountStatusRunnerOnce(self.app, self.workerMountProtocol, self.data, self.mountStatus)
         # get alignment model
-        self.threadMountGetAlignmentModel = PyQt5.QtCore.QThread()
-        self.workerMountGetAlignmentModel = mount_getalignmodel.MountGetAlignmentModel(self.app, self.threadMountGetAlignmentModel, self.data, self.signalMountConnected, self.mountStatus)
-        self.threadMountGetAlignmentModel.setObjectName("MountGetAlignmentModel")
-        self.workerMountGetAlignmentModel.moveToThread(self.threadMountGetAlignmentModel)
-        self.threadMountGetAlignmentModel.started.connect(self.workerMountGetAlignmentModel.run)
+        self.workerMountGetAlignmentModel = mount_getalignmodel.MountGetAlignmentModel(self.app, self.workerMountProtocol, self.data, self.mountStatus)
         # set alignment model
-        self.threadMountSetAlignmentModel = PyQt5.QtCore.QThread()
-        self.workerMountSetAlignmentModel = mount_setalignmodel.MountSetAlignmentModel(self.app, self.threadMountSetAlignmentModel, self.data, self.signalMountConnected, self.mountStatus)
-        self.threadMountSetAlignmentModel.setObjectName("MountSetAlignmentModel")
-        self.workerMountSetAlignmentModel.moveToThread(self.threadMountSetAlignmentModel)
-        self.threadMountSetAlignmentModel.started.connect(self.workerMountSetAlignmentModel.run)
+        self.workerMountSetAlignmentModel = mount_setalignmodel.MountSetAlignmentModel(self.app, self.workerMountProtocol, self.data, self.mountStatus)
         # get model names
-        self.threadMountGetModelNames = PyQt5.QtCore.QThread()
-        self.workerMountGetModelNames = mount_getmodelnames.MountGetModelNames(self.app, self.threadMountGetModelNames, self.data, self.signalMountConnected, self.mountStatus)
-        self.threadMountGetModelNames.setObjectName("MountGetModelNames")
-        self.workerMountGetModelNames.moveToThread(self.threadMountGetModelNames)
-        self.threadMountGetModelNames.started.connect(self.workerMountGetModelNames.run)
+        self.workerMountGetModelNames = mount_getmodelnames.MountGetModelNames(self.app, self.workerMountProtocol, self.data, self.mountStatus)
+        self.mountRunners = [self.workerMountCommandRunner,
+                             self.workerMountStatusRunnerOnce,
+                             self.workerMountGetModelNames,
+                             self.workerMountGetAlignmentModel,
+                             self.workerMountSetAlignmentModel,
+                             self.workerMountStatusRunnerSlow,
+                             self.workerMountStatusRunnerMedium,
+                             self.workerMountStatusRunnerFast]
+        # accepted slew commands switch the fast status to high rate until the end of the slew is seen
+        self.workerMountCommandRunner.signalSlewStarted.connect(self.workerMountStatusRunnerFast.startSlewMonitoring)
+        for runner in self.mountRunners:
+            runner.moveToThread(self.threadMountProtocol)
+            self.threadMountProtocol.started.connect(runner.run)
 
         self.cancelRunTargetRMS = False
         self.runTargetRMS = False
@@ -302,28 +293,16 @@ class MountDispatcher(PyQt5.QtCore.QThread):
         if self.isRunning:
             # stopping thread for chang of parameters
             self.logger.info('Stopping threads for IP change')
-            self.workerMountStatusRunnerFast.stop()
-            self.workerMountStatusRunnerMedium.stop()
-            self.workerMountStatusRunnerSlow.stop()
-            self.workerMountStatusRunnerOnce.stop()
-            self.workerMountGetAlignmentModel.stop()
-            self.workerMountSetAlignmentModel.stop()
-            self.workerMountCommandRunner.stop()
-            self.workerMountGetModelNames.stop()
+            for runner in self.mountRunners:
+                runner.stop()
+            self.workerMountProtocol.stop()
             self.app.sharedMountDataLock.lockForWrite()
             self.data['MountIP'] = self.app.ui.le_mountIP.text()
             self.data['MountMAC'] = self.app.ui.le_mountMAC.text()
             self.logger.info('Setting IP address for mount to: {0}'.format(self.data['MountIP']))
             self.app.sharedMountDataLock.unlock()
             # and restarting for using new parameters
-            self.threadMountCommandRunner.start()
-            self.threadMountGetModelNames.start()
-            self.threadMountSetAlignmentModel.start()
-            self.threadMountGetAlignmentModel.start()
-            self.threadMountStatusRunnerOnce.start()
-            self.threadMountStatusRunnerSlow.start()
-            self.threadMountStatusRunnerMedium.start()
-            self.threadMountStatusRunnerFast.start()
+            self.threadMountProtocol.start()
         else:
             self.logger.info('IP change when threads not running')
             self.app.sharedMountDataLock.lockForWrite()
@@ -342,14 +321,7 @@ class MountDispatcher(PyQt5.QtCore.QThread):
         if not self.isRunning:
             self.isRunning = True
         self.mutexIsRunning.unlock()
-        self.threadMountCommandRunner.start()
-        self.threadMountSetAlignmentModel.start()
-        self.threadMountGetModelNames.start()
-        self.threadMountGetAlignmentModel.start()
-        self.threadMountStatusRunnerOnce.start()
-        self.threadMountStatusRunnerSlow.start()
-        self.threadMountStatusRunnerMedium.start()
-        self.threadMountStatusRunnerFast.start()
+        self.threadMountProtocol.start()
         self.signalDestruct.connect(self.destruct, type=PyQt5.QtCore.Qt.BlockingQueuedConnection)
         self.cycleTimer = PyQt5.QtCore.QTimer(self)
         self.cycleTimer.setSingleShot(False)
@@ -370,14 +342,9 @@ class MountDispatcher(PyQt5.QtCore.QThread):
     @PyQt5.QtCore.pyqtSlot()
     def destruct(self):
         self.cycleTimer.stop()
-        self.workerMountStatusRunnerFast.stop()
-        self.workerMountStatusRunnerMedium.stop()
-        self.workerMountStatusRunnerSlow.stop()
-        self.workerMountStatusRunnerOnce.stop()
-        self.workerMountGetAlignmentModel.stop()
-        self.workerMountSetAlignmentModel.stop()
-        self.workerMountGetModelNames.stop()
-        self.workerMountCommandRunner.stop()
+        for runner in self.mountRunners:
+            runner.stop()
+        self.workerMountProtocol.stop()
         self.signalDestruct.disconnect(self.destruct)
         self.app.ui.le_mountIP.editingFinished.disconnect(self.changedSettings)
 
@@ -545,29 +512,35 @@ class MountDispatcher(PyQt5.QtCore.QThread):
 
     def mountShutdown(self):
         # mount has to run
-        if self.workerMountCommandRunner.socket.state() != PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
+        if not self.workerMountProtocol.isConnected():
             return
-        commandSet = {'command': ':shutdown#', 'reply': ''}
-        self.app.mountCommandQueue.put(commandSet)
-        while len(commandSet['reply']) == 0:
-            time.sleep(0.1)
-        if commandSet['reply'] == '1':
-            self.workerMountCommandRunner.connected = False
-            time.sleep(1)
+        future = self.app.mountCommandQueue.request(':shutdown#')
+        future.add_done_callback(self.handleMountShutdown)
+
+    def handleMountShutdown(self, future):
+        try:
+            reply = future.result()
+        except Exception as e:
+            reply = '{0}'.format(e)
+        if reply == '1':
             self.logger.info('Shutdown mount manually')
             self.app.messageQueue.put('Shutting mount down !\n')
         else:
-            self.logger.error('error: {0}'.format(commandSet['reply']))
+            self.logger.error('error: {0}'.format(reply))
             self.app.messageQueue.put('#BRError in mount shutdown\n')
 
     def flipMount(self):
-        commandSet = {'command': ':FLIP#', 'reply': ''}
-        self.app.mountCommandQueue.put(commandSet)
-        while len(commandSet['reply']) == 0:
-            time.sleep(0.1)
-        if commandSet['reply'] == '0':
+        future = self.app.mountCommandQueue.request(':FLIP#')
+        future.add_done_callback(self.handleFlipMount)
+
+    def handleFlipMount(self, future):
+        try:
+            reply = future.result()
+        except Exception as e:
+            reply = '{0}'.format(e)
+        if reply != '1':
             self.app.messageQueue.put('#BRFlip Mount could not be executed\n')
-            self.logger.error('error: {0}'.format(commandSet['reply']))
+            self.logger.error('error: {0}'.format(reply))
 
     def syncMountModel(self, ra, dec):
         self.logger.info('ra:{0} dec:{1}'.format(ra, dec))
@@ -575,11 +548,13 @@ class MountDispatcher(PyQt5.QtCore.QThread):
         self.app.mountCommandQueue.put(':Sd{0}#'.format(dec))
         self.app.mountCommandQueue.put(':CMCFG0#')
         # send sync command
-        commandSet = {'command': ':CM#', 'reply': ''}
-        self.app.mountCommandQueue.put(commandSet)
-        while len(commandSet['reply']) == 0:
-            time.sleep(0.1)
-        if commandSet['reply'][:5] == 'Coord':
+        future = self.app.mountCommandQueue.request(':CM#')
+        try:
+            reply = future.result(timeout=self.COMMAND_TIMEOUT)
+        except Exception as e:
+            self.logger.warning('Error in sync mount modeling: {0}'.format(e))
+            return False
+        if reply[:5] == 'Coord':
             self.logger.info('Mount modeling synced')
             return True
         else:
@@ -589,23 +564,25 @@ class MountDispatcher(PyQt5.QtCore.QThread):
     def programBatchData(self, data):
         if not('RaJNow' in data and 'DecJNow' in data):
             self.logger.warning('RaJNow or DecJNow not in data file')
-            self.messageQueue.put('Mount coordinates missing\n')
+            self.app.messageQueue.put('Mount coordinates missing\n')
             return
         if not('RaJNowSolved' in data and 'DecJNowSolved' in data):
             self.logger.warning('RaJNowSolved or DecJNowSolved not in data file')
-            self.messageQueue.put('Solved data missing\n')
+            self.app.messageQueue.put('Solved data missing\n')
             return
         if not('Pierside' in data and 'LocalSiderealTimeFloat' in data):
             self.logger.warning('Pierside and LocalSiderealTimeFloat not in data file')
-            self.messageQueue.put('Time and Pierside missing\n')
+            self.app.messageQueue.put('Time and Pierside missing\n')
             return
         self.app.messageQueue.put('#BWProgramming alignment model data\n')
-        self.workerMountSetAlignmentModel.result = None
-        self.workerMountSetAlignmentModel.setAlignmentModel(data)
-        while self.workerMountSetAlignmentModel.result is None:
-            time.sleep(0.1)
-            PyQt5.QtWidgets.QApplication.processEvents()
-        if self.workerMountSetAlignmentModel.result:
+        future = self.workerMountSetAlignmentModel.setAlignmentModel(data)
+        try:
+            future.result(timeout=self.MODEL_TIMEOUT)
+            result = self.workerMountSetAlignmentModel.result
+        except Exception as e:
+            self.logger.warning('Programming alignment model got error: {0}'.format(e))
+            result = False
+        if result:
             self.logger.info('Model successful finished!')
             self.app.messageQueue.put('#BWProgrammed alignment model with {0} points\n'.format(len(data['Index'])))
         else:
@@ -640,20 +617,18 @@ class MountDispatcher(PyQt5.QtCore.QThread):
         self.runTargetRMS = False
 
     def reloadAlignmentModel(self):
-        self.workerMountGetAlignmentModel.getAlignmentModel()
-        # wait form alignment model to be downloaded
-        while True:
-            self.app.sharedMountDataLock.lockForRead()
-            condition = not self.data['ModelLoading']
-            self.app.sharedMountDataLock.unlock()
-            if condition:
-                break
-            time.sleep(0.2)
+        # wait for alignment model to be downloaded
+        future = self.workerMountGetAlignmentModel.getAlignmentModel()
+        try:
+            future.result(timeout=self.MODEL_TIMEOUT)
+        except Exception as e:
+            self.logger.warning('Alignment model could not be reloaded: {0}'.format(e))
 
     def deleteWorstPoint(self):
         # if there are less than 4 point, optimization can't take place
         self.app.sharedMountDataLock.lockForRead()
         if self.data['Number'] < 4:
+            self.app.sharedMountDataLock.unlock()
             return True
         # find worst point
         maxError = 0
@@ -668,28 +643,20 @@ class MountDispatcher(PyQt5.QtCore.QThread):
                                           self.data['ModelAltitude'][worstPointIndex],
                                           maxError))
         self.app.sharedMountDataLock.unlock()
-        commandSet = {'command': ':delalst{0:d}#'.format(worstPointIndex + 1), 'reply': ''}
-        self.app.mountCommandQueue.put(commandSet)
-        while len(commandSet['reply']) == 0:
-            time.sleep(0.1)
-        time.sleep(0.2)
-        if commandSet['reply'] == '1':
+        future = self.app.mountCommandQueue.request(':delalst{0:d}#'.format(worstPointIndex + 1))
+        try:
+            reply = future.result(timeout=self.COMMAND_TIMEOUT)
+        except Exception as e:
+            reply = '{0}'.format(e)
+        if reply == '1':
             # point could be deleted, feedback from mount ok
             self.logger.info('Deleting worst point {0} with error of:  {1}'.format(worstPointIndex+1, maxError))
             # get new calculated alignment model from mount
             self.app.messageQueue.put('\tPoint deleted\n')
         else:
             self.app.messageQueue.put('#BR\tPoint could not be deleted \n')
-            self.logger.warning('Point {0} could not be deleted'.format(worstPointIndex))
-        self.workerMountGetAlignmentModel.getAlignmentModel()
-        # wait form alignment model to be downloaded
-        while True:
-            self.app.sharedMountDataLock.lockForRead()
-            condition = not self.data['ModelLoading']
-            self.app.sharedMountDataLock.unlock()
-            if condition:
-                break
-            time.sleep(0.2)
+            self.logger.warning('Point {0} could not be deleted, reply: {1}'.format(worstPointIndex, reply))
+        self.reloadAlignmentModel()
 
     def retrofitMountData(self, modelingData):
         self.app.sharedMountDataLock.lockForRead()
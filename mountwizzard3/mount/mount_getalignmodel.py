@@ -20,34 +20,24 @@
 import logging
 import PyQt5
 import time
-from queue import Queue
-from astrometry import transform
 
 
 class MountGetAlignmentModel(PyQt5.QtCore.QObject):
     logger = logging.getLogger(__name__)
 
-    CONNECTION_TIMEOUT = 3000
-    CYCLE = 250
+    REPLY_TIMEOUT = 15000
     signalDestruct = PyQt5.QtCore.pyqtSignal()
 
-    def __init__(self, app, thread, data, signalConnected, mountStatus):
+    def __init__(self, app, protocol, data, mountStatus):
         super().__init__()
 
         self.app = app
-        self.thread = thread
+        self.protocol = protocol
         self.data = data
-        self.signalConnected = signalConnected
         self.mountStatus = mountStatus
         self.mutexIsRunning = PyQt5.QtCore.QMutex()
         self.isRunning = False
-        self.connectCounter = 0
-        self.socket = None
-        self.sendLock = False
-        self.cycleTimer = None
-        self.messageString = ''
-        self.sendCommandQueue = Queue()
-        self.transform = transform.Transform(self.app)
+        self.transform = self.app.transform
 
     def run(self):
         self.logger.info('mount get align started')
@@ -55,144 +45,56 @@ class MountGetAlignmentModel(PyQt5.QtCore.QObject):
         if not self.isRunning:
             self.isRunning = True
         self.mutexIsRunning.unlock()
-        self.socket = PyQt5.QtNetwork.QTcpSocket()
-        self.socket.setSocketOption(PyQt5.QtNetwork.QAbstractSocket.LowDelayOption, 1)
-        self.socket.setSocketOption(PyQt5.QtNetwork.QAbstractSocket.KeepAliveOption, 1)
-        self.socket.hostFound.connect(self.handleHostFound)
-        self.socket.connected.connect(self.handleConnected)
-        self.socket.stateChanged.connect(self.handleStateChanged)
-        self.socket.disconnected.connect(self.handleDisconnect)
-        self.socket.readyRead.connect(self.handleReadyRead)
-        self.socket.error.connect(self.handleError)
-
+        self.protocol.signalReady.connect(self.getAlignmentModel)
         self.signalDestruct.connect(self.destruct, type=PyQt5.QtCore.Qt.BlockingQueuedConnection)
-        self.cycleTimer = PyQt5.QtCore.QTimer(self)
-        self.cycleTimer.setSingleShot(False)
-        self.cycleTimer.timeout.connect(self.doCommand)
-        self.cycleTimer.start(self.CYCLE)
 
     def stop(self):
         self.mutexIsRunning.lock()
         if self.isRunning:
             self.isRunning = False
             self.signalDestruct.emit()
-            self.signalConnected.emit({'GetAlign': False})
-            self.thread.quit()
-            self.thread.wait()
         self.mutexIsRunning.unlock()
         self.logger.info('mount get align stopped')
 
     @PyQt5.QtCore.pyqtSlot()
     def destruct(self):
-        self.cycleTimer.stop()
+        self.protocol.signalReady.disconnect(self.getAlignmentModel)
         self.signalDestruct.disconnect(self.destruct)
-        self.socket.hostFound.disconnect(self.handleHostFound)
-        self.socket.connected.disconnect(self.handleConnected)
-        self.socket.stateChanged.disconnect(self.handleStateChanged)
-        self.socket.disconnected.disconnect(self.handleDisconnect)
-        self.socket.error.disconnect(self.handleError)
-        self.socket.readyRead.disconnect(self.handleReadyRead)
-        self.socket.abort()
-
-    def doCommand(self):
-        self.doReconnect()
-        if not self.sendCommandQueue.empty() and (self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState):
-            command = self.sendCommandQueue.get()
-            if not self.sendLock:
-                self.sendCommand(command)
-
-    def doReconnect(self):
-        # to get order in connections, we wait for first connecting the once type
-        if self.mountStatus['Once'] and self.data['FW'] > 0:
-            if self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.UnconnectedState:
-                if self.connectCounter == 0:
-                    self.app.sharedMountDataLock.lockForRead()
-                    self.socket.connectToHost(self.data['MountIP'], self.data['MountPort'])
-                    self.app.sharedMountDataLock.unlock()
-                    self.sendCommandQueue.queue.clear()
-                else:
-                    # connection build up is ongoing
-                    pass
-                if self.connectCounter * self.CYCLE > self.CONNECTION_TIMEOUT:
-                    self.socket.abort()
-                    self.connectCounter = 0
-                else:
-                    self.connectCounter += 1
-            else:
-                if self.socket.state() != PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
-                    if self.connectCounter * self.CYCLE > self.CONNECTION_TIMEOUT:
-                        self.socket.abort()
-                        self.connectCounter = 0
-                    else:
-                        self.connectCounter += 1
-                else:
-                    # connected
-                    pass
-
-    @PyQt5.QtCore.pyqtSlot()
-    def handleHostFound(self):
-        self.logger.debug('Mount GetAlignmentModel found at {}:{}'.format(self.data['MountIP'], self.data['MountPort']))
-
-    @PyQt5.QtCore.pyqtSlot()
-    def handleConnected(self):
-        self.signalConnected.emit({'GetAlign': True})
-        self.logger.info('Mount GetAlignmentModel connected at {0}:{1}'.format(self.data['MountIP'], self.data['MountPort']))
-        self.getAlignmentModel()
-
-    @PyQt5.QtCore.pyqtSlot(PyQt5.QtNetwork.QAbstractSocket.SocketError)
-    def handleError(self, socketError):
-        self.logger.warning('Mount GetAlignmentModel connection fault: {0}'.format(socketError))
-
-    @PyQt5.QtCore.pyqtSlot()
-    def handleStateChanged(self):
-        self.logger.debug('Mount GetAlignmentModel connection has state: {0}'.format(self.socket.state()))
-
-    @PyQt5.QtCore.pyqtSlot()
-    def handleDisconnect(self):
-        self.logger.info('Mount GetAlignmentModel connection is disconnected from host')
-        self.signalConnected.emit({'GetAlign': False})
-
-    def sendCommand(self, command):
-        if self.isRunning:
-            if self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
-                self.sendLock = True
-                self.socket.write(bytes(command + '\r', encoding='ascii'))
-                self.socket.flush()
-            else:
-                self.sendLock = False
-                self.logger.warning('Socket GetAlignmentModel not connected')
 
     def getAlignmentModel(self):
+        # returns a future, which is resolved after the downloaded model is parsed into data
         self.data['ModelLoading'] = True
         if self.data['FW'] < 21500:
             command = ':getalst#'
+            numberResults = 1
         else:
             command = ':getalst#:getain#'
+            numberResults = 2
         # asking for 100 points data
         for i in range(1, 102):
             command += (':getalp{0:d}#'.format(i))
-        self.sendCommandQueue.put(command)
+            numberResults += 1
+        job = self.protocol.addJob('GetAlign', command, self.protocol.PRIORITY_GETALIGN,
+                                   callback=self.handleReply, errorCallback=self.handleError,
+                                   numberHash=numberResults, timeout=self.REPLY_TIMEOUT, coalesce=True)
+        return job['Future']
+
+    def handleError(self, error):
+        self.logger.warning('Alignment model could not be downloaded: {0}'.format(error))
+        self.data['ModelLoading'] = False
 
-    @PyQt5.QtCore.pyqtSlot()
-    def handleReadyRead(self):
-        # Get message from socket.
-        while self.socket.bytesAvailable() and self.isRunning:
-            self.messageString += self.socket.read(4000).decode()
-        # if the last characters are not E#, there are more points to receive
-        if not self.messageString.endswith('E#'):
-            return
-        else:
-            messageToProcess = self.messageString
-            self.messageString = ''
+    def handleReply(self, messageToProcess):
+        # the last points are not there, so the mount replies them with E#
         while messageToProcess.endswith('E#'):
             messageToProcess = messageToProcess.rstrip('E#')
         while messageToProcess.startswith('E#'):
             messageToProcess = messageToProcess.lstrip('E#')
         # now transfer the model data
+        if len(messageToProcess) == 0:
+            self.data['ModelLoading'] = False
+            return
+        self.app.sharedMountDataLock.lockForWrite()
         try:
-            if len(messageToProcess) == 0:
-                return
-            self.app.sharedMountDataLock.lockForWrite()
             self.logger.info('Raw data from Mount: {0}'.format(messageToProcess))
             valueList = messageToProcess.strip('#').split('#')
             # now the first part of the command cluster
@@ -277,26 +179,20 @@ class MountGetAlignmentModel(PyQt5.QtCore.QObject):
             self.data['ModelErrorAngle'] = list()
             # we start every time with index 0, because if the first parsing took place, the first list element will be deleted
             self.logger.info('Align info points data: {0}'.format(valueList))
-            for i in range(0, len(valueList)):
-                values = valueList[i].split(',')
-                ha = values[0]
-                dec = values[1]
-                ErrorRMS = float(values[2])
-                ErrorAngle = float(values[3])
-                dec = dec.replace('*', ':')
-                RaJNow = self.transform.degStringToDecimal(ha)
-                DecJNow = self.transform.degStringToDecimal(dec)
-                az, alt = self.transform.topocentricToAzAlt(RaJNow, DecJNow)
-                # index should start with 0, but numbering in mount starts with 1
-                self.data['ModelIndex'].append(i)
-                self.data['ModelAzimuth'].append(az)
-                self.data['ModelAltitude'].append(alt)
-                self.data['ModelError'].append(ErrorRMS)
-                self.data['ModelErrorAngle'].append(ErrorAngle)
+            # all points are converted in one batch
+            values = [value.split(',') for value in valueList]
+            RaJNow = self.transform.degStringToDecimal([value[0] for value in values])
+            DecJNow = self.transform.degStringToDecimal([value[1].replace('*', ':') for value in values])
+            az, alt = self.transform.topocentricToAzAlt(RaJNow, DecJNow)
+            # index should start with 0, but numbering in mount starts with 1
+            self.data['ModelIndex'] = list(range(0, len(values)))
+            self.data['ModelAzimuth'] = az.tolist()
+            self.data['ModelAltitude'] = alt.tolist()
+            self.data['ModelError'] = [float(value[2]) for value in values]
+            self.data['ModelErrorAngle'] = [float(value[3]) for value in values]
         except Exception as e:
             self.logger.error('Parsing GetAlignmentModel got error:{0}, values:{1}'.format(e, messageToProcess))
         finally:
             self.app.sharedMountDataLock.unlock()
             self.app.workerMountDispatcher.signalMountShowAlignmentModel.emit()
         self.data['ModelLoading'] = False
-        self.sendLock = False
@@ -0,0 +1,389 @@
+############################################################
+# -*- coding: utf-8 -*-
+#
+#       #   #  #   #   #  ####
+#      ##  ##  #  ##  #     #
+#     # # # #  # # # #     ###
+#    #  ##  #  ##  ##        #
+#   #   #   #  #   #     ####
+#
+# Python-based Tool for interaction with the 10micron mounts
+# GUI with PyQT5 for python
+# Python  v3.6.4
+#
+# Michael Würtenberger
+# (c) 2016, 2017, 2018
+#
+# Licence APL2.0
+#
+###########################################################
+import logging
+import PyQt5
+import time
+import collections
+import concurrent.futures
+from mount import mount_command
+
+
+class MountProtocol(PyQt5.QtCore.QObject):
+    logger = logging.getLogger(__name__)
+
+    # the protocol engine owns all connections to the mount computer. the runners for status, alignment model
+    # and commands are only clients, which put jobs to the engine and get the framed reply back through a callback.
+    # jobs are served by priority (lower number first) and within the same priority in the order they came in.
+    # for one client there is only one job on the wire at a time, so the order of commands of a client is kept.
+    # every job carries a future, which is resolved with the reply or gets the error (timeout, lost connection).
+    # the cycle timer is only used for supervision of connections and reply timeouts. jobs are written to the
+    # mount at the moment they are added or the previous reply on a connection is received.
+    CONNECTION_TIMEOUT = 3000
+    REPLY_TIMEOUT = 5000
+    CYCLE = 250
+    NUMBER_CONNECTIONS = 2
+    NUMBER_LATENCY_SAMPLES = 100
+
+    PRIORITY_COMMAND = 0
+    PRIORITY_FAST = 1
+    PRIORITY_ONCE = 2
+    PRIORITY_MEDIUM = 3
+    PRIORITY_SETALIGN = 4
+    PRIORITY_GETALIGN = 5
+    PRIORITY_NAMES = 6
+    PRIORITY_SLOW = 7
+
+    signalDestruct = PyQt5.QtCore.pyqtSignal()
+    signalJobAdded = PyQt5.QtCore.pyqtSignal()
+    signalReady = PyQt5.QtCore.pyqtSignal()
+
+    def __init__(self, app, thread, data, signalConnected, mountStatus, numberConnections=NUMBER_CONNECTIONS):
+        super().__init__()
+
+        self.app = app
+        self.thread = thread
+        self.data = data
+        self.signalConnected = signalConnected
+        self.mountStatus = mountStatus
+        self.numberConnections = max(1, numberConnections)
+        self.mutexIsRunning = PyQt5.QtCore.QMutex()
+        self.mutexJobs = PyQt5.QtCore.QMutex()
+        self.isRunning = False
+        self.ready = False
+        self.cycleTimer = None
+        self.connections = list()
+        self.jobs = list()
+        self.jobCounter = 0
+        self.isDispatching = False
+        self.mutexLatency = PyQt5.QtCore.QMutex()
+        self.latency = dict()
+
+    def run(self):
+        self.logger.info('mount protocol started')
+        self.mutexIsRunning.lock()
+        if not self.isRunning:
+            self.isRunning = True
+        self.mutexIsRunning.unlock()
+        self.ready = False
+        self.connections = list()
+        for number in range(0, self.numberConnections):
+            connection = {
+                'Number': number,
+                'Socket': PyQt5.QtNetwork.QTcpSocket(),
+                'Job': None,
+                'MessageString': '',
+                'ConnectCounter': 0
+            }
+            socket = connection['Socket']
+            socket.setSocketOption(PyQt5.QtNetwork.QAbstractSocket.LowDelayOption, 1)
+            socket.setSocketOption(PyQt5.QtNetwork.QAbstractSocket.KeepAliveOption, 1)
+            socket.hostFound.connect(lambda c=connection: self.handleHostFound(c))
+            socket.connected.connect(lambda c=connection: self.handleConnected(c))
+            socket.stateChanged.connect(lambda state, c=connection: self.handleStateChanged(c))
+            socket.disconnected.connect(lambda c=connection: self.handleDisconnect(c))
+            socket.error.connect(lambda socketError, c=connection: self.handleError(c, socketError))
+            socket.readyRead.connect(lambda c=connection: self.handleReadyRead(c))
+            self.connections.append(connection)
+        # queued, so a job added by a callback in this thread is dispatched after the running dispatch
+        self.signalJobAdded.connect(self.dispatchJobs, type=PyQt5.QtCore.Qt.QueuedConnection)
+        self.signalDestruct.connect(self.destruct, type=PyQt5.QtCore.Qt.BlockingQueuedConnection)
+        self.cycleTimer = PyQt5.QtCore.QTimer(self)
+        self.cycleTimer.setSingleShot(False)
+        self.cycleTimer.timeout.connect(self.doSupervision)
+        self.cycleTimer.start(self.CYCLE)
+
+    def stop(self):
+        self.mutexIsRunning.lock()
+        if self.isRunning:
+            self.isRunning = False
+            self.signalDestruct.emit()
+            self.signalConnected.emit(dict.fromkeys(self.mountStatus, False))
+            self.thread.quit()
+            self.thread.wait()
+        self.mutexIsRunning.unlock()
+        self.logger.info('mount protocol stopped, latency statistics: {0}'.format(self.getLatencyStatistics()))
+
+    @PyQt5.QtCore.pyqtSlot()
+    def destruct(self):
+        self.cycleTimer.stop()
+        self.signalDestruct.disconnect(self.destruct)
+        self.signalJobAdded.disconnect(self.dispatchJobs)
+        for connection in self.connections:
+            socket = connection['Socket']
+            socket.hostFound.disconnect()
+            socket.connected.disconnect()
+            socket.stateChanged.disconnect()
+            socket.disconnected.disconnect()
+            socket.error.disconnect()
+            socket.readyRead.disconnect()
+            socket.abort()
+        self.clearJobs(keepCommands=False)
+
+    def isConnected(self):
+        if len(self.connections) == 0:
+            return False
+        return self.connections[0]['Socket'].state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState
+
+    def isReady(self):
+        return self.ready and self.isConnected()
+
+    def setReady(self):
+        # called after the once status is parsed: firmware is known, so the other clients could start their work
+        if self.ready:
+            return
+        self.ready = True
+        self.signalConnected.emit(dict.fromkeys(self.mountStatus, True))
+        self.signalReady.emit()
+
+    def addJob(self, client, command, priority, callback=None, errorCallback=None, numberHash=None, timeout=REPLY_TIMEOUT, coalesce=False, timeQueued=None):
+        # numberHash gives the number of '#' terminated replies for command bundles. if not given, the number of
+        # bytes to receive is taken from the COMMAND_RETURN table of the command runner
+        numberBytes = 0
+        if numberHash is None:
+            numberBytes = -1
+            for key in mount_command.MountCommandRunner.COMMAND_RETURN:
+                if command.startswith(key):
+                    numberBytes = mount_command.MountCommandRunner.COMMAND_RETURN[key]
+                    break
+            if numberBytes == -1:
+                self.logger.error('Command >{0}< not known'.format(command))
+                return None
+        if timeQueued is None:
+            timeQueued = time.time()
+        self.mutexJobs.lock()
+        if coalesce:
+            for job in self.jobs:
+                if job['Client'] == client and job['Command'] == command:
+                    self.mutexJobs.unlock()
+                    return job
+        self.jobCounter += 1
+        job = {
+            'Client': client,
+            'Command': command,
+            'Priority': priority,
+            'Sequence': self.jobCounter,
+            'Callback': callback,
+            'ErrorCallback': errorCallback,
+            'Future': concurrent.futures.Future(),
+            'NumberHash': numberHash,
+            'NumberBytes': numberBytes,
+            'Timeout': timeout,
+            'TimeQueued': timeQueued,
+            'TimeSent': 0
+        }
+        self.jobs.append(job)
+        self.mutexJobs.unlock()
+        self.signalJobAdded.emit()
+        return job
+
+    def clearJobs(self, keepCommands=True):
+        # the user commands are normally kept, they should not get lost with a reconnect
+        self.mutexJobs.lock()
+        removed = [job for job in self.jobs if not (keepCommands and job['Client'] == 'Command')]
+        self.jobs = [job for job in self.jobs if keepCommands and job['Client'] == 'Command']
+        self.mutexJobs.unlock()
+        for job in removed:
+            self.failJob(job, ConnectionError('Job {0} cleared'.format(job['Command'])))
+
+    def nextJob(self):
+        # the next job is the one with the highest priority, where the client has no other job on the wire
+        busyClients = [connection['Job']['Client'] for connection in self.connections if connection['Job'] is not None]
+        self.mutexJobs.lock()
+        candidates = [job for job in self.jobs if job['Client'] not in busyClients]
+        if len(candidates) == 0:
+            self.mutexJobs.unlock()
+            return None
+        job = min(candidates, key=lambda x: (x['Priority'], x['Sequence']))
+        self.jobs.remove(job)
+        self.mutexJobs.unlock()
+        return job
+
+    @PyQt5.QtCore.pyqtSlot()
+    def dispatchJobs(self):
+        # sendJob finishes jobs without reply at once, their callbacks could add jobs and call for a dispatch. the
+        # running loop picks them up, a nested dispatch would write a second command to a connection in use
+        if not self.isRunning or self.isDispatching:
+            return
+        self.isDispatching = True
+        try:
+            for connection in self.connections:
+                if connection['Job'] is not None:
+                    continue
+                if connection['Socket'].state() != PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
+                    continue
+                while True:
+                    job = self.nextJob()
+                    if job is None:
+                        return
+                    if self.sendJob(connection, job):
+                        break
+        finally:
+            self.isDispatching = False
+
+    def sendJob(self, connection, job):
+        # returns true if the connection waits for a reply now
+        connection['MessageString'] = ''
+        socket = connection['Socket']
+        if socket.bytesAvailable():
+            self.logger.warning('Connection {0} discarding unexpected data: {1}'.format(connection['Number'], socket.readAll()))
+        socket.write(bytes(job['Command'] + '\r', encoding='ascii'))
+        socket.flush()
+        self.addLatency(job['Client'], time.time() - job['TimeQueued'])
+        if job['NumberHash'] is None and job['NumberBytes'] == 0:
+            self.finishJob(job, '')
+            return False
+        job['TimeSent'] = time.time()
+        connection['Job'] = job
+        return True
+
+    def addLatency(self, client, latency):
+        self.mutexLatency.lock()
+        if client not in self.latency:
+            self.latency[client] = collections.deque(maxlen=self.NUMBER_LATENCY_SAMPLES)
+        self.latency[client].append(latency)
+        self.mutexLatency.unlock()
+        self.logger.debug('Client {0} queue to wire latency: {1:4.1f} ms'.format(client, latency * 1000))
+
+    def getLatencyStatistics(self):
+        # returns for every client the number of samples, mean and max of the queue to wire latency in ms
+        statistics = dict()
+        self.mutexLatency.lock()
+        for client in self.latency:
+            samples = list(self.latency[client])
+            if len(samples) == 0:
+                continue
+            statistics[client] = {
+                'Number': len(samples),
+                'Mean': sum(samples) / len(samples) * 1000,
+                'Max': max(samples) * 1000
+            }
+        self.mutexLatency.unlock()
+        return statistics
+
+    def finishJob(self, job, message):
+        if job['Callback'] is not None:
+            try:
+                job['Callback'](message)
+            except Exception as e:
+                self.logger.error('Client {0} could not process reply of {1}, error: {2}'.format(job['Client'], job['Command'], e))
+        if not job['Future'].done():
+            job['Future'].set_result(message)
+
+    def failJob(self, job, error):
+        self.logger.warning('Client {0} job {1} failed: {2}'.format(job['Client'], job['Command'], error))
+        try:
+            if job['ErrorCallback'] is not None:
+                job['ErrorCallback'](error)
+            elif job['Callback'] is not None:
+                # clients without error handling get an empty reply, so they are not waiting forever
+                job['Callback']('')
+        except Exception as e:
+            self.logger.error('Client {0} could not process error of {1}, error: {2}'.format(job['Client'], job['Command'], e))
+        if not job['Future'].done():
+            job['Future'].set_exception(error)
+
+    @staticmethod
+    def isReplyComplete(job, message):
+        if job['NumberHash'] is not None:
+            return message.count('#') >= job['NumberHash']
+        return len(message) >= job['NumberBytes']
+
+    def doSupervision(self):
+        for connection in self.connections:
+            self.doReconnect(connection)
+            job = connection['Job']
+            if job is None:
+                continue
+            if (time.time() - job['TimeSent']) * 1000 > job['Timeout']:
+                self.logger.warning('Connection {0} timeout for {1}, got: {2}'.format(connection['Number'], job['Command'], connection['MessageString']))
+                connection['Job'] = None
+                connection['MessageString'] = ''
+                connection['Socket'].abort()
+                self.failJob(job, TimeoutError('No reply for {0} within {1} ms'.format(job['Command'], job['Timeout'])))
+        self.dispatchJobs()
+
+    def doReconnect(self, connection):
+        socket = connection['Socket']
+        # to get order in connections, the first one has to be ready (firmware known), before the others follow
+        if connection['Number'] > 0 and not self.isReady():
+            return
+        if socket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
+            return
+        if socket.state() == PyQt5.QtNetwork.QAbstractSocket.UnconnectedState and connection['ConnectCounter'] == 0:
+            self.app.sharedMountDataLock.lockForRead()
+            socket.connectToHost(self.data['MountIP'], self.data['MountPort'])
+            self.app.sharedMountDataLock.unlock()
+        if connection['ConnectCounter'] * self.CYCLE > self.CONNECTION_TIMEOUT:
+            socket.abort()
+            connection['ConnectCounter'] = 0
+        else:
+            connection['ConnectCounter'] += 1
+
+    def handleHostFound(self, connection):
+        self.app.sharedMountDataLock.lockForRead()
+        self.logger.debug('Mount connection {0} found at {1}:{2}'.format(connection['Number'], self.data['MountIP'], self.data['MountPort']))
+        self.app.sharedMountDataLock.unlock()
+
+    def handleConnected(self, connection):
+        connection['ConnectCounter'] = 0
+        if connection['Number'] == 0:
+            self.signalConnected.emit({'Once': True})
+        self.app.sharedMountDataLock.lockForRead()
+        self.logger.info('Mount connection {0} connected at {1}:{2}'.format(connection['Number'], self.data['MountIP'], self.data['MountPort']))
+        self.app.sharedMountDataLock.unlock()
+        self.dispatchJobs()
+
+    def handleError(self, connection, socketError):
+        self.logger.warning('Mount connection {0} fault: {1}'.format(connection['Number'], socketError))
+
+    def handleStateChanged(self, connection):
+        self.logger.debug('Mount connection {0} has state: {1}'.format(connection['Number'], connection['Socket'].state()))
+
+    def handleDisconnect(self, connection):
+        self.logger.info('Mount connection {0} is disconnected from host'.format(connection['Number']))
+        job = connection['Job']
+        connection['Job'] = None
+        connection['MessageString'] = ''
+        if job is not None:
+            self.failJob(job, ConnectionError('Connection {0} lost'.format(connection['Number'])))
+        if connection['Number'] == 0:
+            self.ready = False
+            self.clearJobs()
+            self.signalConnected.emit(dict.fromkeys(self.mountStatus, False))
+            # all other connections follow the first one
+            for other in self.connections[1:]:
+                other['Socket'].abort()
+
+    def handleReadyRead(self, connection):
+        socket = connection['Socket']
+        while socket.bytesAvailable() and self.isRunning:
+            connection['MessageString'] += socket.read(4000).decode()
+        job = connection['Job']
+        if job is None:
+            self.logger.warning('Connection {0} got data without job: {1}'.format(connection['Number'], connection['MessageString']))
+            connection['MessageString'] = ''
+            return
+        if not self.isReplyComplete(job, connection['MessageString']):
+            return
+        messageToProcess = connection['MessageString']
+        connection['MessageString'] = ''
+        connection['Job'] = None
+        self.finishJob(job, messageToProcess)
+        self.dispatchJobs()
@@ -0,0 +1,744 @@
+############################################################
+# -*- coding: utf-8 -*-
+#
+#       #   #  #   #   #  ####
+#      ##  ##  #  ##  #     #
+#     # # # #  # # # #     ###
+#    #  ##  #  ##  ##        #
+#   #   #   #  #   #     ####
+#
+# Python-based Tool for interaction with the 10micron mounts
+# GUI with PyQT5 for python
+# Python  v3.6.4
+#
+# Michael Würtenberger
+# (c) 2016, 2017, 2018
+#
+# Licence APL2.0
+#
+###########################################################
+import argparse
+import logging
+import math
+import socket
+import socketserver
+import threading
+import time
+
+# local tcp server, which speaks the subset of the 10micron protocol mountwizzard3 uses. it has no dependencies to
+# qt or astropy, so it could be run standalone for testing and benchmarking the mount subsystem without hardware:
+#   python3 mount_simulator.py --port 3490 --latency 0.01
+
+
+class MountSimulatorHandler(socketserver.BaseRequestHandler):
+
+    def setup(self):
+        self.server.simulator.addClient(self.request)
+
+    def handle(self):
+        simulator = self.server.simulator
+        messageString = ''
+        while True:
+            try:
+                data = self.request.recv(4096)
+            except OSError:
+                break
+            if not data:
+                break
+            messageString += data.decode('ascii', errors='replace')
+            # only complete commands are processed, the rest stays for the next receive
+            commands = messageString.split('#')
+            messageString = commands.pop()
+            reply = ''
+            for command in commands:
+                command = command.replace('\r', '').replace('\n', '').lstrip(':')
+                if command:
+                    reply += simulator.handleCommand(command)
+            if simulator.latency > 0:
+                time.sleep(simulator.latency)
+            if reply:
+                try:
+                    self.request.sendall(reply.encode('ascii'))
+                except OSError:
+                    break
+
+    def finish(self):
+        self.server.simulator.removeClient(self.request)
+
+
+class MountSimulatorServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address, simulator):
+        self.simulator = simulator
+        super().__init__(address, MountSimulatorHandler)
+
+
+class MountSimulator:
+    logger = logging.getLogger(__name__)
+
+    # status codes as delivered in :Ginfo#
+    STATUS_TRACKING = 0
+    STATUS_STOPPED = 1
+    STATUS_PARKING = 2
+    STATUS_PARKED = 5
+    STATUS_SLEWING = 6
+    STATUS_NOT_TRACKING = 7
+
+    CM_REPLY = 'Coordinates     matched   #'
+
+    def __init__(self, host='localhost', port=3490, latency=0.0, slewRate=15, acceleration=3.0, settleTime=1.0,
+                 settleAmplitude=0.01, settleDamping=0.5, settlePeriod=0.8, dropInterval=0,
+                 siteLat=48.0338, siteLon=11.7047, siteHeight=580.9, firmware='2.16.11'):
+        self.host = host
+        self.port = port
+        # reply latency in seconds for every received block of commands
+        self.latency = latency
+        # acceleration of the axis in deg/s^2, slew rate in deg/s
+        self.acceleration = acceleration
+        # the mount reports slewing until the settle time after arrival is over
+        self.settleTime = settleTime
+        # residual oscillation of the axis after arrival in degrees, decay constant and period in seconds
+        self.settleAmplitude = settleAmplitude
+        self.settleDamping = settleDamping
+        self.settlePeriod = settlePeriod
+        # if > 0 all connections are dropped periodically to test the reconnect behaviour
+        self.dropInterval = dropInterval
+        self.siteLat = siteLat
+        self.siteLon = siteLon
+        self.siteHeight = siteHeight
+        self.firmware = firmware
+        self.lock = threading.RLock()
+        self.clients = set()
+        self.server = None
+        self.serverThread = None
+        self.dropTimer = None
+        self.numberCommands = 0
+        self.numberDrops = 0
+        # mount state
+        self.slewRate = slewRate
+        self.status = self.STATUS_TRACKING
+        self.pierside = 'W'
+        self.hold = 'radec'
+        self.ra = self.getLocalSiderealTime()
+        self.dec = 30.0
+        self.az = 0.0
+        self.alt = 0.0
+        self.targetAz = 0.0
+        self.targetAlt = 0.0
+        self.targetRa = 0.0
+        self.targetDec = 0.0
+        self.targetType = 'azalt'
+        self.slew = None
+        self.meridianLimitGuide = 5
+        self.meridianLimitSlew = 5
+        self.horizonLimitHigh = 90
+        self.horizonLimitLow = 0
+        self.refractionTemperature = 10.0
+        self.refractionPressure = 980.0
+        self.refraction = 1
+        self.unattendedFlip = 0
+        self.dualAxisTracking = 1
+        self.alignPoints = list()
+        self.newAlignPoints = None
+        self.modelNames = dict()
+        self.stopSettle = 0
+        self.commandTable = self.getCommandTable()
+
+    def start(self):
+        self.server = MountSimulatorServer((self.host, self.port), self)
+        self.port = self.server.server_address[1]
+        self.serverThread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.serverThread.start()
+        if self.dropInterval > 0:
+            self.startDropTimer()
+        self.logger.info('mount simulator started on {0}:{1}'.format(self.host, self.port))
+
+    def stop(self):
+        if self.dropTimer:
+            self.dropTimer.cancel()
+            self.dropTimer = None
+        self.dropConnections()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        self.logger.info('mount simulator stopped, commands: {0}, drops: {1}'.format(self.numberCommands, self.numberDrops))
+
+    def startDropTimer(self):
+        self.dropTimer = threading.Timer(self.dropInterval, self.handleDropTimer)
+        self.dropTimer.daemon = True
+        self.dropTimer.start()
+
+    def handleDropTimer(self):
+        self.dropConnections()
+        self.startDropTimer()
+
+    def addClient(self, sock):
+        with self.lock:
+            self.clients.add(sock)
+        self.logger.info('client connected, number clients: {0}'.format(len(self.clients)))
+
+    def removeClient(self, sock):
+        with self.lock:
+            self.clients.discard(sock)
+        self.logger.info('client disconnected, number clients: {0}'.format(len(self.clients)))
+
+    def dropConnections(self):
+        with self.lock:
+            clients = list(self.clients)
+            if clients:
+                self.numberDrops += 1
+        for sock in clients:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def numberClients(self):
+        with self.lock:
+            return len(self.clients)
+
+    # time and coordinates
+
+    @staticmethod
+    def getJulianDate(now=None):
+        if now is None:
+            now = time.time()
+        return now / 86400.0 + 2440587.5
+
+    def getLocalSiderealTime(self, now=None):
+        jd = self.getJulianDate(now)
+        gmst = 280.46061837 + 360.98564736629 * (jd - 2451545.0)
+        return ((gmst + self.siteLon) % 360.0) / 15.0
+
+    def raDecToAzAlt(self, ra, dec, now=None):
+        ha = math.radians((self.getLocalSiderealTime(now) - ra) * 15.0)
+        dec = math.radians(dec)
+        lat = math.radians(self.siteLat)
+        alt = math.asin(max(-1.0, min(1.0, math.sin(dec) * math.sin(lat) + math.cos(dec) * math.cos(lat) * math.cos(ha))))
+        az = math.atan2(-math.cos(dec) * math.sin(ha), math.sin(dec) * math.cos(lat) - math.cos(dec) * math.cos(ha) * math.sin(lat))
+        return math.degrees(az) % 360.0, math.degrees(alt)
+
+    def azAltToRaDec(self, az, alt, now=None):
+        az = math.radians(az)
+        alt = math.radians(alt)
+        lat = math.radians(self.siteLat)
+        dec = math.asin(max(-1.0, min(1.0, math.sin(alt) * math.sin(lat) + math.cos(alt) * math.cos(lat) * math.cos(az))))
+        ha = math.atan2(-math.sin(az) * math.cos(alt), math.sin(alt) * math.cos(lat) - math.cos(alt) * math.sin(lat) * math.cos(az))
+        ra = (self.getLocalSiderealTime(now) - math.degrees(ha) / 15.0) % 24.0
+        return ra, math.degrees(dec)
+
+    def getHourAngle(self, ra, now=None):
+        return (self.getLocalSiderealTime(now) - ra + 12.0) % 24.0 - 12.0
+
+    @staticmethod
+    def parseSexagesimal(value):
+        # accepts DD*MM:SS.S, DD:MM:SS.S, DD*MM and DD:MM with optional sign
+        value = value.strip()
+        sign = 1
+        if value.startswith('-'):
+            sign = -1
+            value = value[1:]
+        elif value.startswith('+'):
+            value = value[1:]
+        parts = value.replace('*', ':').split(':')
+        returnValue = 0
+        for i, part in enumerate(parts[:3]):
+            returnValue += float(part) / 60 ** i
+        return sign * returnValue
+
+    @staticmethod
+    def formatSexagesimal(value, withSign, spl=':', digits=2, width=2):
+        sign = '+' if value >= 0 else '-'
+        value = abs(value)
+        total = int(round(value * 3600 * 10 ** digits))
+        second = total % (60 * 10 ** digits) / 10 ** digits
+        minute = (total // (60 * 10 ** digits)) % 60
+        degree = total // (3600 * 10 ** digits)
+        returnValue = '{0:0{6}d}{1}{2:02d}:{3:0{4}.{5}f}'.format(degree, spl, minute, second, 3 + digits, digits, width)
+        if withSign:
+            returnValue = sign + returnValue
+        return returnValue
+
+    @staticmethod
+    def angularDistance(ra1, dec1, ra2, dec2):
+        # returns separation in degrees and position angle of point 2 seen from point 1 in degrees
+        ra1 = math.radians(ra1 * 15)
+        ra2 = math.radians(ra2 * 15)
+        dec1 = math.radians(dec1)
+        dec2 = math.radians(dec2)
+        value = math.sin(dec1) * math.sin(dec2) + math.cos(dec1) * math.cos(dec2) * math.cos(ra2 - ra1)
+        distance = math.degrees(math.acos(max(-1.0, min(1.0, value))))
+        angle = math.atan2(math.sin(ra2 - ra1), math.cos(dec1) * math.tan(dec2) - math.sin(dec1) * math.cos(ra2 - ra1))
+        return distance, math.degrees(angle) % 360.0
+
+    # slewing
+
+    def getAxisTime(self, distance):
+        # trapezoidal velocity profile with acceleration and maximum slew rate
+        rate = max(self.slewRate, 1)
+        if distance < rate * rate / self.acceleration:
+            return 2 * math.sqrt(distance / self.acceleration)
+        return distance / rate + rate / self.acceleration
+
+    def getAxisFraction(self, distance, duration, elapsed):
+        # fraction of the distance covered after elapsed seconds on the trapezoidal profile
+        if duration <= 0 or elapsed >= duration:
+            return 1.0
+        rate = max(self.slewRate, 1)
+        accelerationTime = min(rate / self.acceleration, duration / 2)
+        vmax = self.acceleration * accelerationTime
+        if elapsed < accelerationTime:
+            covered = 0.5 * self.acceleration * elapsed ** 2
+        elif elapsed < duration - accelerationTime:
+            covered = 0.5 * vmax * accelerationTime + vmax * (elapsed - accelerationTime)
+        else:
+            remaining = duration - elapsed
+            covered = distance - 0.5 * self.acceleration * remaining ** 2
+        if distance <= 0:
+            return 1.0
+        return max(0.0, min(1.0, covered / distance))
+
+    def startSlew(self, targetAz, targetAlt, targetRa=None, targetDec=None, endStatus=None):
+        now = time.time()
+        self.updatePosition(now)
+        startAz, startAlt = self.getAzAlt(now)
+        if targetRa is not None:
+            # the target moves during the slew, so we estimate the arrival position with a second iteration
+            targetAz, targetAlt = self.raDecToAzAlt(targetRa, targetDec, now)
+            deltaAz = (targetAz - startAz + 180) % 360 - 180
+            duration = max(self.getAxisTime(abs(deltaAz)), self.getAxisTime(abs(targetAlt - startAlt)))
+            targetAz, targetAlt = self.raDecToAzAlt(targetRa, targetDec, now + duration)
+        deltaAz = (targetAz - startAz + 180) % 360 - 180
+        deltaAlt = targetAlt - startAlt
+        durationAz = self.getAxisTime(abs(deltaAz))
+        durationAlt = self.getAxisTime(abs(deltaAlt))
+        duration = max(durationAz, durationAlt)
+        if endStatus is None:
+            if self.status in [self.STATUS_TRACKING, self.STATUS_SLEWING] or targetRa is not None:
+                endStatus = self.STATUS_TRACKING
+            else:
+                endStatus = self.STATUS_NOT_TRACKING
+        ra, dec = self.azAltToRaDec(targetAz, targetAlt, now + duration)
+        self.pierside = 'E' if self.getHourAngle(ra, now + duration) >= 0 else 'W'
+        self.slew = {
+            'StartAz': startAz,
+            'StartAlt': startAlt,
+            'DeltaAz': deltaAz,
+            'DeltaAlt': deltaAlt,
+            'DurationAz': durationAz,
+            'DurationAlt': durationAlt,
+            'TimeStart': now,
+            'TimeArrival': now + duration,
+            'EndStatus': endStatus,
+            'TargetRa': ra if targetRa is None else targetRa,
+            'TargetDec': dec if targetDec is None else targetDec,
+            'TargetAz': targetAz % 360,
+            'TargetAlt': targetAlt,
+        }
+        self.status = self.STATUS_SLEWING
+        self.logger.info('slew started az: {0:.2f} alt: {1:.2f} duration: {2:.2f}s'.format(targetAz, targetAlt, duration))
+
+    def updatePosition(self, now):
+        # finishes a slew after arrival and settling
+        if self.slew is None or now < self.slew['TimeArrival']:
+            return
+        if self.slew['EndStatus'] == self.STATUS_TRACKING:
+            self.hold = 'radec'
+            self.ra = self.slew['TargetRa']
+            self.dec = self.slew['TargetDec']
+        else:
+            self.hold = 'azalt'
+            self.az = self.slew['TargetAz']
+            self.alt = self.slew['TargetAlt']
+        if now >= self.slew['TimeArrival'] + self.settleTime:
+            self.status = self.slew['EndStatus']
+            self.stopSettle = self.slew['TimeArrival']
+            self.slew = None
+
+    def getSettleOffset(self, now, timeArrival):
+        elapsed = now - timeArrival
+        if elapsed < 0 or self.settleAmplitude <= 0 or elapsed > 10 * self.settleDamping:
+            return 0.0
+        return self.settleAmplitude * math.exp(-elapsed / self.settleDamping) * math.cos(2 * math.pi * elapsed / self.settlePeriod)
+
+    def getAzAlt(self, now):
+        if self.slew is not None and now < self.slew['TimeArrival']:
+            elapsed = now - self.slew['TimeStart']
+            fractionAz = self.getAxisFraction(abs(self.slew['DeltaAz']), self.slew['DurationAz'], elapsed)
+            fractionAlt = self.getAxisFraction(abs(self.slew['DeltaAlt']), self.slew['DurationAlt'], elapsed)
+            az = (self.slew['StartAz'] + fractionAz * self.slew['DeltaAz']) % 360
+            alt = self.slew['StartAlt'] + fractionAlt * self.slew['DeltaAlt']
+            return az, alt
+        if self.hold == 'radec':
+            az, alt = self.raDecToAzAlt(self.ra, self.dec, now)
+        else:
+            az, alt = self.az, self.alt
+        timeArrival = self.slew['TimeArrival'] if self.slew is not None else self.stopSettle
+        offset = self.getSettleOffset(now, timeArrival)
+        return (az + offset) % 360, alt + offset
+
+    def getPosition(self):
+        now = time.time()
+        self.updatePosition(now)
+        az, alt = self.getAzAlt(now)
+        if self.hold == 'radec' and self.slew is None:
+            ra, dec = self.ra, self.dec
+        else:
+            ra, dec = self.azAltToRaDec(az, alt, now)
+        return now, ra, dec, az, alt
+
+    def setHoldPosition(self, hold):
+        # changing between tracking and fixed position keeps the current pointing
+        now, ra, dec, az, alt = self.getPosition()
+        if self.slew is not None:
+            return
+        self.hold = hold
+        self.ra, self.dec, self.az, self.alt = ra, dec, az, alt
+
+    # command handling
+
+    def handleCommand(self, command):
+        with self.lock:
+            self.numberCommands += 1
+            for key, method in self.commandTable:
+                if command.startswith(key):
+                    try:
+                        return method(command[len(key):])
+                    except Exception as e:
+                        self.logger.error('command >{0}< failed: {1}'.format(command, e))
+                        return '0'
+            self.logger.warning('command >{0}< not known'.format(command))
+            return ''
+
+    def getCommandTable(self):
+        # longer commands first, because prefixes like Gd / Gdat overlap
+        table = {
+            'U2': self.noReply, 'AP': self.startTracking, 'RT9': self.stopTracking, 'RT': self.noReply,
+            'PO': self.unpark, 'hP': self.park, 'STOP': self.stopMount,
+            'GS': self.getLST, 'Ginfo': self.getInfo,
+            'GMs': self.getSlewRate, 'Gmte': self.getTimeToFlip, 'Glmt': self.getMeridianLimitGuide,
+            'Glms': self.getMeridianLimitSlew, 'GRTMP': self.getRefractionTemperature,
+            'GRPRS': self.getRefractionPressure,
+            'GTMP1': self.getTemperatureDec, 'GREF': self.getRefraction, 'Guaf': self.getUnattendedFlip,
+            'Gdat': self.getDualAxisTracking, 'Gh': self.getHorizonLimitHigh, 'Go': self.getHorizonLimitLow,
+            'GDUTV': self.getUTCData,
+            'Gev': self.getSiteHeight, 'Gg': self.getSiteLongitude, 'Gt': self.getSiteLatitude,
+            'GVD': lambda v: 'Mar 19 2018#', 'GVN': lambda v: self.firmware + '#',
+            'GVP': lambda v: '10micron GM1000HPS#', 'GVT': lambda v: '15:56:53#', 'GVZ': lambda v: 'Q-TYPE2012#',
+            'getalst': self.getNumberAlignmentPoints, 'getain': self.getAlignmentInfo,
+            'getalp': self.getAlignmentPoint, 'newalig': self.newAlignment, 'newalpt': self.newAlignmentPoint,
+            'endalig': self.endAlignment, 'delalst': self.deleteAlignmentPoint, 'delalig': self.deleteAlignment,
+            'modelsv0': self.saveModel, 'modelld0': self.loadModel, 'modeldel0': self.deleteModel,
+            'modelnam': self.getModelName,
+            'Sz': self.setTargetAz, 'Sa': self.setTargetAlt, 'Sr': self.setTargetRa, 'Sd': self.setTargetDec,
+            'MS': self.slewTarget, 'MA': self.slewTargetAzAlt, 'CMCFG': lambda v: '0', 'CMS': self.syncStar,
+            'CM': self.syncTarget, 'Gr': self.getRa, 'Gd': self.getDec,
+            'SRPRS': self.setRefractionPressure, 'SRTMP': self.setRefractionTemperature, 'SREF': self.setRefraction,
+            'Sw': self.setSlewRate, 'Sdat': self.setDualAxisTracking, 'Suaf': self.setUnattendedFlip,
+            'So': self.setHorizonLimitLow, 'Sh': self.setHorizonLimitHigh,
+            'shutdown': self.shutdown, 'FLIP': self.flip,
+        }
+        return sorted(table.items(), key=lambda item: len(item[0]), reverse=True)
+
+    @staticmethod
+    def noReply(value):
+        return ''
+
+    def startTracking(self, value):
+        if self.status in [self.STATUS_NOT_TRACKING, self.STATUS_STOPPED]:
+            self.setHoldPosition('radec')
+            self.status = self.STATUS_TRACKING
+        return ''
+
+    def stopTracking(self, value):
+        if self.status == self.STATUS_TRACKING:
+            self.setHoldPosition('azalt')
+            self.status = self.STATUS_NOT_TRACKING
+        return ''
+
+    def unpark(self, value):
+        if self.status == self.STATUS_PARKED:
+            self.status = self.STATUS_NOT_TRACKING
+        return ''
+
+    def park(self, value):
+        self.startSlew(0.0, 0.0, endStatus=self.STATUS_PARKED)
+        return ''
+
+    def stopMount(self, value):
+        now, ra, dec, az, alt = self.getPosition()
+        self.slew = None
+        self.hold = 'azalt'
+        self.az, self.alt = az, alt
+        self.status = self.STATUS_STOPPED
+        return ''
+
+    def getLST(self, value):
+        return self.formatSexagesimal(self.getLocalSiderealTime(), False) + '#'
+
+    def getInfo(self, value):
+        now, ra, dec, az, alt = self.getPosition()
+        slewing = '1' if self.slew is not None else '0'
+        return '{0:.4f},{1:+.4f},{2},{3:.4f},{4:+.4f},{5:.8f},{6},{7}#'.format(ra, dec, self.pierside, az, alt,
+                                                                            self.getJulianDate(now), self.status, slewing)
+
+    def getSlewRate(self, value):
+        return '{0:02d}#'.format(self.slewRate)
+
+    def getTimeToFlip(self, value):
+        now, ra, dec, az, alt = self.getPosition()
+        hourAngle = self.getHourAngle(ra, now)
+        minutes = self.meridianLimitGuide * 4
+        if hourAngle < 0:
+            minutes += int(-hourAngle * 60)
+        return '{0:04d}#'.format(int(minutes))
+
+    def getMeridianLimitGuide(self, value):
+        return '{0:02d}#'.format(self.meridianLimitGuide)
+
+    def getMeridianLimitSlew(self, value):
+        return '{0:02d}#'.format(self.meridianLimitSlew)
+
+    def getRefractionTemperature(self, value):
+        return '{0:+06.1f}#'.format(self.refractionTemperature)
+
+    def getRefractionPressure(self, value):
+        return '{0:06.1f}#'.format(self.refractionPressure)
+
+    def getTemperatureDec(self, value):
+        return '{0:+06.1f}#'.format(self.refractionTemperature + 5)
+
+    def getRefraction(self, value):
+        return '{0:1d}'.format(self.refraction)
+
+    def getUnattendedFlip(self, value):
+        return '{0:1d}'.format(self.unattendedFlip)
+
+    def getDualAxisTracking(self, value):
+        return '{0:1d}'.format(self.dualAxisTracking)
+
+    def getHorizonLimitHigh(self, value):
+        return '{0:+03d}#'.format(self.horizonLimitHigh)
+
+    def getHorizonLimitLow(self, value):
+        return '{0:+03d}#'.format(self.horizonLimitLow)
+
+    @staticmethod
+    def getUTCData(value):
+        return 'V,2019-06-30#'
+
+    def getSiteHeight(self, value):
+        return '{0:+06.1f}#'.format(self.siteHeight)
+
+    def getSiteLongitude(self, value):
+        # due to compatibility to LX200 protocol east is negative
+        return self.formatSexagesimal(-self.siteLon, True, digits=1, width=3) + '#'
+
+    def getSiteLatitude(self, value):
+        return self.formatSexagesimal(self.siteLat, True, digits=1) + '#'
+
+    def getNumberAlignmentPoints(self, value):
+        return '{0:d}#'.format(len(self.alignPoints))
+
+    def getAlignmentInfo(self, value):
+        if len(self.alignPoints) < 3:
+            return 'E,E,E,E,E,E,E,E,E#'
+        rms = math.sqrt(sum(point['Error'] ** 2 for point in self.alignPoints) / len(self.alignPoints))
+        terms = min(len(self.alignPoints) * 2, 19)
+        return '+0.0123,-0.0045,0.0131,+123.4,+0.0021,0.25,-0.10,{0:02d},{1:05.1f}#'.format(terms, rms)
+
+    def getAlignmentPoint(self, value):
+        index = int(value) - 1
+        if not 0 <= index < len(self.alignPoints):
+            return 'E#'
+        point = self.alignPoints[index]
+        return '{0},{1},{2:07.1f},{3:03d}#'.format(self.formatSexagesimal(point['HA'] % 24, False),
+                                                   self.formatSexagesimal(point['Dec'], True, spl='*', digits=1),
+                                                   point['Error'], int(point['Angle']))
+
+    def newAlignment(self, value):
+        self.newAlignPoints = list()
+        return 'V#'
+
+    def newAlignmentPoint(self, value):
+        if self.newAlignPoints is None:
+            return 'E#'
+        values = value.split(',')
+        if len(values) != 6:
+            return 'E#'
+        ra = self.parseSexagesimal(values[0])
+        dec = self.parseSexagesimal(values[1])
+        raSolved = self.parseSexagesimal(values[3])
+        decSolved = self.parseSexagesimal(values[4])
+        siderealTime = self.parseSexagesimal(values[5])
+        distance, angle = self.angularDistance(ra, dec, raSolved, decSolved)
+        self.newAlignPoints.append({'HA': (siderealTime - ra) % 24, 'Dec': dec, 'Error': distance * 3600, 'Angle': angle})
+        return '{0:d}#'.format(len(self.newAlignPoints))
+
+    def endAlignment(self, value):
+        if self.newAlignPoints is None or len(self.newAlignPoints) < 3:
+            self.newAlignPoints = None
+            return 'E#'
+        self.alignPoints = self.newAlignPoints
+        self.newAlignPoints = None
+        return 'V#'
+
+    def deleteAlignmentPoint(self, value):
+        index = int(value) - 1
+        if not 0 <= index < len(self.alignPoints):
+            return '0#'
+        del self.alignPoints[index]
+        return '1#'
+
+    def deleteAlignment(self, value):
+        self.alignPoints = list()
+        return '1'
+
+    def saveModel(self, value):
+        if not value:
+            return '0#'
+        self.modelNames[value] = [dict(point) for point in self.alignPoints]
+        return '1#'
+
+    def loadModel(self, value):
+        if value not in self.modelNames:
+            return '0#'
+        self.alignPoints = [dict(point) for point in self.modelNames[value]]
+        return '1#'
+
+    def deleteModel(self, value):
+        if value not in self.modelNames:
+            return '0#'
+        del self.modelNames[value]
+        return '1#'
+
+    def getModelName(self, value):
+        index = int(value) - 1
+        names = sorted(self.modelNames)
+        if not 0 <= index < len(names):
+            return '#'
+        return names[index] + '#'
+
+    def setTargetAz(self, value):
+        self.targetAz = self.parseSexagesimal(value) % 360
+        self.targetType = 'azalt'
+        return '1'
+
+    def setTargetAlt(self, value):
+        self.targetAlt = self.parseSexagesimal(value)
+        self.targetType = 'azalt'
+        return '1'
+
+    def setTargetRa(self, value):
+        self.targetRa = self.parseSexagesimal(value) % 24
+        self.targetType = 'radec'
+        return '1'
+
+    def setTargetDec(self, value):
+        self.targetDec = self.parseSexagesimal(value)
+        self.targetType = 'radec'
+        return '1'
+
+    def slewTarget(self, value):
+        if self.status == self.STATUS_PARKED:
+            return '1'
+        if self.targetType == 'radec':
+            self.startSlew(0, 0, targetRa=self.targetRa, targetDec=self.targetDec)
+        else:
+            self.startSlew(self.targetAz, self.targetAlt)
+        return '0'
+
+    def slewTargetAzAlt(self, value):
+        if self.status == self.STATUS_PARKED:
+            return '1'
+        self.startSlew(self.targetAz, self.targetAlt, endStatus=self.STATUS_NOT_TRACKING)
+        return '0'
+
+    def syncTarget(self, value):
+        if self.slew is None and self.hold == 'radec':
+            self.ra, self.dec = self.targetRa, self.targetDec
+        return self.CM_REPLY
+
+    def syncStar(self, value):
+        return 'V'
+
+    def getRa(self, value):
+        now, ra, dec, az, alt = self.getPosition()
+        return self.formatSexagesimal(ra, False) + '#'
+
+    def getDec(self, value):
+        now, ra, dec, az, alt = self.getPosition()
+        return self.formatSexagesimal(dec, True, spl='*', digits=1) + '#'
+
+    def setRefractionPressure(self, value):
+        self.refractionPressure = float(value)
+        return '1'
+
+    def setRefractionTemperature(self, value):
+        self.refractionTemperature = float(value)
+        return '1'
+
+    def setRefraction(self, value):
+        self.refraction = int(value)
+        return '1'
+
+    def setSlewRate(self, value):
+        self.slewRate = int(value)
+        return '1'
+
+    def setDualAxisTracking(self, value):
+        self.dualAxisTracking = int(value)
+        return '1'
+
+    def setUnattendedFlip(self, value):
+        self.unattendedFlip = int(value)
+        return '1'
+
+    def setHorizonLimitLow(self, value):
+        self.horizonLimitLow = int(value)
+        return '1'
+
+    def setHorizonLimitHigh(self, value):
+        self.horizonLimitHigh = int(value)
+        return '1'
+
+    def shutdown(self, value):
+        self.slew = None
+        self.status = self.STATUS_STOPPED
+        # the mount closes the connections after replying
+        threading.Timer(0.1, self.dropConnections).start()
+        return '1'
+
+    def flip(self, value):
+        if self.status != self.STATUS_TRACKING or self.slew is not None:
+            return '0'
+        self.pierside = 'E' if self.pierside == 'W' else 'W'
+        now, ra, dec, az, alt = self.getPosition()
+        self.startSlew(0, 0, targetRa=ra, targetDec=dec)
+        return '1'
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='10micron mount simulator')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=3490)
+    parser.add_argument('--latency', type=float, default=0.0, help='reply latency in seconds')
+    parser.add_argument('--slew-rate', type=int, default=15, help='slew rate in deg/s')
+    parser.add_argument('--settle-time', type=float, default=1.0, help='settle time after slew in seconds')
+    parser.add_argument('--drop-interval', type=float, default=0, help='drop all connections every n seconds')
+    parser.add_argument('--points', type=int, default=0, help='number of alignment points to preload')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    simulator = MountSimulator(host=args.host, port=args.port, latency=args.latency, slewRate=args.slew_rate,
+                               settleTime=args.settle_time, dropInterval=args.drop_interval)
+    simulator.alignPoints = [{'HA': (i * 24.0 / max(args.points, 1)) % 24, 'Dec': 10 + i % 60, 'Error': 5.0 + i % 7, 'Angle': (i * 37) % 360}
+                             for i in range(0, args.points)]
+    simulator.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        simulator.stop()
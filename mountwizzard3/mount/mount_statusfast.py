@@ -20,37 +20,45 @@
 import logging
 import PyQt5
 import time
-from queue import Queue
-from astrometry import transform
+import math
+import collections
 
 
 class MountStatusRunnerFast(PyQt5.QtCore.QObject):
     logger = logging.getLogger(__name__)
 
-    CONNECTION_TIMEOUT = 3000
     CYCLE_STATUS_FAST = 1500
-    CYCLE = 250
+    # while the mount slews, the status is polled with high rate, so the end of the slew is seen quickly
+    CYCLE_STATUS_SLEWING = 150
+    # if the end of a slew is not seen in time, the normal rate is taken again
+    SLEW_MONITORING_TIMEOUT = 300
+    # after the slew the position has to be stable within the tolerance in arcsec for the stable time in seconds
+    SETTLE_TOLERANCE = 10.0
+    SETTLE_STABLE_TIME = 1.0
+    SETTLE_MONITORING_TIMEOUT = 60
+    NUMBER_SETTLE_SAMPLES = 200
     signalDestruct = PyQt5.QtCore.pyqtSignal()
 
-    def __init__(self, app, thread, data, signalConnected, mountStatus):
+    def __init__(self, app, protocol, data, mountStatus):
         super().__init__()
 
         self.app = app
+        self.protocol = protocol
         self.data = data
-        self.thread = thread
-        self.signalConnected = signalConnected
         self.mountStatus = mountStatus
         self.mutexIsRunning = PyQt5.QtCore.QMutex()
         self.dataTimer = None
-        self.cycleTimer = None
         self.isRunning = False
-        self.connectCounter = 0
-        self.socket = None
-        self.sendLock = False
-        self.messageString = ''
-        self.sendCommandQueue = Queue()
-        self.transform = transform.Transform(self.app)
+        self.transform = self.app.transform
         self.audioDone = False
+        self.slewMonitoring = False
+        self.timeSlewStarted = 0
+        self.timeLastSlewing = 0
+        self.settleMonitoring = False
+        self.timeSettleStarted = 0
+        self.settleTolerance = self.SETTLE_TOLERANCE
+        self.settleStableTime = self.SETTLE_STABLE_TIME
+        self.settleSamples = collections.deque(maxlen=self.NUMBER_SETTLE_SAMPLES)
 
     def run(self):
         self.logger.info('mount fast started')
@@ -58,145 +66,110 @@ class MountStatusRunnerFast(PyQt5.QtCore.QObject):
         if not self.isRunning:
             self.isRunning = True
         self.mutexIsRunning.unlock()
-        self.socket = PyQt5.QtNetwork.QTcpSocket()
-        self.socket.setSocketOption(PyQt5.QtNetwork.QAbstractSocket.LowDelayOption, 1)
-        self.socket.setSocketOption(PyQt5.QtNetwork.QAbstractSocket.KeepAliveOption, 1)
-        self.socket.hostFound.connect(self.handleHostFound)
-        self.socket.connected.connect(self.handleConnected)
-        self.socket.stateChanged.connect(self.handleStateChanged)
-        self.socket.disconnected.connect(self.handleDisconnect)
-        self.socket.readyRead.connect(self.handleReadyRead)
-        self.socket.error.connect(self.handleError)
         # timers
         self.dataTimer = PyQt5.QtCore.QTimer(self)
         self.dataTimer.setSingleShot(False)
         self.dataTimer.timeout.connect(self.getStatusFast)
         self.dataTimer.start(self.CYCLE_STATUS_FAST)
         self.signalDestruct.connect(self.destruct, type=PyQt5.QtCore.Qt.BlockingQueuedConnection)
-        self.cycleTimer = PyQt5.QtCore.QTimer(self)
-        self.cycleTimer.setSingleShot(False)
-        self.cycleTimer.timeout.connect(self.doCommand)
-        self.cycleTimer.start(self.CYCLE)
 
     def stop(self):
         self.mutexIsRunning.lock()
         if self.isRunning:
             self.isRunning = False
             self.signalDestruct.emit()
-            self.signalConnected.emit({'Fast': False})
-            self.thread.quit()
-            self.thread.wait()
         self.mutexIsRunning.unlock()
         self.logger.info('mount fast stopped')
 
     @PyQt5.QtCore.pyqtSlot()
     def destruct(self):
-        self.cycleTimer.stop()
         self.dataTimer.stop()
-        self.socket.hostFound.disconnect(self.handleHostFound)
-        self.socket.connected.disconnect(self.handleConnected)
-        self.socket.stateChanged.disconnect(self.handleStateChanged)
-        self.socket.disconnected.disconnect(self.handleDisconnect)
-        self.socket.error.disconnect(self.handleError)
-        self.socket.readyRead.disconnect(self.handleReadyRead)
         self.signalDestruct.disconnect(self.destruct)
-        self.socket.abort()
-
-    def doCommand(self):
-        self.doReconnect()
-        if not self.sendCommandQueue.empty() and (self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState):
-            command = self.sendCommandQueue.get()
-            if not self.sendLock:
-                self.sendCommand(command)
-
-    def doReconnect(self):
-        # to get order in connections, we wait for first connecting the once type
-        if self.mountStatus['Once'] and self.data['FW'] > 0:
-            if self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.UnconnectedState:
-                if self.connectCounter == 0:
-                    self.app.sharedMountDataLock.lockForRead()
-                    self.socket.connectToHost(self.data['MountIP'], self.data['MountPort'])
-                    self.app.sharedMountDataLock.unlock()
-                    self.sendCommandQueue.queue.clear()
-                else:
-                    # connection build up is ongoing
-                    pass
-                if self.connectCounter * self.CYCLE > self.CONNECTION_TIMEOUT:
-                    self.socket.abort()
-                    self.connectCounter = 0
-                else:
-                    self.connectCounter += 1
-            else:
-                if self.socket.state() != PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
-                    if self.connectCounter * self.CYCLE > self.CONNECTION_TIMEOUT:
-                        self.socket.abort()
-                        self.connectCounter = 0
-                    else:
-                        self.connectCounter += 1
-                else:
-                    # connected
-                    pass
-
-    @PyQt5.QtCore.pyqtSlot()
-    def handleHostFound(self):
-        self.app.sharedMountDataLock.lockForRead()
-        self.logger.debug('Mount RunnerFast found at {}:{}'.format(self.data['MountIP'], self.data['MountPort']))
-        self.app.sharedMountDataLock.unlock()
 
     @PyQt5.QtCore.pyqtSlot()
-    def handleConnected(self):
-        self.signalConnected.emit({'Fast': True})
-        self.app.sharedMountDataLock.lockForRead()
-        self.logger.info('Mount RunnerFast connected at {0}:{1}'.format(self.data['MountIP'], self.data['MountPort']))
-        self.app.sharedMountDataLock.unlock()
-
-    @PyQt5.QtCore.pyqtSlot(PyQt5.QtNetwork.QAbstractSocket.SocketError)
-    def handleError(self, socketError):
-        self.logger.warning('Mount RunnerFast connection fault: {0}'.format(socketError))
-
-    @PyQt5.QtCore.pyqtSlot()
-    def handleStateChanged(self):
-        self.logger.debug('Mount RunnerFast connection has state: {0}'.format(self.socket.state()))
-
-    @PyQt5.QtCore.pyqtSlot()
-    def handleDisconnect(self):
-        self.logger.info('Mount RunnerFast connection is disconnected from host')
-        self.signalConnected.emit({'Fast': False})
-
-    def sendCommand(self, command):
-        if self.isRunning:
-            if self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
-                self.sendLock = True
-                self.socket.write(bytes(command + '\r', encoding='ascii'))
-                self.socket.flush()
-            else:
-                self.sendLock = False
-                self.logger.warning('Socket RunnerFast not connected')
+    def startSlewMonitoring(self):
+        # called when the mount has accepted a slew command
+        self.slewMonitoring = True
+        self.settleMonitoring = False
+        self.timeSlewStarted = time.time()
+        self.timeLastSlewing = self.timeSlewStarted
+        self.dataTimer.setInterval(self.CYCLE_STATUS_SLEWING)
+        self.getStatusFast()
+
+    def stopSlewMonitoring(self):
+        self.slewMonitoring = False
+        self.settleMonitoring = False
+        self.dataTimer.setInterval(self.CYCLE_STATUS_FAST)
+
+    def setSettleParameters(self, tolerance, stableTime):
+        self.settleTolerance = tolerance
+        self.settleStableTime = stableTime
+
+    def startSettleMonitoring(self):
+        # the high rate is kept after the slew, because the settling is seen in the position stream
+        self.slewMonitoring = False
+        self.settleMonitoring = True
+        self.timeSettleStarted = time.time()
+        self.settleSamples.clear()
+
+    def isSettled(self, timeQueued):
+        # while tracking the equatorial position has to be stable, otherwise the horizontal one, both in degrees
+        if self.data['Status'] == 0:
+            position = (self.data['RaJNow'] * 15, self.data['DecJNow'])
+        else:
+            position = (self.data['Az'], self.data['Alt'])
+        self.settleSamples.append((timeQueued, position))
+        # looking back from the latest sample, how long the position is already within the tolerance
+        for timeSample, sample in reversed(self.settleSamples):
+            deltaFirst = ((sample[0] - position[0] + 180) % 360 - 180) * math.cos(math.radians(position[1]))
+            deltaSecond = sample[1] - position[1]
+            if math.sqrt(deltaFirst * deltaFirst + deltaSecond * deltaSecond) * 3600 > self.settleTolerance:
+                return False
+            if timeQueued - timeSample >= self.settleStableTime:
+                return True
+        return False
+
+    def isSlewFinished(self, slewing, timeQueued):
+        # without monitoring the end of a slew is the change of the slewing flag
+        if not self.slewMonitoring:
+            return self.data.get('Slewing', False) and not slewing
+        if slewing:
+            self.timeLastSlewing = max(self.timeLastSlewing, timeQueued)
+            return False
+        # replies to requests, which were queued before the mount accepted the slew, show the old state
+        if timeQueued < self.timeSlewStarted:
+            return False
+        # the slew ended after the last request, which still showed slewing, so this is the upper bound of the latency
+        timeNow = time.time()
+        self.data['SlewDetectionLatency'] = timeNow - self.timeLastSlewing
+        self.logger.info('Slew finished after {0:4.2f} s, detection latency < {1:4.0f} ms'.format(timeNow - self.timeSlewStarted, self.data['SlewDetectionLatency'] * 1000))
+        self.startSettleMonitoring()
+        return True
 
     @PyQt5.QtCore.pyqtSlot()
     def getStatusFast(self):
-        if self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
-            self.sendCommandQueue.put(':U2#:GS#:Ginfo#:')
-
-    @PyQt5.QtCore.pyqtSlot()
-    def handleReadyRead(self):
-        # Get message from socket.
-        while self.socket.bytesAvailable() and self.isRunning:
-            self.messageString += self.socket.read(1024).decode()
-        if self.messageString.count('#') < 2:
+        # returns a future, which is resolved after the reply is parsed into data, or None if the mount is not ready
+        if self.slewMonitoring and time.time() - self.timeSlewStarted > self.SLEW_MONITORING_TIMEOUT:
+            self.logger.warning('End of slew not seen within {0} s, back to normal status rate'.format(self.SLEW_MONITORING_TIMEOUT))
+            self.stopSlewMonitoring()
+        if self.settleMonitoring and time.time() - self.timeSettleStarted > self.SETTLE_MONITORING_TIMEOUT:
+            self.logger.warning('Mount position not stable within {0} s, back to normal status rate'.format(self.SETTLE_MONITORING_TIMEOUT))
+            self.stopSlewMonitoring()
+        if self.protocol.isReady():
+            # the time of the request is needed to tell, if the reply shows the state after a slew command
+            job = self.protocol.addJob('Fast', ':U2#:GS#:Ginfo#:', self.protocol.PRIORITY_FAST,
+                                       callback=lambda message, t=time.time(): self.handleReply(message, t),
+                                       numberHash=2, coalesce=True)
+            return job['Future']
+        return None
+
+    def handleReply(self, messageToProcess, timeQueued):
+        if messageToProcess.count(',') != 7 or messageToProcess.count('#') != 2:
+            self.logger.error('Receiving data got error:{0}'.format(messageToProcess))
             return
-        if self.messageString.count(',') != 7 or self.messageString.count('#') != 2:
-            self.logger.error('Receiving data got error:{0}'.format(self.messageString))
-            self.messageString = ''
-            messageToProcess = ''
-        else:
-            messageToProcess = self.messageString
-            self.messageString = ''
         # Try and parse the message. In fast we ask for GS and Ginfo so we expect 2
+        self.app.sharedMountDataLock.lockForWrite()
         try:
-            if len(messageToProcess) == 0:
-                return
-            self.app.sharedMountDataLock.lockForWrite()
             valueList = messageToProcess.strip('#').split('#')
             # first the GS command
             if len(valueList) == 2:
@@ -227,11 +200,15 @@ class MountStatusRunnerFast(PyQt5.QtCore.QObject):
                             else:
                                 self.audioDone = False
                             # calculate if slewing stopped
-                            if 'Slewing' in self.data:
-                                if self.data['Slewing'] and value[7] != '1':
-                                    self.app.workerMountDispatcher.signalSlewFinished.emit()
-                                    self.app.audioCommandQueue.put('MountSlew')
+                            if self.isSlewFinished(value[7] == '1', timeQueued):
+                                self.app.workerMountDispatcher.signalSlewFinished.emit()
+                                self.app.audioCommandQueue.put('MountSlew')
                             self.data['Slewing'] = (value[7] == '1')
+                            if self.settleMonitoring and self.isSettled(timeQueued):
+                                self.data['SettleTime'] = time.time() - self.timeSettleStarted
+                                self.logger.info('Mount settled after {0:4.2f} s'.format(self.data['SettleTime']))
+                                self.stopSlewMonitoring()
+                                self.app.workerMountDispatcher.signalMountSettled.emit(self.data['SettleTime'])
                             self.data['RaJ2000'], self.data['DecJ2000'] = self.transform.transformERFA(self.data['RaJNow'], self.data['DecJNow'], 2)
                             self.data['TelescopeRA'] = '{0}'.format(self.transform.decimalToDegree(self.data['RaJ2000'], False, False))
                             self.data['TelescopeDEC'] = '{0}'.format(self.transform.decimalToDegree(self.data['DecJ2000'], True, False))
@@ -256,4 +233,3 @@ class MountStatusRunnerFast(PyQt5.QtCore.QObject):
             self.logger.error('Problem parsing response, error: {0}, message:{1}'.format(e, messageToProcess))
         finally:
             self.app.sharedMountDataLock.unlock()
-        self.sendLock = False
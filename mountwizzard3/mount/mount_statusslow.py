@@ -20,36 +20,26 @@
 import logging
 import PyQt5
 import time
-from queue import Queue
-from astrometry import transform
 from mount import align_stars
-import numpy as np
 
 
 class MountStatusRunnerSlow(PyQt5.QtCore.QObject):
     logger = logging.getLogger(__name__)
 
     CYCLE_STATUS_SLOW = 10000
-    CYCLE = 250
     signalDestruct = PyQt5.QtCore.pyqtSignal()
 
-    def __init__(self, app, thread, data, signalConnected, mountStatus):
+    def __init__(self, app, protocol, data, mountStatus):
         super().__init__()
 
         self.app = app
-        self.thread = thread
+        self.protocol = protocol
         self.data = data
-        self.signalConnected = signalConnected
         self.mountStatus = mountStatus
         self.mutexIsRunning = PyQt5.QtCore.QMutex()
         self.dataTimer = None
-        self.cycleTimer = None
         self.isRunning = False
-        self.socket = None
-        self.sendLock = False
-        self.messageString = ''
-        self.sendCommandQueue = Queue()
-        self.transform = transform.Transform(self.app)
+        self.transform = self.app.transform
         self.alignmentStars = align_stars.AlignStars(self.app)
 
         self.app.sharedMountDataLock.lockForWrite()
@@ -70,129 +60,55 @@ class MountStatusRunnerSlow(PyQt5.QtCore.QObject):
         if not self.isRunning:
             self.isRunning = True
         self.mutexIsRunning.unlock()
-        self.socket = PyQt5.QtNetwork.QTcpSocket()
-        self.socket.setSocketOption(PyQt5.QtNetwork.QAbstractSocket.LowDelayOption, 1)
-        self.socket.setSocketOption(PyQt5.QtNetwork.QAbstractSocket.KeepAliveOption, 1)
-        self.socket.hostFound.connect(self.handleHostFound)
-        self.socket.connected.connect(self.handleConnected)
-        self.socket.stateChanged.connect(self.handleStateChanged)
-        self.socket.disconnected.connect(self.handleDisconnect)
-        self.socket.readyRead.connect(self.handleReadyRead)
-        self.socket.error.connect(self.handleError)
         # timers
         self.dataTimer = PyQt5.QtCore.QTimer(self)
         self.dataTimer.setSingleShot(False)
         self.dataTimer.timeout.connect(self.getStatusSlow)
         self.dataTimer.start(self.CYCLE_STATUS_SLOW)
+        self.protocol.signalReady.connect(self.getStatusSlow)
         self.signalDestruct.connect(self.destruct, type=PyQt5.QtCore.Qt.BlockingQueuedConnection)
-        self.cycleTimer = PyQt5.QtCore.QTimer(self)
-        self.cycleTimer.setSingleShot(False)
-        self.cycleTimer.timeout.connect(self.doCommand)
-        self.cycleTimer.start(self.CYCLE)
 
     def stop(self):
         self.mutexIsRunning.lock()
         if self.isRunning:
             self.isRunning = False
             self.signalDestruct.emit()
-            self.signalConnected.emit({'Slow': False})
-            self.thread.quit()
-            self.thread.wait()
         self.mutexIsRunning.unlock()
         self.logger.info('mount slow stopped')
 
     @PyQt5.QtCore.pyqtSlot()
     def destruct(self):
-        self.cycleTimer.stop()
         self.dataTimer.stop()
+        self.protocol.signalReady.disconnect(self.getStatusSlow)
         self.signalDestruct.disconnect(self.destruct)
-        self.socket.hostFound.disconnect(self.handleHostFound)
-        self.socket.connected.disconnect(self.handleConnected)
-        self.socket.stateChanged.disconnect(self.handleStateChanged)
-        self.socket.disconnected.disconnect(self.handleDisconnect)
-        self.socket.error.disconnect(self.handleError)
-        self.socket.readyRead.disconnect(self.handleReadyRead)
-        self.socket.abort()
-
-    def doCommand(self):
-        self.doReconnect()
-        if not self.sendCommandQueue.empty() and (self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState):
-            command = self.sendCommandQueue.get()
-            if not self.sendLock:
-                self.sendCommand(command)
-
-    def doReconnect(self):
-        # to get order in connections, we wait for first connecting the once type
-        if self.mountStatus['Once'] and self.data['FW'] > 0:
-            if self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.UnconnectedState:
-                self.app.sharedMountDataLock.lockForRead()
-                self.socket.connectToHost(self.data['MountIP'], self.data['MountPort'])
-                self.app.sharedMountDataLock.unlock()
-                self.sendCommandQueue.queue.clear()
-
-    @PyQt5.QtCore.pyqtSlot()
-    def handleHostFound(self):
-        self.app.sharedMountDataLock.lockForRead()
-        self.logger.debug('Mount RunnerSlow found at {}:{}'.format(self.data['MountIP'], self.data['MountPort']))
-        self.app.sharedMountDataLock.unlock()
-
-    @PyQt5.QtCore.pyqtSlot()
-    def handleConnected(self):
-        self.signalConnected.emit({'Slow': True})
-        self.getStatusSlow()
-        self.app.sharedMountDataLock.lockForRead()
-        self.logger.info('Mount RunnerSlow connected at {0}:{1}'.format(self.data['MountIP'], self.data['MountPort']))
-        self.app.sharedMountDataLock.unlock()
-
-    @PyQt5.QtCore.pyqtSlot(PyQt5.QtNetwork.QAbstractSocket.SocketError)
-    def handleError(self, socketError):
-        self.logger.warning('Mount RunnerSlow connection fault: {0}'.format(socketError))
-
-    @PyQt5.QtCore.pyqtSlot()
-    def handleStateChanged(self):
-        self.logger.debug('Mount RunnerSlow connection has state: {0}'.format(self.socket.state()))
-
-    @PyQt5.QtCore.pyqtSlot()
-    def handleDisconnect(self):
-        self.logger.info('Mount RunnerSlow connection is disconnected from host')
-        self.signalConnected.emit({'Slow': False})
-
-    def sendCommand(self, command):
-        if self.isRunning:
-            if self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
-                self.socket.write(bytes(command + '\r', encoding='ascii'))
-                self.socket.flush()
-            else:
-                self.logger.warning('Socket RunnerSlow not connected')
 
     @PyQt5.QtCore.pyqtSlot()
     def getStatusSlow(self):
         self.updateAlignmentStarPositions()
         self.app.workerMountDispatcher.signalAlignmentStars.emit()
-        if self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
+        if self.protocol.isReady():
             self.app.sharedMountDataLock.lockForRead()
             if self.data['FW'] < 21500:
-                self.sendCommandQueue.put(':U2#:GTMP1#:GREF#:Guaf#:Gdat#:Gh#:Go#')
+                command = ':U2#:GTMP1#:GREF#:Guaf#:Gdat#:Gh#:Go#'
+                numberResults = 3
             else:
-                self.sendCommandQueue.put(':U2#:GTMP1#:GREF#:Guaf#:Gdat#:Gh#:Go#:GDUTV#')
+                command = ':U2#:GTMP1#:GREF#:Guaf#:Gdat#:Gh#:Go#:GDUTV#'
+                numberResults = 4
             self.app.sharedMountDataLock.unlock()
+            self.protocol.addJob('Slow', command, self.protocol.PRIORITY_SLOW,
+                                 callback=self.handleReply, numberHash=numberResults, coalesce=True)
 
     def updateAlignmentStarPositions(self):
-        # update topo data for alignment stars
+        # update topo data for alignment stars, all stars are transformed in one batch
+        names = list(self.alignmentStars.stars)
+        ra = self.transform.degStringToDecimal([self.alignmentStars.stars[name][0] for name in names], ' ')
+        dec = self.transform.degStringToDecimal([self.alignmentStars.stars[name][1] for name in names], ' ')
+        az, alt = self.transform.transformERFA(ra, dec, 1)
         self.app.sharedMountDataLock.lockForWrite()
-        if len(self.data['starsTopo']) == 0:
-            self.data['starsTopo'] = np.empty((len(self.alignmentStars.stars), 0)).tolist()
+        self.data['starsTopo'] = list(zip(az.tolist(), alt.tolist()))
         self.app.sharedMountDataLock.unlock()
-        for i, name in enumerate(self.alignmentStars.stars):
-            self.app.sharedMountDataLock.lockForWrite()
-            ra = self.transform.degStringToDecimal(self.alignmentStars.stars[name][0], ' ')
-            dec = self.transform.degStringToDecimal(self.alignmentStars.stars[name][1], ' ')
-            self.data['starsTopo'][i] = self.transform.transformERFA(ra, dec, 1)
-            self.app.sharedMountDataLock.unlock()
 
-    @PyQt5.QtCore.pyqtSlot()
-    def handleReadyRead(self):
-        # Get message from socket.
+    def handleReply(self, messageToProcess):
         # we have a firmware dependency
         self.app.sharedMountDataLock.lockForRead()
         if self.data['FW'] < 21500:
@@ -200,24 +116,13 @@ class MountStatusRunnerSlow(PyQt5.QtCore.QObject):
         else:
             numberResults = 4
         self.app.sharedMountDataLock.unlock()
-
-        while self.socket.bytesAvailable() and self.isRunning:
-            self.messageString += self.socket.read(1024).decode()
-        if self.messageString.count('#') < numberResults:
+        if messageToProcess.count('#') != numberResults:
+            self.logger.error('Receiving data got error:{0}'.format(messageToProcess))
             return
-        if self.messageString.count('#') != numberResults:
-            self.logger.error('Receiving data got error:{0}'.format(self.messageString))
-            self.messageString = ''
-            messageToProcess = ''
-        else:
-            messageToProcess = self.messageString
-            self.messageString = ''
         # Try and parse the message. In medium we expect 3 or 4 depending on FW
+        self.logger.info('Raw data from Mount: {0}'.format(messageToProcess))
+        self.app.sharedMountDataLock.lockForWrite()
         try:
-            if len(messageToProcess) == 0:
-                return
-            self.logger.info('Raw data from Mount: {0}'.format(messageToProcess))
-            self.app.sharedMountDataLock.lockForWrite()
             valueList = messageToProcess.strip('#').split('#')
             #  +029.8# 1 0 1 +90# +00# V,2018-03-24#
             # all parameters are delivered
@@ -241,4 +146,3 @@ class MountStatusRunnerSlow(PyQt5.QtCore.QObject):
             self.logger.error('Problem parsing response, error: {0}, message:{1}'.format(e, messageToProcess))
         finally:
             self.app.sharedMountDataLock.unlock()
-        self.sendLock = False
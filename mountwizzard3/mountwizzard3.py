@@ -46,6 +46,7 @@ from widgets import message_window
 from gui import main_window_ui
 from modeling import model_dispatcher
 from mount import mount_dispatcher
+from mount import mount_command
 from relays import relays
 from remote import remote
 from dome import dome
@@ -90,7 +91,7 @@ class MountWizzardApp(widget.MwWidget):
         self.setObjectName("Main")
 
         # setting up the queues for communication between the threads
-        self.mountCommandQueue = Queue()
+        self.mountCommandQueue = mount_command.MountCommandQueue()
         self.domeCommandQueue = Queue()
         self.modelCommandQueue = Queue()
         self.audioCommandQueue = Queue()
@@ -99,6 +100,9 @@ class MountWizzardApp(widget.MwWidget):
         self.INDICommandQueue = Queue()
         self.INDIStatusQueue = Queue()
 
+        # one coordinate transformation for all modules, it gets site and time updates through the signals
+        self.transform = transform.Transform(self)
+
         # initializing the gui from file generated from qt creator
         self.ui = main_window_ui.Ui_MainWindow()
         self.ui.setupUi(self)
@@ -1008,7 +1012,17 @@ class MountWizzardApp(widget.MwWidget):
         nameDataFile = os.path.basename(value)
         self.logger.info('Modeling from {0}'.format(nameDataFile))
         data = self.analyse.loadData(nameDataFile)
-        self.workerMountDispatcher.programBatchData(data)
+        # programming waits for the mount reply, so it is done in the mount dispatcher thread
+        action = {
+            'Worker': [
+                {
+                    'Button': self.ui.btn_runBatchModel,
+                    'Parameter': [data],
+                    'Method': self.workerMountDispatcher.programBatchData,
+                }
+            ]
+        }
+        self.workerMountDispatcher.commandDispatcherQueue.put(action)
 
     def cancelFullModel(self):
         # cancel only works if modeling gis running. otherwise recoloring button after stop won't happen
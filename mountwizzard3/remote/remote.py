@@ -172,6 +172,11 @@ class Remote(PyQt5.QtCore.QObject):
             if message == 'shutdown\r\n':
                 self.logger.info('Shutdown MountWizzard from {0}'.format(self.clientConnection.peerAddress().toString()))
                 self.signalRemoteShutdown.emit(True)
+            elif message == 'modeleta\r\n':
+                # time estimation of a running model build, otherwise the placeholders
+                modelingRunner = self.app.workerModelingDispatcher.modelingRunner
+                reply = 'modeleta {0} {1}\r\n'.format(modelingRunner.timeEstimated, modelingRunner.timeFinished)
+                self.clientConnection.write(bytes(reply, 'ascii'))
 
     @PyQt5.QtCore.pyqtSlot()
     def removeConnection(self):
@@ -0,0 +1,64 @@
+############################################################
+# -*- coding: utf-8 -*-
+#
+#       #   #  #   #   #  ####
+#      ##  ##  #  ##  #     #
+#     # # # #  # # # #     ###
+#    #  ##  #  ##  ##        #
+#   #   #   #  #   #     ####
+#
+# Python-based Tool for interaction with the 10micron mounts
+# GUI with PyQT5 for python
+# Python  v3.6.4
+#
+# Michael Würtenberger
+# (c) 2016, 2017, 2018
+#
+# Licence APL2.0
+#
+###########################################################
+from xml.etree import ElementTree
+from indi import indi_client
+
+
+def feedAll(parser, chunks):
+    # returns the tags of all elements and the number of parse errors, like the socket reading does
+    tags = list()
+    numberErrors = 0
+    for chunk in chunks:
+        try:
+            tags += [element.tag for element in parser.feed(chunk)]
+        except ElementTree.ParseError:
+            numberErrors += 1
+            parser.resync(chunk)
+    return tags, numberErrors
+
+
+def test_stream_parser_elements_across_chunks():
+    parser = indi_client.StreamParser()
+    tags, numberErrors = feedAll(parser, [b'<message device="a" mess', b'age="x"/><setNumberVector device="a" name="b">',
+                                          b'<oneNumber name="c">1</oneNumber></setNumberVector>'])
+    assert tags == ['message', 'setNumberVector']
+    assert numberErrors == 0
+
+
+def test_stream_parser_resync_after_error():
+    parser = indi_client.StreamParser()
+    chunks = [b'<message device="a" message="x"/>',
+              b'<setTextVector device="a" name="b"><oneText name="c">broken & </oneText>',
+              b'</setTextVector><oneText name="d">rest</oneText></setText',
+              b'Vector><delPro',
+              b'perty device="a"/><setSwitchVector device="a" name="e"><oneSwitch name="f">On</oneSwitch></setSwitchVector>']
+    tags, numberErrors = feedAll(parser, chunks)
+    assert numberErrors == 1
+    # the broken element and its rest are dropped, the stream is taken up at the next start tag
+    assert tags == ['message', 'delProperty', 'setSwitchVector']
+    assert not parser.isResyncing
+
+
+def test_stream_parser_reset_ends_resync():
+    parser = indi_client.StreamParser()
+    parser.resync(b'<set&')
+    parser.reset()
+    tags, numberErrors = feedAll(parser, [b'<message device="a"/>'])
+    assert tags == ['message']
@@ -0,0 +1,54 @@
+############################################################
+# -*- coding: utf-8 -*-
+#
+#       #   #  #   #   #  ####
+#      ##  ##  #  ##  #     #
+#     # # # #  # # # #     ###
+#    #  ##  #  ##  ##        #
+#   #   #   #  #   #     ####
+#
+# Python-based Tool for interaction with the 10micron mounts
+# GUI with PyQT5 for python
+# Python  v3.6.4
+#
+# Michael Würtenberger
+# (c) 2016, 2017, 2018
+#
+# Licence APL2.0
+#
+###########################################################
+import pytest
+from modeling import model_journal
+
+POINTS = [(10.0, 30.0), (100.0, 45.0), (200.0, 60.0)]
+
+
+@pytest.fixture
+def journal(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_journal.ModelJournal, 'JOURNAL_FILE', str(tmp_path / 'model_journal.dat'))
+    return model_journal.ModelJournal()
+
+
+def test_resume_directory_of_cancelled_run(journal):
+    modelingData = {'Directory': '2018-05-01-20-00-00'}
+    assert not journal.open(POINTS, modelingData)
+    journal.addSolved({'Index': 0, 'PointIndex': 0})
+    journal.close()
+    assert journal.getResumeDirectory(POINTS) == '2018-05-01-20-00-00'
+    assert journal.getResumeDirectory(POINTS[1:]) is None
+    modelingData = {'Directory': '2018-05-02-20-00-00'}
+    assert journal.open(POINTS, modelingData)
+    assert modelingData['Directory'] == '2018-05-01-20-00-00'
+    assert list(journal.solved) == [0]
+    journal.close()
+
+
+def test_declined_resume_starts_new_run(journal):
+    journal.open(POINTS, {'Directory': '2018-05-01-20-00-00'})
+    journal.close()
+    journal.remove()
+    assert journal.getResumeDirectory(POINTS) is None
+    modelingData = {'Directory': '2018-05-02-20-00-00'}
+    assert not journal.open(POINTS, modelingData)
+    assert modelingData['Directory'] == '2018-05-02-20-00-00'
+    journal.close()
@@ -0,0 +1,74 @@
+############################################################
+# -*- coding: utf-8 -*-
+#
+#       #   #  #   #   #  ####
+#      ##  ##  #  ##  #     #
+#     # # # #  # # # #     ###
+#    #  ##  #  ##  ##        #
+#   #   #   #  #   #     ####
+#
+# Python-based Tool for interaction with the 10micron mounts
+# GUI with PyQT5 for python
+# Python  v3.6.4
+#
+# Michael Würtenberger
+# (c) 2016, 2017, 2018
+#
+# Licence APL2.0
+#
+###########################################################
+from unittest import mock
+import numpy
+import pytest
+from astrometry import transform
+from modeling import model_points
+
+PRESETS = [('generateMaxPoints', range(-15, 90, 10), lambda dec: 10 if dec < 70 else 30),
+           ('generateNormalPoints', range(-15, 90, 15), lambda dec: 10 if dec < 60 else 20),
+           ('generateMinPoints', range(-15, 90, 15), lambda dec: 15 if dec < 60 else 30)]
+
+
+def scalarPreset(transformation, decRange, stepFunction):
+    # the former generation of the presets with one conversion per point
+    west = []
+    east = []
+    off = -5
+    for i, dec in enumerate(decRange):
+        step = stepFunction(dec)
+        if i % 2:
+            haRange = range(120 + off, -120 + off, -step)
+        else:
+            haRange = range(-120 + off, 120 + off, step)
+        for ha in haRange:
+            az, alt = transformation.topocentricToAzAlt(ha / 10, dec)
+            if alt > 0:
+                if az > 180:
+                    east.insert(0, (az, alt))
+                else:
+                    west.append((az, alt))
+    return west + east
+
+
+@pytest.fixture
+def modelPoints():
+    app = mock.MagicMock()
+    app.transform = transform.Transform(app)
+    app.transform.site = (48.0, 11.0, 500.0)
+    return model_points.ModelPoints(app)
+
+
+@pytest.mark.parametrize('method, decRange, stepFunction', PRESETS)
+def test_presets_match_scalar_conversion(modelPoints, method, decRange, stepFunction):
+    getattr(modelPoints, method)(False, False)
+    expected = scalarPreset(modelPoints.transform, decRange, stepFunction)
+    assert len(modelPoints.modelPoints) == len(expected)
+    difference = numpy.abs(numpy.array(modelPoints.modelPoints) - numpy.array(expected))
+    assert difference.max() < modelPoints.POINT_TOLERANCE
+
+
+def test_dso_path_without_points(modelPoints):
+    modelPoints.app.workerMountDispatcher.data = {'RaJNow': 10.0, 'DecJNow': 20.0}
+    modelPoints.modelPoints = [(10.0, 20.0)]
+    modelPoints.generateDSOPoints(False, 1.0, 0, 0.0)
+    assert modelPoints.modelPoints == []
+    modelPoints.app.messageQueue.put.assert_called_with('ToModel>00')
@@ -0,0 +1,76 @@
+############################################################
+# -*- coding: utf-8 -*-
+#
+#       #   #  #   #   #  ####
+#      ##  ##  #  ##  #     #
+#     # # # #  # # # #     ###
+#    #  ##  #  ##  ##        #
+#   #   #   #  #   #     ####
+#
+# Python-based Tool for interaction with the 10micron mounts
+# GUI with PyQT5 for python
+# Python  v3.6.4
+#
+# Michael Würtenberger
+# (c) 2016, 2017, 2018
+#
+# Licence APL2.0
+#
+###########################################################
+import PyQt5
+import PyQt5.QtCore
+import pytest
+from mount import mount_benchmark
+from mount import mount_simulator
+
+# the dispatcher with its runners and protocol engine against the mount simulator
+
+
+@pytest.fixture(scope='module')
+def benchmark():
+    application = PyQt5.QtCore.QCoreApplication.instance() or PyQt5.QtCore.QCoreApplication([])
+    simulator = mount_simulator.MountSimulator(port=0)
+    simulator.start()
+    mountBenchmark = mount_benchmark.MountBenchmark(simulator)
+    mountBenchmark.start()
+    mountBenchmark.waitReady()
+    yield mountBenchmark
+    mountBenchmark.stop()
+    simulator.stop()
+    del application
+
+
+def test_status_once(benchmark):
+    # the once runner made the protocol ready with the firmware of the simulator
+    assert benchmark.dispatcher.data['FW'] == 21611
+    assert benchmark.dispatcher.data['FirmwareProductName'] == '10micron GM1000HPS'
+
+
+def test_status_fast(benchmark):
+    benchmark.dispatcher.data.pop('Status', None)
+    benchmark.getStatusFast()
+    data = benchmark.dispatcher.data
+    assert data['Status'] == mount_simulator.MountSimulator.STATUS_TRACKING
+    assert data['Pierside'] == benchmark.simulator.pierside
+    assert 0 <= data['Az'] < 360
+    assert len(data['LocalSiderealTime']) > 0
+
+
+def test_alignment_model_round_trip(benchmark):
+    alignData = benchmark.getAlignmentData(7, benchmark.simulator.getLocalSiderealTime())
+    benchmark.setAlignmentModel(alignData)
+    assert len(benchmark.simulator.alignPoints) == 7
+    benchmark.getAlignmentModel()
+    data = benchmark.dispatcher.data
+    assert data['Number'] == 7
+    assert len(data['ModelAzimuth']) == 7
+    # the solved positions were uploaded 5 to 11 arcsec off in dec, which the mount reports as point error
+    assert data['ModelError'] == pytest.approx([point['Error'] for point in benchmark.simulator.alignPoints], abs=0.1)
+    assert all(4 <= error <= 12 for error in data['ModelError'])
+
+
+def test_alignment_model_too_few_points(benchmark):
+    # the mount calculates no model with less than 3 points, so endalig replies E
+    alignData = benchmark.getAlignmentData(2, benchmark.simulator.getLocalSiderealTime())
+    with pytest.raises(ValueError):
+        benchmark.setAlignmentModel(alignData)
@@ -0,0 +1,50 @@
+############################################################
+# -*- coding: utf-8 -*-
+#
+#       #   #  #   #   #  ####
+#      ##  ##  #  ##  #     #
+#     # # # #  # # # #     ###
+#    #  ##  #  ##  ##        #
+#   #   #   #  #   #     ####
+#
+# Python-based Tool for interaction with the 10micron mounts
+# GUI with PyQT5 for python
+# Python  v3.6.4
+#
+# Michael Würtenberger
+# (c) 2016, 2017, 2018
+#
+# Licence APL2.0
+#
+###########################################################
+from unittest import mock
+import numpy
+import pytest
+from astrometry import transform
+from mount import align_stars
+
+
+@pytest.fixture
+def transformation():
+    return transform.Transform(mock.MagicMock())
+
+
+@pytest.mark.parametrize('index, splitter', [(0, ' '), (1, ' ')])
+def test_deg_string_to_decimal_stars(transformation, index, splitter):
+    # ra and dec of the alignment stars, converted in one batch and string by string
+    values = [star[index] for star in align_stars.AlignStars.stars.values()]
+    result = transformation.degStringToDecimal(values, splitter)
+    assert result.tolist() == [transformation.degStringToDecimal(value, splitter) for value in values]
+
+
+@pytest.mark.parametrize('values', [['+48:02:01.6', '-011:42:17.3', '12:30'],
+                                    ['+48:02:01.6', 'xx:02:01.6'],
+                                    ['12:30', '-00:30', '+01:45']])
+def test_deg_string_to_decimal_mixed(transformation, values):
+    result = transformation.degStringToDecimal(values)
+    assert result.tolist() == [transformation.degStringToDecimal(value) for value in values]
+
+
+def test_deg_string_to_decimal_empty(transformation):
+    assert transformation.degStringToDecimal([]).shape == (0,)
+    assert numpy.array_equal(transformation.degStringToDecimal(['-00:30:00']), [-0.5])
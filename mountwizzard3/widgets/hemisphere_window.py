@@ -20,7 +20,6 @@
 import logging
 import PyQt5
 from baseclasses import widget
-from astrometry import transform
 import astropy
 import copy
 import numpy
@@ -35,7 +34,7 @@ class HemisphereWindow(widget.MwWidget):
     def __init__(self, app):
         super(HemisphereWindow, self).__init__()
         self.app = app
-        self.transform = transform.Transform(self.app)
+        self.transform = self.app.transform
         self.mutexDrawCanvas = PyQt5.QtCore.QMutex()
         self.mutexDrawCanvasMoving = PyQt5.QtCore.QMutex()
 
@@ -422,6 +421,7 @@ class HemisphereWindow(widget.MwWidget):
             # delete a point
             if len(horizon) > 2:
                 del(horizon[ind])
+                self.app.workerModelingDispatcher.modelingRunner.modelPoints.compileHorizonMask()
             # now redraw plot
             self.maskPlotMarker.set_data([i[0] for i in horizon], [i[1] for i in horizon])
             x = [i[0] for i in horizon]
@@ -434,6 +434,7 @@ class HemisphereWindow(widget.MwWidget):
         if event.button == 1 and ind is None and self.ui.checkEditHorizonMask.isChecked():
             if indlow is not None:
                 horizon.insert(indlow + 1, (event.xdata, event.ydata))
+                self.app.workerModelingDispatcher.modelingRunner.modelPoints.compileHorizonMask()
             self.maskPlotMarker.set_data([i[0] for i in horizon], [i[1] for i in horizon])
             x = [i[0] for i in horizon]
             x.insert(0, 0)
@@ -517,6 +518,7 @@ class HemisphereWindow(widget.MwWidget):
             del(horizon[:])
             horizon.append((0, 0))
             horizon.append((360, 0))
+            self.app.workerModelingDispatcher.modelingRunner.modelPoints.compileHorizonMask()
         x = [i[0] for i in horizon]
         x.insert(0, 0)
         x.append(360)
@@ -27,7 +27,6 @@ import astropy.io.fits as pyfits
 from astropy.visualization import MinMaxInterval, ImageNormalize, AsymmetricPercentileInterval, PowerStretch
 from matplotlib import use
 from baseclasses import widget
-from astrometry import transform
 from gui import image_window_ui
 use('Qt5Agg')
 
@@ -81,7 +80,7 @@ class ImagesWindow(widget.MwWidget):
         self.imagePath = ''
         self.imageReady = False
         self.solveReady = False
-        self.transform = transform.Transform(self.app)
+        self.transform = self.app.transform
         self.ui = image_window_ui.Ui_ImageDialog()
         self.ui.setupUi(self)
         self.initUI()